@@ -0,0 +1,82 @@
+"""Recomputes derived caption columns (and the search index) for existing rows,
+optionally re-encoding each document into another storage encoding.
+
+Run with ``python -m app.backfill [--batch-size N] [--reindex] [--encoding E]``.
+"""
+import argparse
+import logging
+
+from supabase import Client
+
+from . import codec
+from .database import get_supabase
+from .repository import INDEX_EVENTS_RPC, TABLE, derived_columns
+from .search import index_rows
+
+logger = logging.getLogger(__name__)
+COLUMNS = "id,data,version"
+MAX_ATTEMPTS = 3
+
+
+def _rewrite(client: Client, row: dict, reindex: bool, encoding: codec.Encoding | None) -> bool:
+    """Rewrites one row, guarded by the version it was read at. False if it has changed since."""
+    data = codec.decode(row["data"])
+    payload = derived_columns(data)
+    if encoding is not None:
+        payload["data"] = codec.encode(data, encoding)
+    res = client.table(TABLE).update(payload).eq("id", row["id"]).eq("version", row["version"]).execute()
+    if not res.data:
+        return False
+    if reindex:
+        client.rpc(INDEX_EVENTS_RPC, {"entries": [{"id": row["id"], "events": index_rows(data)}]}).execute()
+    return True
+
+
+def backfill(
+    client: Client,
+    batch_size: int = 100,
+    reindex: bool = False,
+    encoding: codec.Encoding | None = None,
+) -> int:
+    """Pages through every caption by id, rewriting its derived columns. Returns the row count.
+
+    Each write only applies if the row is still at the version it was read at, so
+    an edit made during the backfill is never reverted. A row that changed is
+    re-read and retried, up to ``MAX_ATTEMPTS`` times, and skipped if it was deleted.
+    """
+    count = 0
+    after = None
+    while True:
+        query = client.table(TABLE).select(COLUMNS)
+        if after is not None:
+            query = query.gt("id", after)
+        rows = query.order("id").limit(batch_size).execute().data
+        for row in rows:
+            current = row
+            for _ in range(MAX_ATTEMPTS):
+                if _rewrite(client, current, reindex, encoding):
+                    break
+                fresh = client.table(TABLE).select(COLUMNS).eq("id", row["id"]).execute().data
+                if not fresh:
+                    break
+                current = fresh[0]
+            else:
+                logger.warning("Skipped caption %s: it kept changing during the backfill", row["id"])
+        count += len(rows)
+        if len(rows) < batch_size:
+            return count
+        after = rows[-1]["id"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--reindex", action="store_true", help="also rebuild the search rows in the database")
+    parser.add_argument("--encoding", choices=["json", "compact", "zstd"], help="re-encode documents")
+    args = parser.parse_args()
+    count = backfill(get_supabase(), args.batch_size, args.reindex, args.encoding)
+    print(f"Backfilled {count} captions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import json
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Protocol
+
+from .config import get_settings
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> bytes | None: ...
+    def set(self, key: str, value: bytes) -> None: ...
+    def delete(self, key: str) -> None: ...
+
+
+class LRUCache:
+    """In-process LRU bounded by total value size, with a per-entry TTL.
+
+    Values are sized with ``sizeof``, which defaults to ``len`` for byte strings.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.bytes = 0
+        self._clock = clock
+        self._sizeof = sizeof
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self._clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: float | None = None) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (self._clock() + ttl, value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+
+class TieredCache:
+    """Reads through a local cache to a shared backend, filling the local one on hits."""
+
+    def __init__(self, local: CacheBackend, shared: CacheBackend):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: str) -> bytes | None:
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self.shared.set(key, value)
+        self.local.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.shared.delete(key)
+        self.local.delete(key)
+
+
+class CaptionsCache:
+    """Caches caption rows under ``id@version`` keys.
+
+    A per-id pointer names the current version, so stale versions are never
+    served and simply age out of the records cache. Writes replace the pointer
+    with a tombstone naming the version they wrote (``!version``, or a version
+    nothing matches for deletes). A read-through fill only moves the pointer
+    from nothing, a tombstone for the version being filled, or that same
+    version, so a reader that fetched a row before a concurrent write cannot
+    reinstate the old version afterwards.
+
+    Pointers live in ``pointers`` (the shared backend, when there is one) so every
+    process sees invalidations, while the immutable records can also sit locally.
+    The fill's check-and-set is atomic within a process only.
+    """
+
+    def __init__(self, records: CacheBackend, pointers: CacheBackend | None = None):
+        self._records = records
+        self._pointers = pointers or records
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, id: str) -> dict | None:
+        pointer = self._pointers.get(f"captions:{id}")
+        version = pointer.decode() if pointer else None
+        value = None
+        if version and not version.startswith("!"):
+            value = self._records.get(f"captions:{id}@{version}")
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(value)
+
+    def put(self, record: dict, version: str) -> bool:
+        """Caches ``record`` as the current ``version``. Returns False, caching
+        nothing, if a write has since moved the row to a different version."""
+        key = f"captions:{record['id']}"
+        with self._lock:
+            current = self._pointers.get(key)
+            if current is not None and current.decode() not in (version, f"!{version}"):
+                return False
+            self._records.set(f"{key}@{version}", json.dumps(record).encode())
+            self._pointers.set(key, version.encode())
+        return True
+
+    def invalidate(self, id: str, version: str | None = None) -> None:
+        """Drops the cached row after a write that left it at ``version`` (None for deletes)."""
+        tombstone = f"!{version if version is not None else uuid.uuid4().hex + '-deleted'}"
+        with self._lock:
+            self._pointers.set(f"captions:{id}", tombstone.encode())
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        local = self._records.local if isinstance(self._records, TieredCache) else self._records
+        if isinstance(local, LRUCache):
+            stats |= {"entries": len(local), "bytes": local.bytes, "max_bytes": local.max_bytes}
+        return stats
+
+
+@lru_cache
+def get_captions_cache() -> CaptionsCache | None:
+    """Returns the process-local cache, or None unless ``CACHE_MAX_BYTES`` enables it.
+    Writes only invalidate it in the process that made them, so it is only safe for
+    deployments running a single API process."""
+    settings = get_settings()
+    if settings.cache_max_bytes <= 0:
+        return None
+    return CaptionsCache(LRUCache(settings.cache_max_bytes, settings.cache_ttl_seconds))
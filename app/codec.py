@@ -0,0 +1,98 @@
+"""On-disk encodings for caption documents stored in the ``data`` column.
+
+Legacy rows hold the plain ``Captions.model_dump()`` dict. Newer rows carry a
+``_v`` format tag:
+
+* ``compact`` elides every field equal to its model default and stores each
+  event's words as parallel ``t`` (text), ``s`` (start) and ``d`` (duration)
+  arrays instead of one object per word.
+* ``zstd`` is the compact document serialised and compressed (zstd where the
+  interpreter ships ``compression.zstd``, zlib otherwise), base64-encoded so
+  it still fits a JSON column.
+
+``decode`` always returns the full, legacy-shaped dict.
+"""
+import base64
+import json
+import zlib
+from typing import Literal
+
+try:
+    from compression import zstd
+except ImportError:  # Python < 3.14
+    zstd = None
+
+from .models import CaptionsEvent, CaptionsInfo, CaptionsStyle
+
+Encoding = Literal["json", "compact", "zstd"]
+
+FORMAT_VERSION = 2
+
+_INFO_DEFAULTS = CaptionsInfo().model_dump()
+_STYLE_DEFAULTS = CaptionsStyle().model_dump()
+_EVENT_DEFAULTS = CaptionsEvent().model_dump(exclude={"Words"})
+
+
+def _elide(values: dict, defaults: dict) -> dict:
+    return {k: v for k, v in values.items() if k not in defaults or defaults[k] != v}
+
+
+def compact_event(event: dict) -> dict:
+    """Returns one event in the ``compact`` encoding, for patching it into a stored document."""
+    words = event.get("Words", [])
+    compact = _elide({k: v for k, v in event.items() if k != "Words"}, _EVENT_DEFAULTS)
+    compact["t"] = [w["text"] for w in words]
+    compact["s"] = [w["start"] for w in words]
+    compact["d"] = [w["end"] - w["start"] for w in words]
+    return compact
+
+
+def _compact(data: dict) -> dict:
+    doc = {"_v": FORMAT_VERSION, "events": [compact_event(event) for event in data.get("events", [])]}
+    if "info" in data:
+        doc["info"] = _elide(data["info"], _INFO_DEFAULTS)
+    if "styles" in data:
+        doc["styles"] = [_elide(style, _STYLE_DEFAULTS) for style in data["styles"]]
+    return doc
+
+
+def _expand(doc: dict) -> dict:
+    data = {}
+    if "info" in doc:
+        data["info"] = _INFO_DEFAULTS | doc["info"]
+    if "styles" in doc:
+        data["styles"] = [_STYLE_DEFAULTS | style for style in doc["styles"]]
+    events = []
+    for compact in doc["events"]:
+        event = _EVENT_DEFAULTS | {k: v for k, v in compact.items() if k not in ("t", "s", "d")}
+        event["Words"] = [
+            {"text": t, "start": s, "end": s + d}
+            for t, s, d in zip(compact["t"], compact["s"], compact["d"])
+        ]
+        events.append(event)
+    data["events"] = events
+    return data
+
+
+def encode(data: dict, encoding: Encoding = "json") -> dict:
+    if encoding == "json":
+        return data
+    doc = _compact(data)
+    if encoding == "compact":
+        return doc
+    raw = json.dumps(doc, separators=(",", ":")).encode()
+    if zstd is not None:
+        return {"_v": FORMAT_VERSION, "zstd": base64.b64encode(zstd.compress(raw)).decode()}
+    return {"_v": FORMAT_VERSION, "zlib": base64.b64encode(zlib.compress(raw, 6)).decode()}
+
+
+def decode(data: dict) -> dict:
+    if "_v" not in data:
+        return data
+    if "zstd" in data:
+        if zstd is None:
+            raise RuntimeError("zstd-encoded captions require Python 3.14+")
+        data = json.loads(zstd.decompress(base64.b64decode(data["zstd"])))
+    elif "zlib" in data:
+        data = json.loads(zlib.decompress(base64.b64decode(data["zlib"])))
+    return _expand(data)
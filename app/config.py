@@ -1,12 +1,32 @@
 from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
-    supabase_url: str
-    supabase_key: str
+    db_backend: Literal["supabase", "sqlite"] = "supabase"
+    supabase_url: str = ""
+    supabase_key: str = ""
+    sqlite_path: str = "captions.db"
     assemblyai_key: str
-    gcs_bucket: str
+    storage_backend: Literal["gcs", "local"] = "gcs"
+    gcs_bucket: str = ""
+    storage_local_path: str = "storage"
+    db_max_connections: int = 100
+    db_max_keepalive_connections: int = 20
+    db_timeout_seconds: float = 30
+    cache_max_bytes: int = 0
+    cache_ttl_seconds: float = 300
+    upload_chunk_bytes: int = 64 * 1024 * 1024
+    upload_workers: int = 8
+    upload_chunk_retries: int = 3
+    status_flush_seconds: float = 1.0
+    idempotency_ttl_seconds: float = 24 * 60 * 60
+    idempotency_lease_seconds: float = 5 * 60
+    profiling_enabled: bool = False
+    profile_path: str = "profiles"
+    captions_encoding: Literal["json", "compact", "zstd"] = "compact"
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
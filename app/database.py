@@ -1,10 +1,59 @@
+import asyncio
 from functools import lru_cache
-from supabase import create_client, Client
+
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, acreate_client, create_client
 
 from .config import get_settings
+from .sqlite import AsyncSqliteClient, SqliteClient
 
 
 @lru_cache
-def get_supabase() -> Client:
+def get_supabase() -> Client | SqliteClient:
     settings = get_settings()
+    if settings.db_backend == "sqlite":
+        return SqliteClient(settings.sqlite_path)
     return create_client(settings.supabase_url, settings.supabase_key)
+
+
+_async_client: AsyncClient | AsyncSqliteClient | None = None
+_async_client_lock = asyncio.Lock()
+
+
+async def get_async_supabase() -> AsyncClient | AsyncSqliteClient:
+    """Returns the process-wide async client, whose PostgREST calls share one
+    pooled, keep-alive HTTP/2 connection pool. With ``DB_BACKEND=sqlite`` it is
+    an embedded SQLite database exposing the same query interface instead."""
+    global _async_client
+    if _async_client is None:
+        async with _async_client_lock:
+            if _async_client is None:
+                settings = get_settings()
+                if settings.db_backend == "sqlite":
+                    _async_client = AsyncSqliteClient(settings.sqlite_path)
+                    return _async_client
+                http_client = httpx.AsyncClient(
+                    http2=True,
+                    follow_redirects=True,
+                    timeout=httpx.Timeout(settings.db_timeout_seconds),
+                    limits=httpx.Limits(
+                        max_connections=settings.db_max_connections,
+                        max_keepalive_connections=settings.db_max_keepalive_connections,
+                        keepalive_expiry=30,
+                    ),
+                )
+                _async_client = await acreate_client(
+                    settings.supabase_url,
+                    settings.supabase_key,
+                    AsyncClientOptions(httpx_client=http_client),
+                )
+    return _async_client
+
+
+async def close_async_supabase() -> None:
+    global _async_client
+    if isinstance(_async_client, AsyncSqliteClient):
+        _async_client.close()
+    elif _async_client is not None:
+        await _async_client.options.httpx_client.aclose()
+    _async_client = None
@@ -0,0 +1,46 @@
+from typing import Literal
+
+from .models import CaptionsPatchOp, DeleteEventOp, EditWordOp, InsertEventOp, ReplaceEventOp
+
+
+def _check_index(index: int, size: int) -> None:
+    if not 0 <= index < size:
+        raise IndexError(f"Index {index} out of range (0-{size - 1})")
+
+
+EventChange = tuple[Literal["set", "insert", "delete"], int, dict | None]
+
+
+def apply_ops(data: dict, ops: list[CaptionsPatchOp]) -> list[EventChange]:
+    """Applies event-level edit operations to a stored caption document in place.
+
+    Only the events touched by ``ops`` are (re)serialised; the rest of the
+    document is left as the raw stored JSON. Returns one ``(kind, index, event)``
+    change per op, in order, so the write can patch just those events. Each
+    ``event`` is the document's own dict, so replaying the changes in order
+    reproduces ``data`` even when later ops edit the same event again.
+    """
+    events = data.setdefault("events", [])
+    changes: list[EventChange] = []
+    for op in ops:
+        match op:
+            case ReplaceEventOp():
+                _check_index(op.index, len(events))
+                events[op.index] = op.event.model_dump()
+                changes.append(("set", op.index, events[op.index]))
+            case InsertEventOp():
+                if not 0 <= op.index <= len(events):
+                    raise IndexError(f"Index {op.index} out of range (0-{len(events)})")
+                events.insert(op.index, op.event.model_dump())
+                changes.append(("insert", op.index, events[op.index]))
+            case DeleteEventOp():
+                _check_index(op.index, len(events))
+                del events[op.index]
+                changes.append(("delete", op.index, None))
+            case EditWordOp():
+                _check_index(op.event, len(events))
+                words = events[op.event].setdefault("Words", [])
+                _check_index(op.word, len(words))
+                words[op.word].update(op.model_dump(include={"text", "start", "end"}, exclude_none=True))
+                changes.append(("set", op.event, events[op.event]))
+    return changes
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from collections import OrderedDict, defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from functools import lru_cache
+
+TERMINAL_STATUSES = frozenset({"done", "failed"})
+HEARTBEAT_SECONDS = 15
+
+
+class JobEvents:
+    """In-process pub/sub for burn job updates.
+
+    The burn worker publishes every status change and progress stage; SSE and
+    WebSocket clients subscribe per job instead of polling the database. The
+    latest event of each job is kept (bounded LRU) so late subscribers start
+    from the current state.
+    """
+
+    def __init__(self, max_jobs: int = 10_000):
+        self.max_jobs = max_jobs
+        self._latest: OrderedDict[str, dict] = OrderedDict()
+        self._subscribers: defaultdict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def latest(self, job_id: str) -> dict | None:
+        return self._latest.get(job_id)
+
+    def subscribers(self, job_id: str) -> int:
+        return len(self._subscribers.get(job_id, ()))
+
+    def publish(self, job_id: str, event: dict) -> None:
+        self._latest[job_id] = event
+        self._latest.move_to_end(job_id)
+        while len(self._latest) > self.max_jobs:
+            self._latest.popitem(last=False)
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id].add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(job_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[job_id]
+
+    async def follow(
+        self,
+        job_id: str,
+        queue: asyncio.Queue,
+        current: dict,
+        heartbeat: float | None = None,
+        refresh: Callable[[], Awaitable[dict | None]] | None = None,
+    ) -> AsyncIterator[dict | None]:
+        """Yields ``current``, then each update from ``queue`` until the job reaches a
+        terminal status. Yields None after ``heartbeat`` idle seconds so callers can
+        keep the connection alive. Unsubscribes ``queue`` when done or cancelled.
+
+        Nothing is published here for a job burned by another instance, so on each
+        heartbeat with no local event ``refresh`` re-reads the stored job: a change is
+        yielded like a published update, and the stream ends if the job is gone.
+        """
+        heartbeat = HEARTBEAT_SECONDS if heartbeat is None else heartbeat
+        try:
+            event = current
+            yield event
+            while event.get("status") not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except TimeoutError:
+                    if refresh is None or self.latest(job_id) is not None:
+                        yield None
+                        continue
+                    stored = await refresh()
+                    if stored is None:
+                        return
+                    if stored == event:
+                        yield None
+                        continue
+                    event = stored
+                yield event
+        finally:
+            self.unsubscribe(job_id, queue)
+
+
+def format_sse(event: dict | None) -> str:
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"event: status\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+@lru_cache
+def get_job_events() -> JobEvents:
+    return JobEvents()
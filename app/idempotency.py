@@ -0,0 +1,163 @@
+import asyncio
+import datetime
+import hashlib
+import logging
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from .config import get_settings
+from .repository import AsyncIdempotencyRepository
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+logger = logging.getLogger(__name__)
+
+
+def request_fingerprint(method: str, path: str, body: bytes = b"") -> str:
+    """Identifies what a request asks for, so a key reused for a different request is rejected."""
+    return hashlib.sha256(f"{method} {path}\n".encode() + body).hexdigest()
+
+
+class Idempotency:
+    """Runs each ``Idempotency-Key`` at most once.
+
+    The first request with a key claims it in ``idempotency_keys`` and stores its
+    response; repeats within ``ttl_seconds`` replay that response. Duplicates that
+    arrive while the first is still running in this process wait for its result;
+    on another instance they get ``409`` with ``Retry-After``. A request that fails
+    releases its key, so it can be retried.
+
+    A running request holds its claim for ``lease_seconds`` and renews it while it
+    runs. If the request dies without releasing the key (a crashed instance), the
+    lease runs out and the next request with the key takes it over.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, lease_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+        self._in_flight: dict[str, tuple[str, asyncio.Future]] = {}
+
+    async def run(
+        self,
+        repo: AsyncIdempotencyRepository,
+        key: str | None,
+        fingerprint: str,
+        status_code: int,
+        handler: Callable[[], Awaitable],
+    ):
+        if key is None:
+            return await handler()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        while True:
+            if key in self._in_flight:
+                in_flight_fingerprint, future = self._in_flight[key]
+                self._check_fingerprint(in_flight_fingerprint, fingerprint)
+                try:
+                    record = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled() or asyncio.current_task().cancelling():
+                        raise
+                    continue  # the first request was cancelled, so claim the key ourselves
+                if record is not None:
+                    return self._replay(record)
+                continue
+
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = (fingerprint, future)
+            try:
+                record, replayed = await self._execute(repo, key, fingerprint, status_code, handler)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                future.exception()  # mark retrieved: there may be no waiters
+                raise
+            else:
+                future.set_result(record)
+            finally:
+                del self._in_flight[key]
+            if record is not None:
+                if replayed:
+                    return self._replay(record)
+                return JSONResponse(record["response"], status_code=record["status_code"])
+
+    async def _execute(self, repo, key, fingerprint, status_code, handler) -> tuple[dict | None, bool]:
+        """Returns the response record and whether it was stored by an earlier request.
+        The record is None when the key was freed meanwhile and should be claimed again."""
+        if not await repo.claim(key, fingerprint, self._lease_until()):
+            record = await repo.get(key)
+            if record is None:
+                return None, True
+            self._check_fingerprint(record["fingerprint"], fingerprint)
+            # A pending record whose lease ran out belongs to a request that died; deleting
+            # it (only if it is still that record) lets the loop claim the key again.
+            if self._expired(record) or (record["status"] != "done" and self._lease_expired(record)):
+                await repo.expire(key, record["created_at"])
+                return None, True
+            if record["status"] != "done":
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is in progress",
+                    headers={"Retry-After": "1"},
+                )
+            return record, True
+
+        renewal = asyncio.create_task(self._renew_lease(repo, key))
+        try:
+            content = jsonable_encoder(await handler())
+            await repo.complete(key, status_code, content)
+        except BaseException:
+            await asyncio.shield(repo.release(key))
+            raise
+        finally:
+            renewal.cancel()
+        return {"status_code": status_code, "response": content}, False
+
+    def _lease_until(self) -> str:
+        return (datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=self.lease_seconds)).isoformat()
+
+    async def _renew_lease(self, repo: AsyncIdempotencyRepository, key: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await repo.renew(key, self._lease_until())
+            except Exception:
+                # Two more tries before the lease runs out.
+                logger.exception("Failed to renew the lease on Idempotency-Key %r", key)
+
+    def _expired(self, record: dict) -> bool:
+        age = datetime.datetime.now(datetime.UTC) - datetime.datetime.fromisoformat(record["created_at"])
+        return age.total_seconds() > self.ttl_seconds
+
+    def _lease_expired(self, record: dict) -> bool:
+        # Records claimed before leases existed hold one from their creation.
+        if record.get("locked_until") is not None:
+            until = datetime.datetime.fromisoformat(record["locked_until"])
+        else:
+            until = datetime.datetime.fromisoformat(record["created_at"]) + datetime.timedelta(seconds=self.lease_seconds)
+        return datetime.datetime.now(datetime.UTC) >= until
+
+    @staticmethod
+    def _check_fingerprint(stored: str, fingerprint: str) -> None:
+        if stored != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+    @staticmethod
+    def _replay(record: dict) -> JSONResponse:
+        return JSONResponse(record["response"], status_code=record["status_code"], headers={REPLAYED_HEADER: "true"})
+
+
+@lru_cache
+def get_idempotency() -> Idempotency:
+    settings = get_settings()
+    return Idempotency(
+        ttl_seconds=settings.idempotency_ttl_seconds, lease_seconds=settings.idempotency_lease_seconds
+    )
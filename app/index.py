@@ -0,0 +1,80 @@
+import json
+import math
+from bisect import bisect_left, bisect_right
+
+from .cache import LRUCache
+from .repository import caption_version
+
+INDEX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class EventIndex:
+    """Sorted start/end index over a caption document's events.
+
+    Events are ordered by start time alongside a running maximum of their end
+    times, so a window query is two binary searches plus a scan over the
+    candidates in between: O(log n + k) for non-overlapping events.
+
+    Only events with words are kept, each serialised to JSON once, so a cached
+    index costs about the size of those events on the wire rather than their
+    decoded dicts, and responses are built without re-encoding them.
+    """
+
+    def __init__(self, events: list[dict]):
+        spans = []
+        for i, event in enumerate(events):
+            words = event.get("Words") or []
+            if words:
+                spans.append((min(w["start"] for w in words), max(w["end"] for w in words), i))
+        spans.sort()
+        self._starts = [start for start, _, _ in spans]
+        self._ends = [end for _, end, _ in spans]
+        self._positions = [i for _, _, i in spans]
+        self._events = [json.dumps(events[i], separators=(",", ":")).encode() for i in self._positions]
+        self._max_ends = []
+        running = 0
+        for end in self._ends:
+            running = max(running, end)
+            self._max_ends.append(running)
+        # Four 8-byte slots per event for the arrays, on top of the JSON itself.
+        self.nbytes = sum(map(len, self._events)) + 32 * len(self._events)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def query(self, from_ms: int, to_ms: int | None = None) -> list[tuple[int, bytes]]:
+        """Returns ``(index, event JSON)`` pairs overlapping ``[from_ms, to_ms)``, by start time."""
+        lo = bisect_right(self._max_ends, from_ms)
+        hi = len(self._starts) if to_ms is None else bisect_left(self._starts, to_ms)
+        return [
+            (self._positions[i], self._events[i])
+            for i in range(lo, hi)
+            if self._ends[i] > from_ms
+        ]
+
+
+def render_events(results: list[tuple[int, bytes]]) -> bytes:
+    """Encodes query results as a JSON array of events, each with its ``index`` added."""
+    # Every kept event has a "Words" key, so its JSON object is never empty.
+    return b"[" + b",".join(b'{"index":%d,%s' % (index, event[1:]) for index, event in results) + b"]"
+
+
+_cache = LRUCache(INDEX_CACHE_BYTES, math.inf, sizeof=lambda index: index.nbytes)
+
+
+def cached_event_index(id: str, version: str) -> EventIndex | None:
+    """Returns the index built for ``id`` at ``version``, if it is still cached."""
+    return _cache.get(f"{id}@{version}")
+
+
+def get_event_index(record: dict) -> EventIndex:
+    """Returns the index for a caption row, reusing it while the row's version is unchanged.
+
+    Building one decodes every event, so async callers run this in a thread.
+    """
+    key = f"{record['id']}@{caption_version(record)}"
+    index = _cache.get(key)
+    if index is None:
+        index = EventIndex(record["data"].get("events", []))
+        _cache.set(key, index)
+    return index
@@ -1,28 +1,103 @@
-from fastapi import BackgroundTasks, FastAPI, HTTPException, Depends
-from fastapi.responses import RedirectResponse
-from supabase import Client
+import io
+import os
+from contextlib import aclosing, asynccontextmanager
+from enum import Enum
+from functools import partial
+from pathlib import Path, PurePath
+
+from fastapi import (
+    BackgroundTasks, FastAPI, HTTPException, Depends, Header, Query, Request, Response, UploadFile, WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from supabase import AsyncClient
 
 from .burning import burn_video
-from .database import get_supabase
-from .models import BurnJob, Captions, VideoTranscribeRequest
-from .repository import BurnJobRepository, CaptionsRepository, VideoRepository
-from .storage import generate_signed_url
+from .cache import CaptionsCache, get_captions_cache
+from .config import Settings, get_settings
+from .database import close_async_supabase, get_async_supabase
+from .editing import EventChange, apply_ops
+from .events import JobEvents, format_sse, get_job_events
+from .idempotency import Idempotency, get_idempotency, request_fingerprint
+from .metrics import BURN_JOBS_QUEUED, CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from .profiling import ProfileStore, ProfilingMiddleware, get_profile_store, span
+from .index import cached_event_index, get_event_index, render_events
+from .models import BurnJob, Captions, CaptionsPatch, ResegmentRequest, RetimeRequest, VideoTranscribeRequest
+from .repository import AsyncBurnJobRepository, AsyncCaptionsRepository, AsyncIdempotencyRepository, caption_version
+from .segmentation import resegment
+from .status import get_status_writer
+from .storage import StorageBackend, get_storage
+from .timing import retime
 from .transcription import transcribe
 from . import __version__, __title__
 
-app = FastAPI(title=__title__, version=__version__)
 
 
-def get_repo(client: Client = Depends(get_supabase)) -> CaptionsRepository:
-    return CaptionsRepository(client)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await get_status_writer().flush()
+    await close_async_supabase()
 
 
-def get_video_repo(client: Client = Depends(get_supabase)) -> VideoRepository:
-    return VideoRepository(client)
+app = FastAPI(title=__title__, version=__version__, lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
-def get_burn_repo(client: Client = Depends(get_supabase)) -> BurnJobRepository:
-    return BurnJobRepository(client)
+class ExportFormat(str, Enum):
+    srt = "srt"
+    vtt = "vtt"
+    ass = "ass"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.srt: "application/x-subrip; charset=utf-8",
+    ExportFormat.vtt: "text/vtt; charset=utf-8",
+    ExportFormat.ass: "text/x-ssa; charset=utf-8",
+}
+
+IMPORT_BATCH_SIZE = 100
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+
+def get_repo(
+    client: AsyncClient = Depends(get_async_supabase),
+    cache: CaptionsCache | None = Depends(get_captions_cache),
+    settings: Settings = Depends(get_settings),
+) -> AsyncCaptionsRepository:
+    return AsyncCaptionsRepository(client, cache=cache, encoding=settings.captions_encoding)
+
+
+def _versioned(record: dict) -> dict:
+    """Returns ``record`` with its ``version`` as the string that ``If-Match`` and the
+    edit endpoints' body ``version`` are compared against."""
+    return {**record, "version": caption_version(record)}
+
+
+def _etag(version: str, variant: str | None = None) -> str:
+    return f'"{version}-{variant}"' if variant else f'"{version}"'
+
+
+def _etag_matches(header: str | None, etag: str, weak: bool = True) -> bool:
+    """Evaluates an If-None-Match (weak comparison) or If-Match (strong comparison) header."""
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    if "*" in tags:
+        return True
+    if weak:
+        tags = [tag.removeprefix("W/") for tag in tags]
+    return etag in tags
+
+
+def get_burn_repo(client: AsyncClient = Depends(get_async_supabase)) -> AsyncBurnJobRepository:
+    return AsyncBurnJobRepository(client)
+
+
+def get_idempotency_repo(client: AsyncClient = Depends(get_async_supabase)) -> AsyncIdempotencyRepository:
+    return AsyncIdempotencyRepository(client)
 
 
 @app.get("/health")
@@ -30,109 +105,477 @@ def health() -> bool:
     return True
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _profile_file(profile_id: str, suffix: str, settings: Settings, store: ProfileStore) -> Path:
+    path = store.path(profile_id, suffix) if settings.profiling_enabled else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return path
+
+
+@app.get("/profiles/{profile_id}.prof", include_in_schema=False)
+def download_profile(
+    profile_id: str,
+    settings: Settings = Depends(get_settings),
+    store: ProfileStore = Depends(get_profile_store),
+) -> FileResponse:
+    path = _profile_file(profile_id, ".prof", settings, store)
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
+@app.get("/profiles/{profile_id}", include_in_schema=False)
+def get_profile(
+    profile_id: str,
+    settings: Settings = Depends(get_settings),
+    store: ProfileStore = Depends(get_profile_store),
+) -> FileResponse:
+    return FileResponse(_profile_file(profile_id, ".json", settings, store), media_type="application/json")
+
+
+@app.get("/cache/stats")
+def cache_stats(cache: CaptionsCache | None = Depends(get_captions_cache)) -> dict:
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+@app.get("/search")
+async def search_captions(
+    q: str = Query(min_length=1),
+    limit: int = Query(default=50, ge=1, le=500),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    return await repo.search(q, limit)
+
+
 @app.get("/captions")
-def list_captions(repo: CaptionsRepository = Depends(get_repo)):
-    return repo.list()
+async def list_captions(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    video_id: str | None = None,
+    fields: str | None = None,
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    include_data = "data" in (fields or "").split(",")
+    rows = await repo.list(limit=limit, after=cursor, video_id=video_id, include_data=include_data)
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = rows[-1]["id"]
+    return [_versioned(row) for row in rows]
 
 
 @app.post("/captions", status_code=201)
-def create_captions(captions: Captions, repo: CaptionsRepository = Depends(get_repo)):
-    return repo.create(captions)
+async def create_captions(captions: Captions, repo: AsyncCaptionsRepository = Depends(get_repo)):
+    return _versioned(await repo.create(captions))
+
+
+def _parse_upload(file: UploadFile) -> Captions:
+    suffix = PurePath(file.filename or "").suffix.lower().lstrip(".")
+    try:
+        format = ExportFormat(suffix)
+    except ValueError:
+        raise HTTPException(status_code=415, detail=f"Unsupported subtitle format: '{file.filename}'")
+
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace")
+    try:
+        if format is ExportFormat.ass:
+            return Captions.from_ass(lines)
+        title = PurePath(file.filename).stem
+        return getattr(Captions, f"from_{format.value}")(lines, title=title)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Failed to parse '{file.filename}': {e}")
+    finally:
+        lines.detach()
+
+
+@app.post("/captions/import", status_code=201)
+async def import_captions(files: list[UploadFile], repo: AsyncCaptionsRepository = Depends(get_repo)):
+    # Parse every file before inserting any, so a bad file doesn't leave earlier batches committed.
+    parsed = [await run_in_threadpool(_parse_upload, file) for file in files]
+    created = []
+    for start in range(0, len(parsed), IMPORT_BATCH_SIZE):
+        created += await repo.create_many(parsed[start:start + IMPORT_BATCH_SIZE])
+    return [{"id": row["id"], "title": row["title"]} for row in created]
+
+
+@app.get("/captions/{id}.{format}")
+async def export_captions(
+    id: str,
+    format: ExportFormat,
+    if_none_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    record = await repo.get(id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    headers = {"ETag": _etag(caption_version(record), format.value), "Cache-Control": REVALIDATE}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    with span("Captions.model_validate"):
+        captions = await run_in_threadpool(Captions.model_validate, record["data"])
+    chunks = getattr(captions, f"iter_{format.value}")()
+    headers["Content-Disposition"] = f'inline; filename="{id}.{format.value}"'
+    return StreamingResponse(
+        (chunk.encode("utf-8") for chunk in chunks),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=headers,
+    )
 
 
 @app.get("/captions/{id}")
-def get_captions(id: str, repo: CaptionsRepository = Depends(get_repo)):
-    record = repo.get(id)
+async def get_captions(
+    id: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    record = await repo.get(id)
     if not record:
         raise HTTPException(status_code=404, detail="Not found")
-    return record
+    version = caption_version(record)
+    headers = {"ETag": _etag(version), "Cache-Control": REVALIDATE}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return {**record, "version": version}
 
 
 @app.get("/captions/{id}/text")
-def get_captions_text(id: str, repo: CaptionsRepository = Depends(get_repo)):
-    lines = repo.get_text(id)
-    if lines is None:
+async def get_captions_text(
+    id: str,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    record = await repo.get_text_record(id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    headers = {"ETag": _etag(record["version"], "text"), "Cache-Control": REVALIDATE}
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return record["full_text"]
+
+
+@app.get("/captions/{id}/events")
+async def get_captions_events(
+    id: str,
+    from_ms: int = Query(default=0, ge=0),
+    to_ms: int | None = Query(default=None, ge=0),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    if to_ms is not None and to_ms < from_ms:
+        raise HTTPException(status_code=422, detail="to_ms must not be before from_ms")
+    # Only the version is needed to find an index built earlier; the document is
+    # fetched (and indexed) only on a miss, or for rows without a version column.
+    row = await repo.get_version_record(id)
+    if row is None:
         raise HTTPException(status_code=404, detail="Not found")
-    return lines
+    index = cached_event_index(id, str(row["version"])) if row.get("version") is not None else None
+    if index is None:
+        record = await repo.get(id)
+        if not record:
+            raise HTTPException(status_code=404, detail="Not found")
+        index = await run_in_threadpool(get_event_index, record)
+    body = await run_in_threadpool(lambda: render_events(index.query(from_ms, to_ms)))
+    return Response(body, media_type="application/json")
+
+
+async def _check_if_match(repo: AsyncCaptionsRepository, id: str, if_match: str) -> str | None:
+    """Raises 404/412 unless the caption's current ETag satisfies ``If-Match``, and returns
+    the version to guard the write with so a concurrent writer can't slip in between."""
+    record = await repo.get(id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not _etag_matches(if_match, _etag(caption_version(record)), weak=False):
+        raise HTTPException(status_code=412, detail="Captions have been modified since this version")
+    return record.get("version")
 
 
 @app.put("/captions/{id}")
-def update_captions(id: str, captions: Captions, repo: CaptionsRepository = Depends(get_repo)):
-    record = repo.update(id, captions)
+async def update_captions(
+    id: str,
+    captions: Captions,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    version = await _check_if_match(repo, id, if_match) if if_match else None
+    record = await repo.update(id, captions, version=version)
     if not record:
+        if if_match:
+            raise HTTPException(status_code=412, detail="Captions have been modified since this version")
         raise HTTPException(status_code=404, detail="Not found")
+    record = _versioned(record)
+    response.headers["ETag"] = _etag(record["version"])
     return record
 
 
+async def _get_for_edit(
+    repo: AsyncCaptionsRepository, id: str, if_match: str | None, version: str | None
+) -> dict:
+    """Fetches the caption an edit applies to. ``If-Match`` is checked like PUT (412);
+    the body ``version`` is its legacy alias and still answers 409."""
+    record = await repo.get(id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Not found")
+    current = caption_version(record)
+    if if_match and not _etag_matches(if_match, _etag(current), weak=False):
+        raise HTTPException(status_code=412, detail="Captions have been modified since this version")
+    if version is not None and version != current:
+        raise HTTPException(status_code=409, detail="Captions have been modified since this version")
+    return record
+
+
+async def _save_edit(
+    repo: AsyncCaptionsRepository,
+    id: str,
+    record: dict,
+    if_match: str | None,
+    response: Response,
+    changes: list[EventChange] | None = None,
+) -> dict:
+    """Writes an edited document: just the ``changes`` from ``apply_ops`` when given,
+    otherwise the whole document."""
+    if changes is not None:
+        updated = await repo.patch_events(id, record["data"], changes, version=record.get("version"))
+    else:
+        updated = await repo.update_data(id, record["data"], version=record.get("version"))
+    if not updated:
+        if if_match:
+            raise HTTPException(status_code=412, detail="Captions have been modified since this version")
+        raise HTTPException(status_code=409, detail="Captions have been modified concurrently")
+    response.headers["ETag"] = _etag(caption_version(updated))
+    return updated
+
+
+@app.patch("/captions/{id}")
+async def patch_captions(
+    id: str,
+    patch: CaptionsPatch,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    record = await _get_for_edit(repo, id, if_match, patch.version)
+    try:
+        changes = await run_in_threadpool(apply_ops, record["data"], patch.ops)
+    except IndexError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    updated = await _save_edit(repo, id, record, if_match, response, changes)
+    return {"id": id, "version": caption_version(updated)}
+
+
+@app.post("/captions/{id}/retime")
+async def retime_captions(
+    id: str,
+    request: RetimeRequest,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    record = await _get_for_edit(repo, id, if_match, request.version)
+    words = await run_in_threadpool(retime, record["data"], request)
+    updated = await _save_edit(repo, id, record, if_match, response)
+    return {"id": id, "version": caption_version(updated), "words": words}
+
+
+@app.post("/captions/{id}/resegment")
+async def resegment_captions(
+    id: str,
+    request: ResegmentRequest,
+    response: Response,
+    if_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    record = await _get_for_edit(repo, id, if_match, request.version)
+    events = await run_in_threadpool(resegment, record["data"], request)
+    updated = await _save_edit(repo, id, record, if_match, response)
+    return {"id": id, "version": caption_version(updated), "events": events}
+
+
 @app.delete("/captions/{id}", status_code=204)
-def delete_captions(id: str, repo: CaptionsRepository = Depends(get_repo)):
-    repo.delete(id)
+async def delete_captions(
+    id: str,
+    if_match: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+):
+    if not if_match:
+        await repo.delete(id)
+        return
+    version = await _check_if_match(repo, id, if_match)
+    if not await repo.delete(id, version=version) and version is not None:
+        raise HTTPException(status_code=412, detail="Captions have been modified since this version")
 
 
 @app.post("/captions/from-video", status_code=201)
-def transcribe_video(
+async def transcribe_video(
     request: VideoTranscribeRequest,
-    repo: CaptionsRepository = Depends(get_repo),
-    video_repo: VideoRepository = Depends(get_video_repo),
+    http_request: Request,
+    idempotency_key: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+    idempotency: Idempotency = Depends(get_idempotency),
+    idempotency_repo: AsyncIdempotencyRepository = Depends(get_idempotency_repo),
 ):
-    url = request.url.strip()
-    try:
-        captions = transcribe(url, request.title, request.language, request.speech_model)
-    except RuntimeError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    video = video_repo.create(url)
-    return repo.create(captions, video_id=video["id"])
+    async def create():
+        url = request.url.strip()
+        try:
+            captions = await run_in_threadpool(transcribe, url, request.title, request.language, request.speech_model)
+        except RuntimeError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return await repo.create_with_video(captions, url)
+
+    fingerprint = request_fingerprint("POST", http_request.url.path, request.model_dump_json().encode())
+    return await idempotency.run(idempotency_repo, idempotency_key, fingerprint, 201, create)
 
 
 @app.post("/captions/{id}/burn", status_code=202)
-def burn_captions(
+async def burn_captions(
     id: str,
     background_tasks: BackgroundTasks,
-    repo: CaptionsRepository = Depends(get_repo),
-    video_repo: VideoRepository = Depends(get_video_repo),
-    burn_repo: BurnJobRepository = Depends(get_burn_repo),
-    client: Client = Depends(get_supabase),
+    http_request: Request,
+    idempotency_key: str | None = Header(default=None),
+    repo: AsyncCaptionsRepository = Depends(get_repo),
+    burn_repo: AsyncBurnJobRepository = Depends(get_burn_repo),
+    client: AsyncClient = Depends(get_async_supabase),
+    cache: CaptionsCache | None = Depends(get_captions_cache),
+    storage: StorageBackend = Depends(get_storage),
+    idempotency: Idempotency = Depends(get_idempotency),
+    idempotency_repo: AsyncIdempotencyRepository = Depends(get_idempotency_repo),
 ) -> BurnJob:
-    record = repo.get(id)
-    if not record:
-        raise HTTPException(status_code=404, detail="Not found")
+    async def start():
+        record = await repo.get_with_video(id)
+        if not record:
+            raise HTTPException(status_code=404, detail="Not found")
 
-    if not record.get("video_id"):
-        raise HTTPException(status_code=422, detail="No video linked to this caption")
-    
-    video = video_repo.get(record["video_id"])
-    if not video:
-        raise HTTPException(status_code=404, detail="Linked video not found")
-    
-    video_url = video["url"]
-
-    job = burn_repo.create(id)
-    background_tasks.add_task(burn_video, job["id"], id, video_url, client)
-    return BurnJob(**job)
+        if not record.get("video_id"):
+            raise HTTPException(status_code=422, detail="No video linked to this caption")
+
+        video = record.pop("video")
+        if not video:
+            raise HTTPException(status_code=404, detail="Linked video not found")
+
+        video_url = video["url"]
+
+        job = await burn_repo.create(id)
+        background_tasks.add_task(burn_video, job["id"], id, video_url, client, cache, record, storage)
+        BURN_JOBS_QUEUED.inc()
+        return BurnJob(**job)
+
+    # A replayed response schedules nothing: the original request's job is returned.
+    fingerprint = request_fingerprint("POST", http_request.url.path)
+    return await idempotency.run(idempotency_repo, idempotency_key, fingerprint, 202, start)
 
 
 @app.get("/captions/{id}/burn/{job_id}")
-def get_burn_job(
+async def get_burn_job(
     id: str,
     job_id: str,
-    burn_repo: BurnJobRepository = Depends(get_burn_repo),
+    burn_repo: AsyncBurnJobRepository = Depends(get_burn_repo),
 ) -> BurnJob:
-    job = burn_repo.get(job_id)
+    job = await burn_repo.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Not found")
     return BurnJob(**job)
 
 
+async def _job_snapshot(job_id: str, events: JobEvents, burn_repo: AsyncBurnJobRepository) -> dict | None:
+    """Latest published event for the job, falling back to the stored row (e.g. a
+    job burned by another instance or before this process started)."""
+    current = events.latest(job_id)
+    if current is None:
+        current = await _stored_job(job_id, burn_repo)
+    return current
+
+
+async def _stored_job(job_id: str, burn_repo: AsyncBurnJobRepository) -> dict | None:
+    job = await burn_repo.get(job_id)
+    return BurnJob(**job).model_dump(mode="json") if job else None
+
+
+@app.get("/captions/{id}/burn/{job_id}/events")
+async def stream_burn_job(
+    id: str,
+    job_id: str,
+    burn_repo: AsyncBurnJobRepository = Depends(get_burn_repo),
+    events: JobEvents = Depends(get_job_events),
+) -> StreamingResponse:
+    # Subscribe before reading the snapshot so no update falls in between.
+    queue = events.subscribe(job_id)
+    current = await _job_snapshot(job_id, events, burn_repo)
+    if current is None:
+        events.unsubscribe(job_id, queue)
+        raise HTTPException(status_code=404, detail="Not found")
+    refresh = partial(_stored_job, job_id, burn_repo)
+    return StreamingResponse(
+        (format_sse(event) async for event in events.follow(job_id, queue, current, refresh=refresh)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/captions/{id}/burn/{job_id}/ws")
+async def watch_burn_job(
+    websocket: WebSocket,
+    id: str,
+    job_id: str,
+    burn_repo: AsyncBurnJobRepository = Depends(get_burn_repo),
+    events: JobEvents = Depends(get_job_events),
+) -> None:
+    queue = events.subscribe(job_id)
+    current = await _job_snapshot(job_id, events, burn_repo)
+    if current is None:
+        events.unsubscribe(job_id, queue)
+        await websocket.close(code=4404, reason="Not found")
+        return
+    refresh = partial(_stored_job, job_id, burn_repo)
+    await websocket.accept()
+    try:
+        async with aclosing(events.follow(job_id, queue, current, refresh=refresh)) as updates:
+            async for event in updates:
+                if event is not None:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        return
+    await websocket.close()
+
+
 @app.get("/captions/{id}/burn/{job_id}/download")
-def download_burn_output(
+async def download_burn_output(
     id: str,
     job_id: str,
-    burn_repo: BurnJobRepository = Depends(get_burn_repo),
-) -> RedirectResponse:
-    job = burn_repo.get(job_id)
+    if_none_match: str | None = Header(default=None),
+    burn_repo: AsyncBurnJobRepository = Depends(get_burn_repo),
+    storage: StorageBackend = Depends(get_storage),
+) -> Response:
+    job = await burn_repo.get(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Not found")
     if job["status"] != "done":
         raise HTTPException(status_code=409, detail="Job is not done yet")
-    signed_url = generate_signed_url(f"burned/{job_id}/output.mp4")
+    name = f"burned/{job_id}/output.mp4"
+
+    path = storage.local_path(name)
+    if path is not None:
+        # Outputs never change once a job is done. FileResponse handles Range/If-Range
+        # and hands the file to the server via pathsend where the server supports it.
+        response = FileResponse(
+            path,
+            media_type="video/mp4",
+            filename=f"{job_id}.mp4",
+            stat_result=await run_in_threadpool(os.stat, path),
+            headers={"Cache-Control": "private, max-age=31536000, immutable"},
+        )
+        if _etag_matches(if_none_match, response.headers["etag"]):
+            return Response(status_code=304, headers={"ETag": response.headers["etag"]})
+        return response
+
+    signed_url = await run_in_threadpool(storage.signed_url, name)
+    if signed_url is None:
+        raise HTTPException(status_code=404, detail="Output not found")
     return RedirectResponse(url=signed_url, status_code=302)
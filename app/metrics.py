@@ -0,0 +1,254 @@
+import bisect
+import functools
+import inspect
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from threading import Lock
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .profiling import span
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    """Collects metrics and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for metric in self._metrics:
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+class Histogram:
+    """Cumulative latency histogram, one series per combination of label values.
+
+    Observations are O(log buckets) under a lock, so it is safe to record from
+    the threadpool and ``asyncio.to_thread`` workers as well as the event loop.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, tuple[list[int], list[float]]] = {}
+        self._lock = Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels[name]) for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Gauge:
+    """A value that goes up and down, or is read from ``function`` at scrape time."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Callable[[], float] | None = None,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self._value = 0.0
+        self._lock = Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def value(self) -> float:
+        return self.function() if self.function is not None else self._value
+
+    @contextmanager
+    def track(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_number(self.value())}"]
+
+    def clear(self) -> None:
+        self.set(0)
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "ezcaptions_http_request_duration_seconds",
+    "HTTP request latency by route template, until the response is fully sent.",
+    ("method", "route", "status"),
+)
+BURN_STAGE_SECONDS = Histogram(
+    "ezcaptions_burn_stage_duration_seconds",
+    "Time spent in each stage of burning captions into a video.",
+    ("stage",),
+)
+REPOSITORY_SECONDS = Histogram(
+    "ezcaptions_repository_call_duration_seconds",
+    "Database round-trip latency by repository method.",
+    ("repository", "method"),
+)
+EXTERNAL_CALL_SECONDS = Histogram(
+    "ezcaptions_external_call_duration_seconds",
+    "Latency of calls to external services (AssemblyAI, GCS).",
+    ("service", "operation"),
+)
+BURN_JOBS_QUEUED = Gauge("ezcaptions_burn_jobs_queued", "Burn jobs accepted but not yet started.")
+BURN_JOBS_ACTIVE = Gauge("ezcaptions_burn_jobs_active", "Burn jobs currently running.")
+BURN_ENCODES_ACTIVE = Gauge("ezcaptions_burn_encodes_active", "ffmpeg encodes currently running.")
+
+
+def instrument(cls):
+    """Class decorator timing every public method into ``REPOSITORY_SECONDS`` and,
+    when a profile is active, into a span."""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(method):
+            continue
+        setattr(cls, name, _timed(method, cls.__name__, name))
+    return cls
+
+
+def _timed(method, repository: str, name: str):
+    span_name = f"{repository}.{name}"
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def timed_async(*args, **kwargs):
+            with REPOSITORY_SECONDS.time(repository=repository, method=name), span(span_name):
+                return await method(*args, **kwargs)
+        return timed_async
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        with REPOSITORY_SECONDS.time(repository=repository, method=name), span(span_name):
+            return method(*args, **kwargs)
+    return timed
+
+
+class MetricsMiddleware:
+    """Records ``HTTP_REQUEST_SECONDS`` labelled with the matched route's path
+    template (not the raw path, which would make a series per caption id)."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
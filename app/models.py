@@ -1,6 +1,8 @@
-from typing import Literal
+import re
+from collections.abc import Iterable, Iterator
+from typing import Annotated, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 __all__ = [
     "Captions",
@@ -8,17 +10,92 @@ __all__ = [
     "CaptionsStyle",
     "CaptionsWord",
     "CaptionsEvent",
+    "CaptionsPatch",
+    "RetimeRequest",
+    "ResegmentRequest",
     "VideoTranscribeRequest",
     "BurnJob",
 ]
 
 
+def _format_time(ms: int, sep: str = ".", precision: int = 3, hour_width: int = 2) -> str:
+    """Formats milliseconds as ``H:MM:SS<sep>fff``, truncating to ``precision`` digits."""
+    seconds, millis = divmod(ms, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    fraction = millis // 10 ** (3 - precision)
+    return f"{hours:0{hour_width}d}:{minutes:02d}:{seconds:02d}{sep}{fraction:0{precision}d}"
+
+
 def _format_ass_time(ms: int) -> str:
-    hours = ms // 3600000
-    minutes = (ms % 3600000) // 60000
-    seconds = (ms % 60000) // 1000
-    centiseconds = (ms % 1000) // 10
-    return f"{hours}:{minutes:02d}:{seconds:02d}.{centiseconds:02d}"
+    return _format_time(ms, ".", 2, 1)
+
+
+def _format_srt_time(ms: int) -> str:
+    return _format_time(ms, ",")
+
+
+def _format_vtt_time(ms: int) -> str:
+    return _format_time(ms, ".")
+
+def _parse_time(value: str) -> int:
+    """Parses ``[H:]MM:SS[.,]fff`` (ASS, SRT and WebVTT flavours) into milliseconds."""
+    clock, _, fraction = value.strip().replace(",", ".").partition(".")
+    parts = [int(p) for p in clock.split(":")]
+    if not 2 <= len(parts) <= 3:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if len(parts) == 2:
+        parts.insert(0, 0)
+    hours, minutes, seconds = parts
+    millis = int((fraction + "000")[:3])
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + millis
+
+
+_ASS_OVERRIDE = re.compile(r"\{[^}]*\}")
+_ASS_BREAK = re.compile(r"\\[Nnh]")
+_VTT_TAG = re.compile(r"<[^>]*>")
+
+
+def _split_words(text: str, start: int, end: int) -> list[dict]:
+    """Splits a cue into words, spreading its duration by character length."""
+    tokens = text.split()
+    if not tokens:
+        return []
+    total = sum(len(t) for t in tokens)
+    duration = max(end - start, 0)
+    words = []
+    offset = 0
+    for token in tokens:
+        word_start = start + duration * offset // total
+        offset += len(token)
+        words.append({"text": token, "start": word_start, "end": start + duration * offset // total})
+    return words
+
+
+def _parse_timing_line(line: str) -> tuple[int, int]:
+    start, _, rest = line.partition("-->")
+    end = rest.split()[0] if rest.split() else ""
+    return _parse_time(start), _parse_time(end)
+
+
+def _iter_cues(lines: Iterable[str]) -> Iterator[tuple[int, int, str]]:
+    """Yields ``(start, end, text)`` for each SRT/WebVTT cue, one block at a time."""
+    timing = None
+    text: list[str] = []
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            if timing:
+                yield timing[0], timing[1], " ".join(text)
+            timing, text = None, []
+        elif timing is None:
+            if "-->" in line:
+                timing = _parse_timing_line(line)
+        else:
+            text.append(line)
+    if timing:
+        yield timing[0], timing[1], " ".join(text)
+
 
 class CaptionsInfo(BaseModel):
     Title: str = "Default Title"
@@ -65,15 +142,23 @@ class CaptionsEvent(BaseModel):
     Effect: str = ""
     Words: list[CaptionsWord] = []
 
+    @property
+    def start_ms(self) -> int:
+        if not self.Words: return 0
+        return min(word.start for word in self.Words)
+
+    @property
+    def end_ms(self) -> int:
+        if not self.Words: return 0
+        return max(word.end for word in self.Words)
+
     @property
     def start_time(self) -> str:
-        if not self.Words: return "0:00:00.00"
-        return _format_ass_time(min(word.start for word in self.Words))
+        return _format_ass_time(self.start_ms)
     
     @property
     def end_time(self) -> str:
-        if not self.Words: return "0:00:00.00"
-        return _format_ass_time(max(word.end for word in self.Words))
+        return _format_ass_time(self.end_ms)
 
     @property
     def full_text(self) -> str:
@@ -89,37 +174,167 @@ class Captions(BaseModel):
     def full_text(self) -> str:
         return " ".join(event.full_text for event in self.events)
 
+    @classmethod
+    def from_ass(cls, lines: Iterable[str]) -> "Captions":
+        info: dict = {}
+        styles: list[dict] = []
+        events: list[dict] = []
+        section = ""
+        fields: list[str] = []
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith(";"):
+                continue
+            if line.startswith("["):
+                section, fields = line.lower(), []
+                continue
+            key, _, value = line.partition(":")
+            value = value.strip()
+            if section == "[script info]":
+                if key in ("Title", "WrapStyle"):
+                    info[key] = value
+                elif key == "ScaledBorderAndShadow":
+                    info[key] = value.lower() == "yes"
+            elif key == "Format":
+                fields = [f.strip() for f in value.split(",")]
+            elif section in ("[v4+ styles]", "[v4 styles]") and key == "Style" and fields:
+                row = dict(zip(fields, (v.strip() for v in value.split(",", len(fields) - 1))))
+                styles.append({k: v for k, v in row.items() if k in CaptionsStyle.model_fields})
+            elif section == "[events]" and key == "Dialogue" and fields:
+                row = dict(zip(fields, value.split(",", len(fields) - 1)))
+                missing = [f for f in ("Start", "End") if f not in row]
+                if missing:
+                    raise ValueError(f"Dialogue line without {' and '.join(missing)}: {line!r}")
+                text = _ASS_BREAK.sub(" ", _ASS_OVERRIDE.sub("", row.pop("Text", "")))
+                words = _split_words(text, _parse_time(row.pop("Start")), _parse_time(row.pop("End")))
+                event = {k: v.strip() for k, v in row.items() if k in CaptionsEvent.model_fields}
+                event["Words"] = words
+                events.append(event)
+        return cls.model_validate({"info": info, "styles": styles or [{}], "events": events})
+
+    @classmethod
+    def from_srt(cls, lines: Iterable[str], title: str = "Default Title") -> "Captions":
+        events = [{"Words": _split_words(text, start, end)} for start, end, text in _iter_cues(lines)]
+        return cls.model_validate({"info": {"Title": title}, "events": events})
+
+    @classmethod
+    def from_vtt(cls, lines: Iterable[str], title: str = "Default Title") -> "Captions":
+        events = [{"Words": _split_words(_VTT_TAG.sub("", text), start, end)} for start, end, text in _iter_cues(lines)]
+        return cls.model_validate({"info": {"Title": title}, "events": events})
+
     def to_ass(self) -> str:
+        return "".join(self.iter_ass())
+
+    def to_srt(self) -> str:
+        return "".join(self.iter_srt())
+
+    def to_vtt(self) -> str:
+        return "".join(self.iter_vtt())
+
+    def iter_ass(self) -> Iterator[str]:
         scaled = "yes" if self.info.ScaledBorderAndShadow else "no"
-        lines = [
-            "[Script Info]",
-            f"Title: {self.info.Title}",
-            f"WrapStyle: {self.info.WrapStyle}",
-            f"ScaledBorderAndShadow: {scaled}",
-            "",
-            "[V4+ Styles]",
-            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
-        ]
+        yield (
+            "[Script Info]\n"
+            f"Title: {self.info.Title}\n"
+            f"WrapStyle: {self.info.WrapStyle}\n"
+            f"ScaledBorderAndShadow: {scaled}\n"
+            "\n"
+            "[V4+ Styles]\n"
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        )
         for s in self.styles:
-            lines.append(
+            yield (
                 f"Style: {s.Name},{s.Fontname},{s.Fontsize},{s.PrimaryColour},"
                 f"{s.SecondaryColour},{s.OutlineColour},{s.BackColour},"
                 f"{s.Bold},{s.Italic},{s.Underline},{s.StrikeOut},"
                 f"{s.ScaleX},{s.ScaleY},{s.Spacing},{s.Angle},"
                 f"{s.BorderStyle},{s.Outline},{s.Shadow},{s.Alignment},"
-                f"{s.MarginL},{s.MarginR},{s.MarginV},{s.Encoding}"
+                f"{s.MarginL},{s.MarginR},{s.MarginV},{s.Encoding}\n"
             )
-        lines += [
-            "",
-            "[Events]",
-            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
-        ]
+        yield (
+            "\n"
+            "[Events]\n"
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+        )
         for e in self.events:
-            lines.append(
+            yield (
                 f"Dialogue: {e.Layer},{e.start_time},{e.end_time},{e.Style},"
-                f"{e.Name},{e.MarginL},{e.MarginR},{e.MarginV},{e.Effect},{e.full_text}"
+                f"{e.Name},{e.MarginL},{e.MarginR},{e.MarginV},{e.Effect},{e.full_text}\n"
             )
-        return "\n".join(lines) + "\n"
+
+    def iter_srt(self) -> Iterator[str]:
+        for i, e in enumerate(self.events, start=1):
+            yield f"{i}\n{_format_srt_time(e.start_ms)} --> {_format_srt_time(e.end_ms)}\n{e.full_text}\n\n"
+
+    def iter_vtt(self) -> Iterator[str]:
+        yield "WEBVTT\n\n"
+        for e in self.events:
+            yield f"{_format_vtt_time(e.start_ms)} --> {_format_vtt_time(e.end_ms)}\n{e.full_text}\n\n"
+
+
+class ReplaceEventOp(BaseModel):
+    op: Literal["replace_event"]
+    index: int
+    event: CaptionsEvent
+
+
+class InsertEventOp(BaseModel):
+    op: Literal["insert_event"]
+    index: int
+    event: CaptionsEvent
+
+
+class DeleteEventOp(BaseModel):
+    op: Literal["delete_event"]
+    index: int
+
+
+class EditWordOp(BaseModel):
+    op: Literal["edit_word"]
+    event: int
+    word: int
+    text: str | None = None
+    start: int | None = None
+    end: int | None = None
+
+
+CaptionsPatchOp = Annotated[
+    ReplaceEventOp | InsertEventOp | DeleteEventOp | EditWordOp,
+    Field(discriminator="op"),
+]
+
+
+class CaptionsPatch(BaseModel):
+    version: str | None = None
+    ops: list[CaptionsPatchOp]
+
+
+class RetimeRequest(BaseModel):
+    offset_ms: int = 0
+    scale: float = Field(default=1.0, gt=0)
+    sync_points: list[tuple[int, int]] = []
+    from_ms: int | None = None
+    to_ms: int | None = None
+    version: str | None = None
+
+    @model_validator(mode="after")
+    def _check_sync_points(self) -> "RetimeRequest":
+        if len(self.sync_points) == 1:
+            raise ValueError("sync_points needs at least two (source, target) pairs")
+        points = sorted(self.sync_points)
+        for (s0, t0), (s1, t1) in zip(points, points[1:]):
+            if s1 <= s0 or t1 < t0:
+                raise ValueError("sync_points must map increasing source times to non-decreasing targets")
+        self.sync_points = points
+        return self
+
+
+class ResegmentRequest(BaseModel):
+    max_chars: int = Field(default=42, gt=0)
+    max_duration_ms: int = Field(default=7000, gt=0)
+    min_gap_ms: int = Field(default=700, ge=0)
+    split_on_punctuation: bool = True
+    version: str | None = None
 
 
 class VideoTranscribeRequest(BaseModel):
@@ -135,3 +350,4 @@ class BurnJob(BaseModel):
     status: str
     result_url: str | None = None
     error: str | None = None
+    telemetry: dict | None = None
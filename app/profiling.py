@@ -0,0 +1,165 @@
+"""Opt-in profiling of single requests and the burn jobs they start.
+
+With ``PROFILING_ENABLED=true``, a request sending ``X-Profile: 1`` is run under
+cProfile. The response carries ``X-Profile-Id`` and, once the request (including
+any burn job it scheduled, which runs as a background task of the request) has
+finished, the profile can be downloaded from ``/profiles/{id}``.
+
+Besides the cProfile stats, a profile records timing spans opened with
+``span()`` around document validation, serialisation and rendering and around
+every repository call, including work done on threadpool workers, which cProfile
+(profiling only the event loop thread) does not see. Other requests served
+concurrently on the event loop show up in the cProfile stats too, so profile
+on a quiet instance where possible.
+
+Requests without the header only pay for a scan of their headers, and when no
+profile is active ``span()`` costs one context variable lookup.
+"""
+import cProfile
+import io
+import json
+import pstats
+import re
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import get_settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+TOP_FUNCTIONS = 40
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+_NULL_SPAN = nullcontext()
+
+
+class Profile:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: list[dict] = []
+
+    @contextmanager
+    def span(self, name: str):
+        depth = _depth.get()
+        token = _depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            _depth.reset(token)
+            # list.append is atomic, so spans may close on threadpool workers.
+            self.spans.append({
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 3),
+                "duration_ms": round((ended - started) * 1000, 3),
+                "depth": depth,
+            })
+
+
+_active: ContextVar[Profile | None] = ContextVar("profile", default=None)
+_depth: ContextVar[int] = ContextVar("span_depth", default=0)
+# cProfile allows one active profiler per interpreter (per thread before 3.12).
+_profiler_lock = Lock()
+
+
+def span(name: str):
+    """Times the enclosed block into the active profile, if any."""
+    profile = _active.get()
+    if profile is None:
+        return _NULL_SPAN
+    return profile.span(name)
+
+
+class ProfileStore:
+    """Profiles on local disk: ``{id}.prof`` (pstats, e.g. for snakeviz) and
+    ``{id}.json`` (spans and the top functions by cumulative time)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, profile_id: str, suffix: str) -> Path | None:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = self.root / f"{profile_id}{suffix}"
+        return path if path.is_file() else None
+
+    def save(self, profile: Profile, profiler: cProfile.Profile, elapsed: float) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.root / f"{profile.id}.prof")
+        stats_text = io.StringIO()
+        pstats.Stats(profiler, stream=stats_text).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        summary = {
+            "id": profile.id,
+            "name": profile.name,
+            "duration_ms": round(elapsed * 1000, 3),
+            "spans": sorted(profile.spans, key=lambda s: s["start_ms"]),
+            "top_functions": stats_text.getvalue(),
+        }
+        (self.root / f"{profile.id}.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(get_settings().profile_path)
+
+
+@contextmanager
+def profiled(name: str, store: ProfileStore):
+    """Runs the block under cProfile and saves the result to ``store``. Yields the
+    Profile, or None when another profile is already running."""
+    if _active.get() is not None or not _profiler_lock.acquire(blocking=False):
+        yield None
+        return
+    profile = Profile(name)
+    token = _active.set(profile)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield profile
+        finally:
+            profiler.disable()
+            _active.reset(token)
+            store.save(profile, profiler, time.perf_counter() - profile.started)
+    finally:
+        _profiler_lock.release()
+
+
+class ProfilingMiddleware:
+    """Profiles requests that send ``X-Profile``, when ``PROFILING_ENABLED`` is set.
+    Settings are only read for requests carrying the header."""
+
+    def __init__(self, app: ASGIApp, store: ProfileStore | None = None):
+        self.app = app
+        self.store = store
+
+    @staticmethod
+    def _wanted(scope: Scope) -> bool:
+        requested = any(name == PROFILE_HEADER and value not in (b"", b"0") for name, value in scope["headers"])
+        return requested and get_settings().profiling_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        with profiled(f"{scope['method']} {scope['path']}", self.store or get_profile_store()) as profile:
+            if profile is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", []), (PROFILE_ID_HEADER, profile.id.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
@@ -1,78 +1,699 @@
-from supabase import Client
+import asyncio
+import hashlib
+import json
+from collections import defaultdict
+from collections.abc import Sequence
 
+from supabase import AsyncClient, Client
+
+from . import codec
+from .cache import CaptionsCache
+from .events import JobEvents
+from .metrics import instrument
+from .profiling import span
 from .models import Captions
+from .editing import EventChange
+from .search import event_row, index_rows, search_hits, search_terms
 
 TABLE = "captions"
 BURN_JOBS_TABLE = "burn_jobs"
 VIDEOS_TABLE = "videos"
+IDEMPOTENCY_TABLE = "idempotency_keys"
+SUMMARY_COLUMNS = "id,title,video_id,duration_ms,event_count,word_count,version,updated_at"
+CREATE_WITH_VIDEO_RPC = "create_captions_with_video"
+INDEX_EVENTS_RPC = "index_caption_events"
+PATCH_EVENTS_RPC = "patch_caption_events"
+SEARCH_EVENTS_RPC = "search_caption_events"
 
 
-class VideoRepository:
-    def __init__(self, client: Client):
+def caption_version(record: dict) -> str:
+    """Returns a stable version tag for a caption row: its ``version`` column, which the
+    database bumps on every write, or a hash of its document for rows without one."""
+    if record.get("version") is not None:
+        return str(record["version"])
+    payload = json.dumps(record["data"], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def status_payload(
+    status: str, output_url: str | None = None, error: str | None = None, telemetry: dict | None = None
+) -> dict:
+    """Columns written to ``burn_jobs`` for a status change."""
+    payload: dict = {"status": status}
+    if output_url is not None:
+        payload["result_url"] = output_url
+    if error is not None:
+        payload["error"] = error
+    if telemetry is not None:
+        payload["telemetry"] = telemetry
+    return payload
+
+
+def derived_columns(data: dict) -> dict:
+    """Computes the columns stored alongside a caption document so that listings
+    and ``get_text`` never need to read or parse ``data``."""
+    events = data.get("events", [])
+    words = [w for event in events for w in event.get("Words", [])]
+    return {
+        "full_text": " ".join(" ".join(w["text"] for w in event.get("Words", [])) for event in events),
+        "duration_ms": max((w["end"] for w in words), default=0),
+        "event_count": len(events),
+        "word_count": len(words),
+    }
+
+
+class _VideoQueries:
+    def __init__(self, client):
         self._client = client
 
+    def _create_query(self, url: str):
+        return self._client.table(VIDEOS_TABLE).insert({"url": url})
+
+    def _get_query(self, id: str):
+        return self._client.table(VIDEOS_TABLE).select("*").eq("id", id)
+
+    def _get_many_query(self, ids: Sequence[str]):
+        return self._client.table(VIDEOS_TABLE).select("*").in_("id", list(ids))
+
+
+@instrument
+class VideoRepository(_VideoQueries):
+    def __init__(self, client: Client):
+        super().__init__(client)
+
     def create(self, url: str) -> dict:
-        res = self._client.table(VIDEOS_TABLE).insert({"url": url}).execute()
+        res = self._create_query(url).execute()
         return res.data[0]
 
     def get(self, id: str) -> dict | None:
-        res = self._client.table(VIDEOS_TABLE).select("*").eq("id", id).execute()
+        res = self._get_query(id).execute()
         return res.data[0] if res.data else None
 
+    def get_many(self, ids: Sequence[str]) -> Sequence[dict]:
+        if not ids:
+            return []
+        return self._get_many_query(ids).execute().data
 
-class BurnJobRepository:
-    def __init__(self, client: Client):
+
+@instrument
+class AsyncVideoRepository(_VideoQueries):
+    def __init__(self, client: AsyncClient):
+        super().__init__(client)
+
+    async def create(self, url: str) -> dict:
+        res = await self._create_query(url).execute()
+        return res.data[0]
+
+    async def get(self, id: str) -> dict | None:
+        res = await self._get_query(id).execute()
+        return res.data[0] if res.data else None
+
+    async def get_many(self, ids: Sequence[str]) -> Sequence[dict]:
+        if not ids:
+            return []
+        return (await self._get_many_query(ids).execute()).data
+
+
+class _BurnJobQueries:
+    def __init__(self, client, events: JobEvents | None = None):
         self._client = client
+        self._events = events
+
+    def _create_query(self, caption_id: str):
+        return self._client.table(BURN_JOBS_TABLE).insert({"caption_id": caption_id})
+
+    def _get_query(self, job_id: str):
+        return self._client.table(BURN_JOBS_TABLE).select("*").eq("id", job_id)
+
+    def _update_status_query(self, job_id: str, payload: dict):
+        return self._client.table(BURN_JOBS_TABLE).update(payload).eq("id", job_id)
+
+    def _update_many_queries(self, payloads: dict[str, dict]) -> list:
+        """One upsert per distinct column set: a bulk upsert writes every column
+        named by any row, so mixing shapes would null out the missing ones."""
+        groups: defaultdict[tuple, list[dict]] = defaultdict(list)
+        for job_id, payload in payloads.items():
+            groups[tuple(sorted(payload))].append({"id": job_id, **payload})
+        return [
+            self._client.table(BURN_JOBS_TABLE).upsert(rows, on_conflict="id", returning="minimal")
+            for rows in groups.values()
+        ]
+
+    def _after_update(self, job_id: str, payload: dict) -> None:
+        if self._events is not None:
+            self._events.publish(job_id, {"id": job_id, **payload})
+
+
+@instrument
+class BurnJobRepository(_BurnJobQueries):
+    def __init__(self, client: Client, events: JobEvents | None = None):
+        super().__init__(client, events)
 
     def create(self, caption_id: str) -> dict:
-        res = self._client.table(BURN_JOBS_TABLE).insert({"caption_id": caption_id}).execute()
+        res = self._create_query(caption_id).execute()
         return res.data[0]
 
     def get(self, job_id: str) -> dict | None:
-        res = self._client.table(BURN_JOBS_TABLE).select("*").eq("id", job_id).execute()
+        res = self._get_query(job_id).execute()
         return res.data[0] if res.data else None
 
-    def update_status(self, job_id: str, status: str, output_url: str | None = None, error: str | None = None) -> None:
-        payload: dict = {"status": status}
-        if output_url is not None:
-            payload["result_url"] = output_url
-        if error is not None:
-            payload["error"] = error
-        self._client.table(BURN_JOBS_TABLE).update(payload).eq("id", job_id).execute()
+    def update_status(
+        self,
+        job_id: str,
+        status: str,
+        output_url: str | None = None,
+        error: str | None = None,
+        telemetry: dict | None = None,
+    ) -> None:
+        payload = status_payload(status, output_url, error, telemetry)
+        self._update_status_query(job_id, payload).execute()
+        self._after_update(job_id, payload)
+
+    def update_many(self, payloads: dict[str, dict]) -> None:
+        """Writes ``status_payload`` dicts for several jobs, keyed by job id."""
+        for query in self._update_many_queries(payloads):
+            query.execute()
+        for job_id, payload in payloads.items():
+            self._after_update(job_id, payload)
 
 
-class CaptionsRepository:
+@instrument
+class AsyncBurnJobRepository(_BurnJobQueries):
+    def __init__(self, client: AsyncClient, events: JobEvents | None = None):
+        super().__init__(client, events)
+
+    async def create(self, caption_id: str) -> dict:
+        res = await self._create_query(caption_id).execute()
+        return res.data[0]
+
+    async def get(self, job_id: str) -> dict | None:
+        res = await self._get_query(job_id).execute()
+        return res.data[0] if res.data else None
+
+    async def update_status(
+        self,
+        job_id: str,
+        status: str,
+        output_url: str | None = None,
+        error: str | None = None,
+        telemetry: dict | None = None,
+    ) -> None:
+        payload = status_payload(status, output_url, error, telemetry)
+        await self._update_status_query(job_id, payload).execute()
+        self._after_update(job_id, payload)
+
+    async def update_many(self, payloads: dict[str, dict]) -> None:
+        """Writes ``status_payload`` dicts for several jobs, keyed by job id."""
+        await asyncio.gather(*(query.execute() for query in self._update_many_queries(payloads)))
+        for job_id, payload in payloads.items():
+            self._after_update(job_id, payload)
+
+
+class _IdempotencyQueries:
+    def __init__(self, client):
+        self._client = client
+
+    def _claim_query(self, key: str, fingerprint: str, locked_until: str | None):
+        # ON CONFLICT DO NOTHING: only the request that inserted the row gets it back.
+        row = {"key": key, "fingerprint": fingerprint}
+        if locked_until is not None:
+            row["locked_until"] = locked_until
+        return self._client.table(IDEMPOTENCY_TABLE).upsert(row, on_conflict="key", ignore_duplicates=True)
+
+    def _renew_query(self, key: str, locked_until: str):
+        return (
+            self._client.table(IDEMPOTENCY_TABLE)
+            .update({"locked_until": locked_until})
+            .eq("key", key)
+            .eq("status", "pending")
+        )
+
+    def _get_query(self, key: str):
+        return self._client.table(IDEMPOTENCY_TABLE).select("*").eq("key", key)
+
+    def _complete_query(self, key: str, status_code: int, response):
+        return (
+            self._client.table(IDEMPOTENCY_TABLE)
+            .update({"status": "done", "status_code": status_code, "response": response})
+            .eq("key", key)
+        )
+
+    def _release_query(self, key: str):
+        return self._client.table(IDEMPOTENCY_TABLE).delete().eq("key", key).eq("status", "pending")
+
+    def _expire_query(self, key: str, created_at: str):
+        return self._client.table(IDEMPOTENCY_TABLE).delete().eq("key", key).eq("created_at", created_at)
+
+
+@instrument
+class IdempotencyRepository(_IdempotencyQueries):
     def __init__(self, client: Client):
+        super().__init__(client)
+
+    def claim(self, key: str, fingerprint: str, locked_until: str | None = None) -> bool:
+        """Records ``key`` as in progress, leased until ``locked_until``. False if the key
+        is already taken."""
+        return bool(self._claim_query(key, fingerprint, locked_until).execute().data)
+
+    def renew(self, key: str, locked_until: str) -> None:
+        """Extends the lease on a pending ``key``."""
+        self._renew_query(key, locked_until).execute()
+
+    def get(self, key: str) -> dict | None:
+        res = self._get_query(key).execute()
+        return res.data[0] if res.data else None
+
+    def complete(self, key: str, status_code: int, response) -> None:
+        self._complete_query(key, status_code, response).execute()
+
+    def release(self, key: str) -> None:
+        self._release_query(key).execute()
+
+    def expire(self, key: str, created_at: str) -> None:
+        """Deletes the record for ``key`` if it is still the one created at ``created_at``."""
+        self._expire_query(key, created_at).execute()
+
+
+@instrument
+class AsyncIdempotencyRepository(_IdempotencyQueries):
+    def __init__(self, client: AsyncClient):
+        super().__init__(client)
+
+    async def claim(self, key: str, fingerprint: str, locked_until: str | None = None) -> bool:
+        """Records ``key`` as in progress, leased until ``locked_until``. False if the key
+        is already taken."""
+        return bool((await self._claim_query(key, fingerprint, locked_until).execute()).data)
+
+    async def renew(self, key: str, locked_until: str) -> None:
+        """Extends the lease on a pending ``key``."""
+        await self._renew_query(key, locked_until).execute()
+
+    async def get(self, key: str) -> dict | None:
+        res = await self._get_query(key).execute()
+        return res.data[0] if res.data else None
+
+    async def complete(self, key: str, status_code: int, response) -> None:
+        await self._complete_query(key, status_code, response).execute()
+
+    async def release(self, key: str) -> None:
+        await self._release_query(key).execute()
+
+    async def expire(self, key: str, created_at: str) -> None:
+        """Deletes the record for ``key`` if it is still the one created at ``created_at``."""
+        await self._expire_query(key, created_at).execute()
+
+
+class _CaptionsQueries:
+    """Query builders and row post-processing shared by the sync and async
+    caption repositories, which differ only in how they execute queries."""
+
+    def __init__(self, client, cache: CaptionsCache | None = None, encoding: codec.Encoding = "json"):
         self._client = client
+        self._cache = cache
+        self._encoding = encoding
 
-    def list(self) -> list[dict]:
-        res = self._client.table(TABLE).select("*").execute()
-        return res.data
+    @staticmethod
+    def _dump(captions: Captions) -> dict:
+        with span("Captions.model_dump"):
+            return captions.model_dump()
 
-    def create(self, captions: Captions, video_id: str | None = None) -> dict:
-        res = self._client.table(TABLE).insert({
+    def _payload(self, data: dict) -> dict:
+        with span("codec.encode"):
+            return {"data": codec.encode(data, self._encoding), **derived_columns(data)}
+
+    @staticmethod
+    def _decoded(row: dict, data: dict | None = None) -> dict:
+        if "data" in row:
+            row["data"] = data if data is not None else codec.decode(row["data"])
+        return row
+
+    def _after_write(self, row: dict) -> None:
+        if self._cache is not None:
+            self._cache.invalidate(row["id"], caption_version(row))
+
+    def _after_delete(self, id: str) -> None:
+        # The database drops the caption's search rows with it.
+        if self._cache is not None:
+            self._cache.invalidate(id)
+
+    def _written(self, rows: list[dict], data: dict) -> dict | None:
+        if not rows:
+            return None
+        row = self._decoded(rows[0], data)
+        self._after_write(row)
+        return row
+
+    def _decoded_many(self, rows: list[dict]) -> list[dict]:
+        return [self._decoded(row) for row in rows]
+
+    def _written_many(self, rows: list[dict]) -> list[dict]:
+        created = self._decoded_many(rows)
+        for row in created:
+            self._after_write(row)
+        return created
+
+    def _cached(self, id: str) -> dict | None:
+        return self._cache.get(id) if self._cache is not None else None
+
+    def _fetched(self, rows: list[dict]) -> dict | None:
+        if not rows:
+            return None
+        row = self._decoded(rows[0])
+        if self._cache is not None:
+            self._cache.put(row, caption_version(row))
+        return row
+
+    def _fetched_with_video(self, rows: list[dict]) -> dict | None:
+        if not rows:
+            return None
+        video = rows[0].pop("videos", None)
+        row = self._fetched(rows)
+        return {**row, "video": video}
+
+    def _fetched_many(self, rows: list[dict]) -> list[dict]:
+        return [self._fetched([row]) for row in rows]
+
+    def _list_query(self, limit: int, after: str | None, video_id: str | None, include_data: bool):
+        columns = SUMMARY_COLUMNS + (",data" if include_data else "")
+        query = self._client.table(TABLE).select(columns)
+        if after is not None:
+            query = query.gt("id", after)
+        if video_id is not None:
+            query = query.eq("video_id", video_id)
+        return query.order("id").limit(limit)
+
+    def _create_query(self, captions: Captions, data: dict, video_id: str | None):
+        return self._client.table(TABLE).insert({
             "title": captions.info.Title,
-            "data": captions.model_dump(),
             "video_id": video_id,
-        }).execute()
-        return res.data[0]
+            **self._payload(data),
+        })
+
+    def _create_with_video_query(self, captions: Captions, data: dict, url: str):
+        # The function also writes the search rows, keeping this to one round trip.
+        return self._client.rpc(CREATE_WITH_VIDEO_RPC, {
+            "video_url": url,
+            "caption": {"title": captions.info.Title, **self._payload(data), "search_events": index_rows(data)},
+        })
+
+    def _create_many_query(self, captions: Sequence[Captions]):
+        return self._client.table(TABLE).insert([
+            {"title": c.info.Title, "video_id": None, **self._payload(self._dump(c))}
+            for c in captions
+        ])
+
+    def _get_query(self, id: str):
+        return self._client.table(TABLE).select("*").eq("id", id)
+
+    def _get_with_video_query(self, id: str):
+        return self._client.table(TABLE).select(f"*,{VIDEOS_TABLE}(*)").eq("id", id)
+
+    def _get_many_query(self, ids: Sequence[str]):
+        return self._client.table(TABLE).select("*").in_("id", list(ids))
+
+    @staticmethod
+    def _guarded(query, version: str | None):
+        # Optimistic concurrency: the write only matches if nobody else has bumped the version.
+        return query.eq("version", version) if version is not None else query
+
+    def _update_query(self, id: str, title: str, data: dict, version: str | None = None):
+        query = self._client.table(TABLE).update({"title": title, **self._payload(data)}).eq("id", id)
+        return self._guarded(query, version)
+
+    def _patch_query(self, id: str, data: dict, changes: Sequence[EventChange], version: str):
+        """Rewrites only the changed events of the stored document, and their search rows."""
+        with span("codec.encode"):
+            entries = [
+                {"op": op, "index": index}
+                if event is None
+                else {
+                    "op": op,
+                    "index": index,
+                    "event": event,
+                    "compact": codec.compact_event(event),
+                    "search": event_row(event),
+                }
+                for op, index, event in changes
+            ]
+            derived = derived_columns(data)
+        return self._client.rpc(PATCH_EVENTS_RPC, {
+            "caption_id": id, "expected_version": version, "changes": entries, "derived": derived,
+        })
+
+    def _patches_in_place(self, version: str | None) -> bool:
+        # Compressed documents can't be patched in place, nor rows without a version to guard on.
+        return version is not None and self._encoding != "zstd"
+
+    def _index_query(self, rows: list[dict]):
+        """Replaces the search rows of each written caption."""
+        with span("search.index_rows"):
+            entries = [{"id": row["id"], "events": index_rows(row["data"])} for row in rows]
+        return self._client.rpc(INDEX_EVENTS_RPC, {"entries": entries})
+
+    def _search_query(self, terms: list[str], limit: int):
+        return self._client.rpc(SEARCH_EVENTS_RPC, {"query": " ".join(terms), "max_results": limit})
+
+    def _get_text_query(self, id: str, columns: str = "full_text"):
+        return self._client.table(TABLE).select(columns).eq("id", id)
+
+    def _delete_query(self, id: str, version: str | None = None):
+        return self._guarded(self._client.table(TABLE).delete().eq("id", id), version)
+
+
+@instrument
+class CaptionsRepository(_CaptionsQueries):
+    def __init__(self, client: Client, cache: CaptionsCache | None = None, encoding: codec.Encoding = "json"):
+        super().__init__(client, cache, encoding)
+
+    def _index(self, rows: Sequence[dict | None]) -> None:
+        rows = [row for row in rows if row is not None]
+        if rows:
+            self._index_query(rows).execute()
+
+    def list(
+        self,
+        limit: int = 50,
+        after: str | None = None,
+        video_id: str | None = None,
+        include_data: bool = False,
+    ) -> list[dict]:
+        """Returns one page of caption summaries ordered by id, starting after ``after``."""
+        res = self._list_query(limit, after, video_id, include_data).execute()
+        return self._decoded_many(res.data)
+
+    def create(self, captions: Captions, video_id: str | None = None) -> dict:
+        data = self._dump(captions)
+        res = self._create_query(captions, data, video_id).execute()
+        row = self._written(res.data, data)
+        self._index([row])
+        return row
+
+    def create_with_video(self, captions: Captions, url: str) -> dict:
+        """Inserts the video and its captions in a single transaction."""
+        data = self._dump(captions)
+        res = self._create_with_video_query(captions, data, url).execute()
+        return self._written(res.data, data)
+
+    def create_many(self, captions: Sequence[Captions]) -> Sequence[dict]:
+        if not captions:
+            return []
+        res = self._create_many_query(captions).execute()
+        rows = self._written_many(res.data)
+        self._index(rows)
+        return rows
 
     def get(self, id: str) -> dict | None:
-        res = self._client.table(TABLE).select("*").eq("id", id).execute()
+        cached = self._cached(id)
+        if cached is not None:
+            return cached
+        res = self._get_query(id).execute()
+        return self._fetched(res.data)
+
+    def get_with_video(self, id: str) -> dict | None:
+        """Fetches a caption together with its linked video (under ``video``) in one query."""
+        res = self._get_with_video_query(id).execute()
+        return self._fetched_with_video(res.data)
+
+    def get_many(self, ids: Sequence[str]) -> Sequence[dict]:
+        if not ids:
+            return []
+        res = self._get_many_query(ids).execute()
+        return self._fetched_many(res.data)
+
+    def update(self, id: str, captions: Captions, version: str | None = None) -> dict | None:
+        """Replaces a caption document. With ``version``, only writes if the row is still at
+        that version and returns None otherwise."""
+        data = self._dump(captions)
+        res = self._update_query(id, captions.info.Title, data, version).execute()
+        row = self._written(res.data, data)
+        self._index([row])
+        return row
+
+    def update_data(self, id: str, data: dict, version: str | None = None) -> dict | None:
+        """Writes an already-serialised caption document, skipping model validation."""
+        title = data.get("info", {}).get("Title", "Default Title")
+        res = self._update_query(id, title, data, version).execute()
+        row = self._written(res.data, data)
+        self._index([row])
+        return row
+
+    def patch_events(
+        self, id: str, data: dict, changes: Sequence[EventChange], version: str | None = None
+    ) -> dict | None:
+        """Writes an edit made by ``apply_ops``: ``data`` is the edited document and
+        ``changes`` what ``apply_ops`` returned. Only the changed events are written and
+        re-indexed; the returned row has no ``data``. Falls back to ``update_data`` when
+        the stored document can't be patched in place, and returns None on a version
+        conflict."""
+        if self._patches_in_place(version):
+            res = self._patch_query(id, data, changes, version).execute()
+            if res.data:
+                return self._written(res.data, data)
+        return self.update_data(id, data, version)
+
+    def get_text(self, id: str) -> str | None:
+        res = self._get_text_query(id).execute()
+        return res.data[0]["full_text"] if res.data else None
+
+    def get_text_record(self, id: str) -> dict | None:
+        """Like ``get_text``, but returns ``{"full_text", "version"}`` for conditional requests."""
+        res = self._get_text_query(id, "full_text,version").execute()
         return res.data[0] if res.data else None
 
-    def update(self, id: str, captions: Captions) -> dict | None:
-        res = self._client.table(TABLE).update({
-            "title": captions.info.Title,
-            "data": captions.model_dump(),
-        }).eq("id", id).execute()
+    def get_version_record(self, id: str) -> dict | None:
+        """Returns just ``{"version"}``, to check a version-keyed cache before fetching the document."""
+        res = self._get_text_query(id, "version").execute()
         return res.data[0] if res.data else None
 
-    def get_text(self, id: str) -> str:
-        res = self._client.table(TABLE).select("data").eq("id", id).execute()
-        if not res.data:
-            return None
-        return Captions.model_validate(res.data[0]["data"]).full_text
+    def search(self, query: str, limit: int = 50) -> Sequence[dict]:
+        """Returns timestamped hits for ``query`` across all captions, matched as a phrase."""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        res = self._search_query(terms, limit).execute()
+        return search_hits(res.data, terms)
+
+    def delete(self, id: str, version: str | None = None) -> bool:
+        res = self._delete_query(id, version).execute()
+        if res.data or version is None:
+            self._after_delete(id)
+        return bool(res.data)
+
+
+@instrument
+class AsyncCaptionsRepository(_CaptionsQueries):
+    def __init__(self, client: AsyncClient, cache: CaptionsCache | None = None, encoding: codec.Encoding = "json"):
+        super().__init__(client, cache, encoding)
+
+    async def _index(self, rows: Sequence[dict | None]) -> None:
+        rows = [row for row in rows if row is not None]
+        if rows:
+            query = await asyncio.to_thread(self._index_query, rows)
+            await query.execute()
+
+    async def list(
+        self,
+        limit: int = 50,
+        after: str | None = None,
+        video_id: str | None = None,
+        include_data: bool = False,
+    ) -> list[dict]:
+        res = await self._list_query(limit, after, video_id, include_data).execute()
+        if include_data:
+            return await asyncio.to_thread(self._decoded_many, res.data)
+        return res.data
+
+    # Dumping, encoding, deriving columns and indexing take hundreds of milliseconds for
+    # long transcripts, so writes do them on worker threads rather than the event loop.
+    # Reads likewise decode documents and (de)serialise cache entries on worker threads.
+
+    async def create(self, captions: Captions, video_id: str | None = None) -> dict:
+        data = await asyncio.to_thread(self._dump, captions)
+        query = await asyncio.to_thread(self._create_query, captions, data, video_id)
+        res = await query.execute()
+        row = await asyncio.to_thread(self._written, res.data, data)
+        await self._index([row])
+        return row
+
+    async def create_with_video(self, captions: Captions, url: str) -> dict:
+        data = await asyncio.to_thread(self._dump, captions)
+        query = await asyncio.to_thread(self._create_with_video_query, captions, data, url)
+        res = await query.execute()
+        return await asyncio.to_thread(self._written, res.data, data)
+
+    async def create_many(self, captions: Sequence[Captions]) -> Sequence[dict]:
+        if not captions:
+            return []
+        query = await asyncio.to_thread(self._create_many_query, captions)
+        res = await query.execute()
+        rows = await asyncio.to_thread(self._written_many, res.data)
+        await self._index(rows)
+        return rows
+
+    async def get(self, id: str) -> dict | None:
+        cached = await asyncio.to_thread(self._cached, id)
+        if cached is not None:
+            return cached
+        res = await self._get_query(id).execute()
+        return await asyncio.to_thread(self._fetched, res.data)
+
+    async def get_with_video(self, id: str) -> dict | None:
+        res = await self._get_with_video_query(id).execute()
+        return await asyncio.to_thread(self._fetched_with_video, res.data)
+
+    async def get_many(self, ids: Sequence[str]) -> Sequence[dict]:
+        if not ids:
+            return []
+        res = await self._get_many_query(ids).execute()
+        return await asyncio.to_thread(self._fetched_many, res.data)
+
+    async def update(self, id: str, captions: Captions, version: str | None = None) -> dict | None:
+        data = await asyncio.to_thread(self._dump, captions)
+        query = await asyncio.to_thread(self._update_query, id, captions.info.Title, data, version)
+        res = await query.execute()
+        row = await asyncio.to_thread(self._written, res.data, data)
+        await self._index([row])
+        return row
+
+    async def update_data(self, id: str, data: dict, version: str | None = None) -> dict | None:
+        title = data.get("info", {}).get("Title", "Default Title")
+        query = await asyncio.to_thread(self._update_query, id, title, data, version)
+        res = await query.execute()
+        row = await asyncio.to_thread(self._written, res.data, data)
+        await self._index([row])
+        return row
+
+    async def patch_events(
+        self, id: str, data: dict, changes: Sequence[EventChange], version: str | None = None
+    ) -> dict | None:
+        if self._patches_in_place(version):
+            query = await asyncio.to_thread(self._patch_query, id, data, changes, version)
+            res = await query.execute()
+            if res.data:
+                return self._written(res.data, data)
+        return await self.update_data(id, data, version)
+
+    async def get_text(self, id: str) -> str | None:
+        res = await self._get_text_query(id).execute()
+        return res.data[0]["full_text"] if res.data else None
+
+    async def get_text_record(self, id: str) -> dict | None:
+        res = await self._get_text_query(id, "full_text,version").execute()
+        return res.data[0] if res.data else None
+
+    async def get_version_record(self, id: str) -> dict | None:
+        res = await self._get_text_query(id, "version").execute()
+        return res.data[0] if res.data else None
+
+    async def search(self, query: str, limit: int = 50) -> Sequence[dict]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+        res = await self._search_query(terms, limit).execute()
+        return search_hits(res.data, terms)
 
-    def delete(self, id: str) -> None:
-        self._client.table(TABLE).delete().eq("id", id).execute()
+    async def delete(self, id: str, version: str | None = None) -> bool:
+        res = await self._delete_query(id, version).execute()
+        if res.data or version is None:
+            await asyncio.to_thread(self._after_delete, id)
+        return bool(res.data)
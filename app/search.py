@@ -0,0 +1,185 @@
+"""Word-level phrase search over caption events.
+
+The index lives in the database next to the captions: the ``caption_events``
+table from ``migrations/007_caption_events_search.sql`` on Postgres, kept up to
+date by the caption repositories through the ``index_caption_events`` function
+and queried through ``search_caption_events``. The SQLite backend implements
+both functions with the FTS5 tables below.
+"""
+import json
+import re
+import sqlite3
+from threading import Lock
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def search_terms(query: str) -> list[str]:
+    """Normalises a search query into the lowercase terms matched as a phrase."""
+    return _tokens(query)
+
+
+def event_row(event: dict) -> dict | None:
+    """The search row for one event: its text plus the start time of every word, so
+    phrase matches resolve to the millisecond of the first matching word. None if
+    the event has no words."""
+    words = event.get("Words")
+    if not words:
+        return None
+    return {"text": " ".join(w["text"] for w in words), "starts": [w["start"] for w in words]}
+
+
+def index_rows(data: dict) -> list[dict]:
+    """One search row per event with words (see ``event_row``), with its ``event_index``."""
+    return [
+        {"event_index": i, **row}
+        for i, event in enumerate(data.get("events", []))
+        if (row := event_row(event)) is not None
+    ]
+
+
+def search_hits(rows: list[dict], terms: list[str]) -> list[dict]:
+    """Turns matching search rows into timestamped hits."""
+    return [
+        {
+            "caption_id": row["caption_id"],
+            "event_index": row["event_index"],
+            "start_ms": _phrase_start(row["text"].split(" "), row["starts"], terms),
+            "text": row["text"],
+        }
+        for row in rows
+    ]
+
+
+def _phrase_start(words: list[str], starts: list[int], terms: list[str]) -> int:
+    """Finds the start time of the word where ``terms`` first occur in sequence."""
+    tokens, owners = [], []
+    for i, word in enumerate(words):
+        for token in _tokens(word):
+            tokens.append(token)
+            owners.append(i)
+    n = len(terms)
+    for i in range(len(tokens) - n + 1):
+        if tokens[i:i + n] == terms:
+            return starts[owners[i]]
+    return starts[0]
+
+
+# --- SQLite FTS5 implementation -----------------------------------------------
+
+
+def create_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS caption_events USING fts5("
+        "text, caption_id UNINDEXED, event_index UNINDEXED, starts UNINDEXED, "
+        "tokenize='unicode61')"
+    )
+    # FTS5 can't index caption_id, so filtering on it scans every event in the
+    # corpus. This table maps each caption to its FTS rowids, so re-indexing or
+    # removing a caption deletes by rowid.
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'caption_event_rows'"
+    ).fetchone()
+    conn.execute("CREATE TABLE IF NOT EXISTS caption_event_rows (caption_id TEXT NOT NULL, event_rowid INTEGER NOT NULL)")
+    conn.execute("CREATE INDEX IF NOT EXISTS caption_event_rows_caption_id ON caption_event_rows (caption_id)")
+    if not exists:
+        # Index files written before the table existed: map their rows once.
+        conn.execute("INSERT INTO caption_event_rows (caption_id, event_rowid) SELECT caption_id, rowid FROM caption_events")
+
+
+def _insert_event(conn: sqlite3.Connection, caption_id: str, event_index: int, row: dict) -> int:
+    return conn.execute(
+        "INSERT INTO caption_events (text, caption_id, event_index, starts) VALUES (?, ?, ?, ?)",
+        (row["text"], caption_id, event_index, json.dumps(row["starts"])),
+    ).lastrowid
+
+
+def replace_events(conn: sqlite3.Connection, caption_id: str, rows: list[dict]) -> None:
+    """Replaces the indexed events of one caption with ``rows`` (see ``index_rows``)."""
+    remove_events(conn, caption_id)
+    rowids = [(caption_id, _insert_event(conn, caption_id, row["event_index"], row)) for row in rows]
+    conn.executemany("INSERT INTO caption_event_rows (caption_id, event_rowid) VALUES (?, ?)", rowids)
+
+
+_CAPTION_ROWIDS = "rowid IN (SELECT event_rowid FROM caption_event_rows WHERE caption_id = ?)"
+
+
+def patch_events(conn: sqlite3.Connection, caption_id: str, changes: list[dict]) -> None:
+    """Applies event-level changes to one caption's indexed events, in order. Each
+    change is ``{"op": "set" | "insert" | "delete", "index", "search"}`` with the
+    event's ``event_row`` under ``search``; inserts and deletes shift the later rows."""
+    for change in changes:
+        op, index = change["op"], change["index"]
+        if op != "insert":
+            found = conn.execute(
+                f"SELECT rowid FROM caption_events WHERE {_CAPTION_ROWIDS} AND event_index = ?",
+                (caption_id, index),
+            ).fetchone()
+            if found is not None:
+                conn.execute("DELETE FROM caption_events WHERE rowid = ?", found)
+                conn.execute("DELETE FROM caption_event_rows WHERE event_rowid = ?", found)
+        if op != "set":
+            delta, start = (1, index) if op == "insert" else (-1, index + 1)
+            conn.execute(
+                f"UPDATE caption_events SET event_index = event_index + ? WHERE {_CAPTION_ROWIDS} AND event_index >= ?",
+                (delta, caption_id, start),
+            )
+        if op != "delete" and change.get("search") is not None:
+            rowid = _insert_event(conn, caption_id, index, change["search"])
+            conn.execute("INSERT INTO caption_event_rows (caption_id, event_rowid) VALUES (?, ?)", (caption_id, rowid))
+
+
+def remove_events(conn: sqlite3.Connection, caption_id: str) -> None:
+    rowids = conn.execute("SELECT event_rowid FROM caption_event_rows WHERE caption_id = ?", (caption_id,)).fetchall()
+    conn.executemany("DELETE FROM caption_events WHERE rowid = ?", rowids)
+    conn.execute("DELETE FROM caption_event_rows WHERE caption_id = ?", (caption_id,))
+
+
+def match_events(conn: sqlite3.Connection, terms: list[str], limit: int) -> list[dict]:
+    """Returns the search rows whose text contains ``terms`` as a phrase, best first."""
+    if not terms:
+        return []
+    rows = conn.execute(
+        "SELECT caption_id, event_index, text, starts FROM caption_events "
+        "WHERE caption_events MATCH ? ORDER BY rank LIMIT ?",
+        ('"' + " ".join(terms) + '"', limit),
+    ).fetchall()
+    return [
+        {"caption_id": caption_id, "event_index": event_index, "text": text, "starts": json.loads(starts)}
+        for caption_id, event_index, text, starts in rows
+    ]
+
+
+class SearchIndex:
+    """Standalone SQLite FTS5 search index over caption events, on its own connection.
+
+    The SQLite database backend keeps the same tables inside the captions
+    database; this class indexes documents directly, for tests and tools.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            create_schema(self._conn)
+
+    def index(self, caption_id: str, data: dict) -> None:
+        rows = index_rows(data)
+        with self._lock, self._conn:
+            replace_events(self._conn, caption_id, rows)
+
+    def remove(self, caption_id: str) -> None:
+        with self._lock, self._conn:
+            remove_events(self._conn, caption_id)
+
+    def search(self, query: str, limit: int = 50) -> list[dict]:
+        """Returns timestamped hits for ``query``, matched as a phrase."""
+        terms = search_terms(query)
+        with self._lock:
+            rows = match_events(self._conn, terms, limit)
+        return search_hits(rows, terms)
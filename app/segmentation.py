@@ -0,0 +1,60 @@
+from .models import ResegmentRequest
+
+SENTENCE_END = (".", "!", "?", "…")
+
+
+def segment_boundaries(
+    starts: list[int],
+    ends: list[int],
+    lengths: list[int],
+    sentence_ends: list[bool],
+    request: ResegmentRequest,
+) -> list[int]:
+    """Returns the indices of the words that open a new event.
+
+    A first pass marks forced breaks (long silences and sentence ends); a second
+    greedy pass packs words into lines until the character or duration budget
+    would be exceeded. Every event holds at least one word.
+    """
+    n = len(starts)
+    forced = [False] * n
+    for i in range(1, n):
+        forced[i] = starts[i] - ends[i - 1] >= request.min_gap_ms or (
+            request.split_on_punctuation and sentence_ends[i - 1]
+        )
+
+    boundaries = [0] if n else []
+    line_start, line_chars = starts[0] if n else 0, lengths[0] if n else 0
+    for i in range(1, n):
+        chars = line_chars + 1 + lengths[i]
+        if forced[i] or chars > request.max_chars or ends[i] - line_start > request.max_duration_ms:
+            boundaries.append(i)
+            line_start, line_chars = starts[i], lengths[i]
+        else:
+            line_chars = chars
+    return boundaries
+
+
+def resegment(data: dict, request: ResegmentRequest) -> int:
+    """Regroups every word of a stored caption document into new events in place,
+    returning the number of events. Each new event keeps the style fields of the
+    event its first word came from."""
+    events = data.get("events", [])
+    words, owners = [], []
+    for event in events:
+        for word in event.get("Words", []):
+            words.append(word)
+            owners.append(event)
+
+    boundaries = segment_boundaries(
+        [w["start"] for w in words],
+        [w["end"] for w in words],
+        [len(w["text"]) for w in words],
+        [w["text"].endswith(SENTENCE_END) for w in words],
+        request,
+    )
+    data["events"] = [
+        {**{k: v for k, v in owners[first].items() if k != "Words"}, "Words": words[first:last]}
+        for first, last in zip(boundaries, boundaries[1:] + [len(words)])
+    ]
+    return len(data["events"])
@@ -0,0 +1,421 @@
+import asyncio
+import json
+import re
+import sqlite3
+import uuid
+from dataclasses import dataclass
+from threading import Lock
+
+from . import search
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE TABLE IF NOT EXISTS captions (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    video_id TEXT REFERENCES videos (id),
+    data TEXT NOT NULL CHECK (json_valid(data)),
+    full_text TEXT NOT NULL DEFAULT '',
+    duration_ms INTEGER NOT NULL DEFAULT 0,
+    event_count INTEGER NOT NULL DEFAULT 0,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+CREATE INDEX IF NOT EXISTS captions_video_id_id_idx ON captions (video_id, id);
+
+CREATE TRIGGER IF NOT EXISTS captions_bump_version
+AFTER UPDATE ON captions FOR EACH ROW WHEN NEW.version = OLD.version
+BEGIN
+    UPDATE captions
+    SET version = OLD.version + 1, updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TABLE IF NOT EXISTS burn_jobs (
+    id TEXT PRIMARY KEY,
+    caption_id TEXT REFERENCES captions (id) ON DELETE SET NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    result_url TEXT,
+    error TEXT,
+    telemetry TEXT CHECK (telemetry IS NULL OR json_valid(telemetry)),
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+-- Search rows go with their caption, like the cascade on Postgres.
+CREATE TRIGGER IF NOT EXISTS captions_remove_search_events
+AFTER DELETE ON captions FOR EACH ROW
+BEGIN
+    DELETE FROM caption_events
+    WHERE rowid IN (SELECT event_rowid FROM caption_event_rows WHERE caption_id = OLD.id);
+    DELETE FROM caption_event_rows WHERE caption_id = OLD.id;
+END;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    status_code INTEGER,
+    response TEXT CHECK (response IS NULL OR json_valid(response)),
+    locked_until TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+"""
+
+JSON_COLUMNS = {
+    "captions": frozenset({"data"}),
+    "burn_jobs": frozenset({"telemetry"}),
+    "idempotency_keys": frozenset({"response"}),
+}
+VERSIONED_TABLES = frozenset({"captions"})
+_EMBED = re.compile(r"^(\w+)\(\*\)$")
+_IDENTIFIER = re.compile(r"^\w+$")
+
+
+def _identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name!r}")
+    return f'"{name}"'
+
+
+@dataclass
+class SqliteResponse:
+    data: list[dict]
+
+
+class SqliteQuery:
+    """Builds and runs one statement against a ``SqliteClient``, mirroring the
+    subset of the PostgREST query builder that the repositories use."""
+
+    def __init__(self, client: "SqliteClient", table: str):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns: list[str] = ["*"]
+        self._embeds: list[str] = []
+        self._values: dict | list[dict] | None = None
+        self._filters: list[tuple[str, str, object]] = []
+        self._order: tuple[str, bool] | None = None
+        self._limit: int | None = None
+        self._on_conflict = "id"
+        self._ignore_duplicates = False
+
+    def select(self, columns: str = "*") -> "SqliteQuery":
+        self._columns, self._embeds = [], []
+        for column in (c.strip() for c in columns.split(",")):
+            embed = _EMBED.match(column)
+            if embed:
+                self._embeds.append(embed.group(1))
+            else:
+                self._columns.append(column)
+        return self
+
+    def insert(self, values: dict | list[dict]) -> "SqliteQuery":
+        self._action, self._values = "insert", values
+        return self
+
+    def upsert(
+        self,
+        values: dict | list[dict],
+        on_conflict: str = "id",
+        ignore_duplicates: bool = False,
+        returning: str | None = None,
+    ) -> "SqliteQuery":
+        self._action, self._values, self._on_conflict = "upsert", values, on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: dict) -> "SqliteQuery":
+        self._action, self._values = "update", values
+        return self
+
+    def delete(self) -> "SqliteQuery":
+        self._action = "delete"
+        return self
+
+    def eq(self, column: str, value) -> "SqliteQuery":
+        self._filters.append((column, "=", value))
+        return self
+
+    def gt(self, column: str, value) -> "SqliteQuery":
+        self._filters.append((column, ">", value))
+        return self
+
+    def in_(self, column: str, values) -> "SqliteQuery":
+        self._filters.append((column, "IN", list(values)))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "SqliteQuery":
+        self._order = (column, desc)
+        return self
+
+    def limit(self, size: int) -> "SqliteQuery":
+        self._limit = size
+        return self
+
+    def _where(self) -> tuple[str, list]:
+        clauses, params = [], []
+        for column, op, value in self._filters:
+            if op == "IN":
+                clauses.append(f"{_identifier(column)} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{_identifier(column)} {op} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _encode(self, row: dict) -> dict:
+        json_columns = JSON_COLUMNS.get(self._table, ())
+        return {k: json.dumps(v, separators=(",", ":")) if k in json_columns else v for k, v in row.items()}
+
+    def _statement(self) -> tuple[str, list]:
+        table = _identifier(self._table)
+        where, params = self._where()
+        if self._action == "insert":
+            row = self._encode(self._values)
+            columns = ", ".join(_identifier(c) for c in row)
+            sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * len(row))}) RETURNING *"
+            return sql, list(row.values())
+        if self._action == "upsert":
+            row = self._encode(self._values)
+            columns = ", ".join(_identifier(c) for c in row)
+            assignments = ", ".join(f"{_identifier(c)} = excluded.{_identifier(c)}" for c in row)
+            action = "NOTHING" if self._ignore_duplicates else f"UPDATE SET {assignments}"
+            sql = (
+                f"INSERT INTO {table} ({columns}) VALUES ({', '.join('?' * len(row))}) "
+                f"ON CONFLICT ({_identifier(self._on_conflict)}) DO {action} RETURNING *"
+            )
+            return sql, list(row.values())
+        if self._action == "update":
+            row = self._encode(self._values)
+            assignments = ", ".join(f"{_identifier(c)} = ?" for c in row)
+            return f"UPDATE {table} SET {assignments}{where} RETURNING *", [*row.values(), *params]
+        if self._action == "delete":
+            return f"DELETE FROM {table}{where} RETURNING *", params
+
+        columns = ", ".join("*" if c == "*" else _identifier(c) for c in self._columns) or "id"
+        sql = f"SELECT {columns} FROM {table}{where}"
+        if self._order is not None:
+            sql += f" ORDER BY {_identifier(self._order[0])}{' DESC' if self._order[1] else ''}"
+        if self._limit is not None:
+            sql += " LIMIT ?"
+            params.append(self._limit)
+        return sql, params
+
+    def _run(self) -> SqliteResponse:
+        with self._client.transaction() as conn:
+            if self._action == "insert":
+                values = self._values if isinstance(self._values, list) else [self._values]
+                rows = [inserted for row in values for inserted in self._client.insert(conn, self._table, row)]
+            elif self._action == "upsert":
+                rows = []
+                for row in self._values if isinstance(self._values, list) else [self._values]:
+                    query = SqliteQuery(self._client, self._table).upsert(row, self._on_conflict, self._ignore_duplicates)
+                    sql, params = query._statement()
+                    rows += [dict(r) for r in conn.execute(sql, params)]
+            else:
+                sql, params = self._statement()
+                rows = [dict(row) for row in conn.execute(sql, params)]
+                if self._action == "update" and rows and self._table in VERSIONED_TABLES:
+                    # Re-read so the rows reflect what the version trigger wrote.
+                    rows = self._client.fetch(conn, self._table, [row["id"] for row in rows])
+            for embed in self._embeds:
+                self._client.embed(conn, rows, embed)
+        return SqliteResponse([self._client.decode(self._table, row) for row in rows])
+
+    def execute(self) -> SqliteResponse:
+        return self._run()
+
+
+class AsyncSqliteQuery(SqliteQuery):
+    async def execute(self) -> SqliteResponse:
+        return await asyncio.to_thread(self._run)
+
+
+class SqliteRpc:
+    def __init__(self, client: "SqliteClient", fn, params: dict):
+        self._client = client
+        self._fn = fn
+        self._params = params
+
+    def _run(self) -> SqliteResponse:
+        with self._client.transaction() as conn:
+            rows = self._fn(self._client, conn, **self._params)
+        return SqliteResponse(rows)
+
+    def execute(self) -> SqliteResponse:
+        return self._run()
+
+
+class AsyncSqliteRpc(SqliteRpc):
+    async def execute(self) -> SqliteResponse:
+        return await asyncio.to_thread(self._run)
+
+
+def _create_captions_with_video(client: "SqliteClient", conn: sqlite3.Connection, video_url: str, caption: dict):
+    caption = dict(caption)
+    search_events = caption.pop("search_events", [])
+    video = client.insert(conn, "videos", {"url": video_url})[0]
+    rows = [client.decode("captions", row) for row in client.insert(conn, "captions", {**caption, "video_id": video["id"]})]
+    search.replace_events(conn, rows[0]["id"], search_events)
+    return rows
+
+
+def _index_caption_events(client: "SqliteClient", conn: sqlite3.Connection, entries: list[dict]):
+    for entry in entries:
+        search.replace_events(conn, entry["id"], entry["events"])
+    return []
+
+
+# SQLite has no JSON function that inserts into the middle of an array, so an
+# inserted event is merged into the events in order and the array rebuilt.
+_INSERT_EVENT = """
+SELECT json_set(:doc, '$.events', (
+    SELECT json_group_array(json(value)) FROM (
+        SELECT value, 2 * key AS position FROM json_each(:doc, '$.events')
+        UNION ALL SELECT :event, 2 * :index - 1
+        ORDER BY position
+    )
+))
+"""
+
+
+def _patch_caption_events(
+    client: "SqliteClient",
+    conn: sqlite3.Connection,
+    caption_id: str,
+    expected_version: int,
+    changes: list[dict],
+    derived: dict,
+):
+    found = conn.execute(
+        "SELECT data, json_type(data, '$._v') IS NOT NULL, "
+        "json_type(data, '$.zstd') IS NOT NULL OR json_type(data, '$.zlib') IS NOT NULL "
+        "FROM captions WHERE id = ? AND version = ?",
+        (caption_id, expected_version),
+    ).fetchone()
+    if found is None or found[2]:
+        return []
+    # The document stays text; each change is applied by SQLite's JSON functions.
+    doc, form = found[0], "compact" if found[1] else "event"
+    for change in changes:
+        path = f"$.events[{change['index']}]"
+        if change["op"] == "set":
+            doc = conn.execute("SELECT json_set(?, ?, json(?))", (doc, path, json.dumps(change[form]))).fetchone()[0]
+        elif change["op"] == "insert":
+            params = {"doc": doc, "event": json.dumps(change[form]), "index": change["index"]}
+            doc = conn.execute(_INSERT_EVENT, params).fetchone()[0]
+        else:
+            doc = conn.execute("SELECT json_remove(?, ?)", (doc, path)).fetchone()[0]
+    search.patch_events(conn, caption_id, changes)
+    conn.execute(
+        "UPDATE captions SET data = :doc, full_text = :full_text, duration_ms = :duration_ms, "
+        "event_count = :event_count, word_count = :word_count WHERE id = :id",
+        {**derived, "doc": doc, "id": caption_id},
+    )
+    rows = conn.execute("SELECT id, version, updated_at FROM captions WHERE id = ?", (caption_id,))
+    return [dict(row) for row in rows]
+
+
+def _search_caption_events(client: "SqliteClient", conn: sqlite3.Connection, query: str, max_results: int):
+    return search.match_events(conn, query.split(), max_results)
+
+
+class SqliteClient:
+    """Embedded stand-in for the Supabase client, backed by one SQLite file.
+
+    Exposes ``table(...)`` and ``rpc(...)`` with the same fluent interface the
+    repositories already use, so they run unchanged on either backend. The
+    database runs in WAL mode, stores caption documents in JSON-checked text
+    columns and relies on sqlite3's statement cache, which reuses the prepared
+    statement for every query shape the repositories issue.
+    """
+
+    query_class = SqliteQuery
+    rpc_class = SqliteRpc
+    functions = {
+        "create_captions_with_video": _create_captions_with_video,
+        "index_caption_events": _index_caption_events,
+        "patch_caption_events": _patch_caption_events,
+        "search_caption_events": _search_caption_events,
+    }
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            with self._conn:
+                search.create_schema(self._conn)
+            self._conn.executescript(SCHEMA)
+            # Databases created before claims had leases.
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(idempotency_keys)")}
+            if "locked_until" not in columns:
+                self._conn.execute("ALTER TABLE idempotency_keys ADD COLUMN locked_until TEXT")
+
+    def table(self, name: str) -> SqliteQuery:
+        return self.query_class(self, name)
+
+    def rpc(self, fn: str, params: dict | None = None) -> SqliteRpc:
+        return self.rpc_class(self, self.functions[fn], params or {})
+
+    def transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+    def insert(self, conn: sqlite3.Connection, table: str, values: dict) -> list[dict]:
+        query = SqliteQuery(self, table).insert({"id": str(uuid.uuid4()), **values})
+        return [dict(row) for row in conn.execute(*query._statement())]
+
+    def fetch(self, conn: sqlite3.Connection, table: str, ids: list) -> list[dict]:
+        sql, params = SqliteQuery(self, table).in_("id", ids).order("id")._statement()
+        return [dict(row) for row in conn.execute(sql, params)]
+
+    def embed(self, conn: sqlite3.Connection, rows: list[dict], table: str) -> None:
+        """Attaches the row referenced by ``<table minus s>_id`` under ``table``,
+        like PostgREST's many-to-one embedding."""
+        key = f"{table.removesuffix('s')}_id"
+        ids = list({row[key] for row in rows if row.get(key) is not None})
+        related = {row["id"]: self.decode(table, row) for row in self.fetch(conn, table, ids)} if ids else {}
+        for row in rows:
+            row[table] = related.get(row.get(key))
+
+    @staticmethod
+    def decode(table: str, row: dict) -> dict:
+        for column in JSON_COLUMNS.get(table, ()):
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+        return row
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class AsyncSqliteClient(SqliteClient):
+    query_class = AsyncSqliteQuery
+    rpc_class = AsyncSqliteRpc
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection, lock: Lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._lock.acquire()
+        self._conn.__enter__()
+        return self._conn
+
+    def __exit__(self, *exc) -> None:
+        try:
+            self._conn.__exit__(*exc)
+        finally:
+            self._lock.release()
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+
+from .config import get_settings
+from .database import get_async_supabase
+from .events import TERMINAL_STATUSES, JobEvents, get_job_events
+from .metrics import Gauge
+from .repository import AsyncBurnJobRepository, status_payload
+
+logger = logging.getLogger(__name__)
+
+
+class StatusWriter:
+    """Write-behind buffer for burn job status updates.
+
+    Updates are coalesced per job (later fields win) and written every
+    ``interval`` seconds, all pending jobs in one bulk upsert, so the database
+    write rate stays flat however many burns run at once. Terminal statuses are
+    written immediately, so a finished job is never only in memory. Subscribers
+    to ``events`` see every update as it is made, not when it is flushed.
+    """
+
+    def __init__(
+        self,
+        client: Callable[[], Awaitable] = get_async_supabase,
+        events: JobEvents | None = None,
+        interval: float = 1.0,
+    ):
+        self._client = client
+        self._events = events
+        self.interval = interval
+        self._pending: dict[str, dict] = {}
+        self._flushing: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def update_status(
+        self,
+        job_id: str,
+        status: str,
+        output_url: str | None = None,
+        error: str | None = None,
+        telemetry: dict | None = None,
+    ) -> None:
+        payload = status_payload(status, output_url, error, telemetry)
+        self._pending[job_id] = {**self._pending.get(job_id, {}), **payload}
+        if self._events is not None:
+            self._events.publish(job_id, {"id": job_id, **payload})
+        if status in TERMINAL_STATUSES or self.interval <= 0:
+            await self.flush()
+        else:
+            self._schedule()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                await AsyncBurnJobRepository(await self._client()).update_many(pending)
+            except BaseException:
+                # Keep them for the next flush, under anything that arrived meanwhile.
+                for job_id, payload in pending.items():
+                    self._pending[job_id] = {**payload, **self._pending.get(job_id, {})}
+                raise
+
+    def _schedule(self) -> None:
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to write %d burn job status updates", len(self._pending))
+        if self._pending:
+            self._flushing = asyncio.create_task(self._flush_later())
+
+
+@lru_cache
+def get_status_writer() -> StatusWriter:
+    return StatusWriter(events=get_job_events(), interval=get_settings().status_flush_seconds)
+
+
+STATUS_UPDATES_PENDING = Gauge(
+    "ezcaptions_status_updates_pending",
+    "Burn jobs with status updates buffered but not yet written.",
+    # Scraping should not create the writer (and load settings) as a side effect.
+    function=lambda: get_status_writer().pending() if get_status_writer.cache_info().currsize else 0,
+)
@@ -1,33 +1,241 @@
 import datetime
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Protocol
 
 import google.auth
 import google.auth.transport.requests
+from google.api_core.exceptions import GoogleAPICallError
 from google.cloud import storage
 
+from .cache import LRUCache
 from .config import get_settings
+from .metrics import EXTERNAL_CALL_SECONDS
 
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+SIGNED_URL_REUSE_MARGIN_SECONDS = 60
+MAX_COMPOSE_SOURCES = 32
+RETRY_BACKOFF_SECONDS = 0.5
 
-def upload_to_gcs(local_path: str, destination: str) -> str:
-    """Uploads file to GCS, returns the blob name (destination path)."""
-    client = storage.Client()
-    bucket = client.bucket(get_settings().gcs_bucket)
-    blob = bucket.blob(destination)
-    blob.upload_from_filename(local_path)
-    return destination
+_credentials = None
+_credentials_lock = Lock()
+_signed_urls = LRUCache(max_bytes=1024 * 1024, ttl_seconds=0)
+
+
+def get_credentials():
+    """Returns the process-wide default credentials, refreshing the access token
+    only when it is missing or within ``TOKEN_REFRESH_MARGIN`` of expiring."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials, _ = google.auth.default()
+        now = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)  # google-auth uses naive UTC
+        expiry = _credentials.expiry
+        if not _credentials.token or expiry is None or expiry - TOKEN_REFRESH_MARGIN <= now:
+            _credentials.refresh(google.auth.transport.requests.Request())
+        return _credentials
+
+
+@lru_cache
+def get_storage_client() -> storage.Client:
+    """Returns the process-wide client, so uploads and signing reuse its credentials
+    and HTTP session instead of setting them up per call."""
+    return storage.Client(credentials=get_credentials())
+
+
+@dataclass(frozen=True)
+class UploadResult:
+    destination: str
+    bytes: int
+    seconds: float
+    chunks: int
+
+    def telemetry(self) -> dict:
+        return {
+            "upload_bytes": self.bytes,
+            "upload_seconds": round(self.seconds, 3),
+            "upload_bytes_per_second": round(self.bytes / self.seconds) if self.seconds else None,
+            "upload_chunks": self.chunks,
+        }
+
+
+def _upload_chunk(bucket, name: str, local_path: str, offset: int, length: int, retries: int):
+    blob = bucket.blob(name)
+    for attempt in range(retries + 1):
+        try:
+            with open(local_path, "rb") as f:
+                f.seek(offset)
+                blob.upload_from_file(f, size=length)
+            return blob
+        except (GoogleAPICallError, OSError):
+            if attempt == retries:
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * 2**attempt)
+
+
+def _compose(bucket, pool: ThreadPoolExecutor, parts: list, destination, prefix: str, temporaries: list) -> None:
+    """Composes ``parts`` into ``destination``, going through intermediate objects
+    (appended to ``temporaries``) when there are more than GCS's 32-source limit."""
+    level = 0
+    while len(parts) > MAX_COMPOSE_SOURCES:
+        groups = [parts[i:i + MAX_COMPOSE_SOURCES] for i in range(0, len(parts), MAX_COMPOSE_SOURCES)]
+        blobs = [bucket.blob(f"{prefix}/compose-{level}-{n:05d}") for n in range(len(groups))]
+        temporaries += blobs
+        list(pool.map(lambda blob, group: blob.compose(group), blobs, groups))
+        parts = blobs
+        level += 1
+    destination.compose(parts)
+
+
+def _parallel_upload(
+    bucket, local_path: str, destination: str, size: int, chunk_bytes: int, workers: int, retries: int
+) -> int:
+    prefix = f"{destination}.parts/{uuid.uuid4().hex}"
+    offsets = range(0, size, chunk_bytes)
+    names = [f"{prefix}/{n:05d}" for n in range(len(offsets))]
+    temporaries = [bucket.blob(name) for name in names]
+    target = bucket.blob(destination)
+    target.content_type = mimetypes.guess_type(local_path)[0]
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(
+                lambda name, offset: _upload_chunk(
+                    bucket, name, local_path, offset, min(chunk_bytes, size - offset), retries
+                ),
+                names,
+                offsets,
+            ))
+            _compose(bucket, pool, parts, target, prefix, temporaries)
+    finally:
+        # Runs after the pool has drained, so no chunk lands after its cleanup.
+        bucket.delete_blobs(temporaries, on_error=lambda blob: None)
+    return len(offsets)
+
+
+def upload_to_gcs(local_path: str, destination: str) -> UploadResult:
+    """Uploads file to GCS under ``destination``.
+
+    Files larger than ``upload_chunk_bytes`` are split into chunks uploaded in
+    parallel (each retried on transient errors) and composed server-side.
+    """
+    settings = get_settings()
+    bucket = get_storage_client().bucket(settings.gcs_bucket)
+    size = os.path.getsize(local_path)
+    started = time.perf_counter()
+    with EXTERNAL_CALL_SECONDS.time(service="gcs", operation="upload"):
+        if settings.upload_workers > 1 and size > settings.upload_chunk_bytes:
+            chunks = _parallel_upload(
+                bucket,
+                local_path,
+                destination,
+                size,
+                settings.upload_chunk_bytes,
+                settings.upload_workers,
+                settings.upload_chunk_retries,
+            )
+        else:
+            bucket.blob(destination).upload_from_filename(local_path)
+            chunks = 1
+    return UploadResult(destination, size, time.perf_counter() - started, chunks)
 
 
 def generate_signed_url(blob_name: str, expiry_minutes: int = 15) -> str:
-    """Generates a time-limited signed URL for a private GCS object."""
-    credentials, _ = google.auth.default()
-    auth_req = google.auth.transport.requests.Request()
-    credentials.refresh(auth_req)
-    client = storage.Client(credentials=credentials)
-    bucket = client.bucket(get_settings().gcs_bucket)
+    """Generates a time-limited signed URL for a private GCS object.
+
+    URLs are reused for the same blob and expiry until
+    ``SIGNED_URL_REUSE_MARGIN_SECONDS`` before they lapse.
+    """
+    key = f"{blob_name}@{expiry_minutes}"
+    cached = _signed_urls.get(key)
+    if cached is not None:
+        return cached.decode()
+
+    credentials = get_credentials()
+    bucket = get_storage_client().bucket(get_settings().gcs_bucket)
     blob = bucket.blob(blob_name)
-    return blob.generate_signed_url(
-        version="v4",
-        expiration=datetime.timedelta(minutes=expiry_minutes),
-        method="GET",
-        service_account_email=credentials.service_account_email,
-        access_token=credentials.token,
-    )
+    with EXTERNAL_CALL_SECONDS.time(service="gcs", operation="sign_url"):
+        url = blob.generate_signed_url(
+            version="v4",
+            expiration=datetime.timedelta(minutes=expiry_minutes),
+            method="GET",
+            service_account_email=credentials.service_account_email,
+            access_token=credentials.token,
+        )
+    _signed_urls.set(key, url.encode(), ttl_seconds=expiry_minutes * 60 - SIGNED_URL_REUSE_MARGIN_SECONDS)
+    return url
+
+
+class StorageBackend(Protocol):
+    def upload(self, local_path: str, destination: str) -> UploadResult: ...
+
+    def signed_url(self, name: str, expiry_minutes: int = 15) -> str | None:
+        """Returns a URL clients can fetch ``name`` from directly, if the backend has one."""
+
+    def local_path(self, name: str) -> Path | None:
+        """Returns the file holding ``name`` when the backend serves from local disk."""
+
+
+class GCSStorage:
+    """Objects in the ``GCS_BUCKET`` bucket, downloaded through signed URLs."""
+
+    def upload(self, local_path: str, destination: str) -> UploadResult:
+        return upload_to_gcs(local_path, destination)
+
+    def signed_url(self, name: str, expiry_minutes: int = 15) -> str | None:
+        return generate_signed_url(name, expiry_minutes)
+
+    def local_path(self, name: str) -> Path | None:
+        return None
+
+
+class LocalStorage:
+    """Objects stored as files under ``root``, served by the API itself."""
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _path(self, name: str) -> Path:
+        path = (self.root / name).resolve()
+        if not path.is_relative_to(self.root):
+            raise ValueError(f"Object name escapes the storage root: {name!r}")
+        return path
+
+    def upload(self, local_path: str, destination: str) -> UploadResult:
+        path = self._path(destination)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        # Copy beside the target and rename, so readers never see a partial file.
+        # shutil.copyfile uses sendfile/copy_file_range on Linux.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        os.close(fd)
+        try:
+            shutil.copyfile(local_path, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return UploadResult(destination, path.stat().st_size, time.perf_counter() - started, 1)
+
+    def signed_url(self, name: str, expiry_minutes: int = 15) -> str | None:
+        return None
+
+    def local_path(self, name: str) -> Path | None:
+        path = self._path(name)
+        return path if path.is_file() else None
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    settings = get_settings()
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.storage_local_path)
+    return GCSStorage()
@@ -0,0 +1,47 @@
+from bisect import bisect_right
+from collections.abc import Callable
+
+from .models import RetimeRequest
+
+
+def build_time_map(request: RetimeRequest) -> Callable[[int], int]:
+    """Builds ``t -> offset + scale * sync(t)``, where ``sync`` is the piecewise-linear
+    map through ``request.sync_points`` (extrapolated from its end segments)."""
+    offset, scale = request.offset_ms, request.scale
+    points = request.sync_points
+    if not points:
+        return lambda t: max(0, round(offset + scale * t))
+
+    sources = [s for s, _ in points]
+    targets = [t for _, t in points]
+    slopes = [
+        (t1 - t0) / (s1 - s0)
+        for s0, t0, s1, t1 in zip(sources, targets, sources[1:], targets[1:])
+    ]
+    last = len(slopes) - 1
+
+    def time_map(t: int) -> int:
+        i = min(max(bisect_right(sources, t) - 1, 0), last)
+        synced = targets[i] + slopes[i] * (t - sources[i])
+        return max(0, round(offset + scale * synced))
+
+    return time_map
+
+
+def retime(data: dict, request: RetimeRequest) -> int:
+    """Retimes every word of a stored caption document in place, returning how many
+    words moved. Words are selected by their start time within ``from_ms``/``to_ms``."""
+    lo = request.from_ms if request.from_ms is not None else float("-inf")
+    hi = request.to_ms if request.to_ms is not None else float("inf")
+    words = [
+        word
+        for event in data.get("events", [])
+        for word in event.get("Words", [])
+        if lo <= word["start"] < hi
+    ]
+    time_map = build_time_map(request)
+    starts = [time_map(w["start"]) for w in words]
+    ends = [time_map(w["end"]) for w in words]
+    for word, start, end in zip(words, starts, ends):
+        word["start"], word["end"] = start, max(start, end)
+    return len(words)
@@ -1,6 +1,7 @@
 import assemblyai as aai
 
 from .config import get_settings
+from .metrics import EXTERNAL_CALL_SECONDS
 from .models import Captions, CaptionsEvent, CaptionsInfo, CaptionsWord
 
 
@@ -18,7 +19,8 @@ def transcribe(
         speech_model=aai.SpeechModel[speech_model],
     )
 
-    transcript = aai.Transcriber().transcribe(url, config=config)
+    with EXTERNAL_CALL_SECONDS.time(service="assemblyai", operation="transcribe"):
+        transcript = aai.Transcriber().transcribe(url, config=config)
 
     if transcript.error:
         raise RuntimeError(transcript.error)
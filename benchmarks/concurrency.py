@@ -0,0 +1,143 @@
+"""Concurrency of blocking (threadpool) vs async caption reads.
+
+Boots a fake PostgREST with per-request latency, then serves ``GET /captions/{id}``
+two ways: a sync ``def`` route on ``CaptionsRepository`` (bounded by Starlette's
+threadpool) and the real async app on ``AsyncCaptionsRepository``. The async app
+is then run again on the embedded SQLite backend. All are driven with the same
+number of concurrent clients.
+
+The fake PostgREST and the load driver each run in their own process, so the
+API under test has a GIL to itself and the numbers reflect the API alone.
+
+Run with ``python -m benchmarks.concurrency [concurrency] [requests] [latency_ms]``.
+"""
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import httpx
+import uvicorn
+from fastapi import Depends, FastAPI, HTTPException
+
+from .postgrest import FakePostgrest
+from .server import BackgroundServer, ServerProcess
+from .transcripts import generate_captions
+
+CAPTION_ID = "caption-1"
+
+
+def serve_postgrest(port: int, latency: float, data: dict) -> None:
+    postgrest = FakePostgrest(latency=latency)
+    postgrest.tables["captions"] = {CAPTION_ID: {"id": CAPTION_ID, "title": "Bench", "data": data}}
+    uvicorn.run(postgrest.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def sync_app(postgrest_url: str) -> FastAPI:
+    from supabase import create_client
+
+    from app.repository import CaptionsRepository
+
+    client = create_client(postgrest_url, "local-key")
+    app = FastAPI()
+
+    def get_repo() -> CaptionsRepository:
+        return CaptionsRepository(client)
+
+    @app.get("/captions/{id}")
+    def get_captions(id: str, repo: CaptionsRepository = Depends(get_repo)):
+        record = repo.get(id)
+        if not record:
+            raise HTTPException(status_code=404, detail="Not found")
+        return record
+
+    return app
+
+
+def async_app(postgrest_url: str, **env: str) -> FastAPI:
+    os.environ.update({
+        "SUPABASE_URL": postgrest_url,
+        "SUPABASE_KEY": "local-key",
+        "ASSEMBLYAI_KEY": "unused",
+        "GCS_BUCKET": "unused",
+        "CACHE_MAX_BYTES": "0",
+        "DB_BACKEND": "supabase",
+        **env,
+    })
+    from app import database
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    database._async_client = None
+    from app.main import app
+
+    return app
+
+
+def sqlite_app(path: Path, data: dict) -> FastAPI:
+    from app.sqlite import SqliteClient
+
+    client = SqliteClient(str(path))
+    client.table("captions").insert({"id": CAPTION_ID, "title": "Bench", "data": data}).execute()
+    client.close()
+    return async_app("", DB_BACKEND="sqlite", SQLITE_PATH=str(path))
+
+
+async def drive(url: str, concurrency: int, requests: int) -> list[float]:
+    latencies: list[float] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        queue = iter(range(requests))
+
+        async def worker():
+            for _ in queue:
+                started = time.perf_counter()
+                response = await client.get(f"/captions/{CAPTION_ID}")
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def run_driver(url: str, concurrency: int, requests: int) -> tuple[list[float], float]:
+    """Runs ``drive`` and times it; called in the driver process."""
+    started = time.perf_counter()
+    latencies = asyncio.run(drive(url, concurrency, requests))
+    return latencies, time.perf_counter() - started
+
+
+def report(name: str, latencies: list[float], elapsed: float) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:>6}: {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50 {quantiles[49] * 1000:7.1f} ms  p99 {quantiles[98] * 1000:7.1f} ms"
+    )
+
+
+def main(concurrency: int = 200, requests: int = 2000, latency_ms: float = 50) -> None:
+    data = generate_captions(200).model_dump()
+    spawn = multiprocessing.get_context("spawn")
+    with (
+        ServerProcess(serve_postgrest, latency_ms / 1000, data) as db,
+        ProcessPoolExecutor(max_workers=1, mp_context=spawn) as driver,
+        tempfile.TemporaryDirectory() as tmpdir,
+    ):
+        apps = (
+            ("sync", lambda: sync_app(db.url)),
+            ("async", lambda: async_app(db.url)),
+            ("sqlite", lambda: sqlite_app(Path(tmpdir) / "captions.db", data)),
+        )
+        for name, factory in apps:
+            with BackgroundServer(factory()) as api:
+                latencies, elapsed = driver.submit(run_driver, api.url, concurrency, requests).result()
+                report(name, latencies, elapsed)
+
+
+if __name__ == "__main__":
+    main(*(float(arg) if i == 2 else int(arg) for i, arg in enumerate(sys.argv[1:])))
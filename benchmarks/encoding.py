@@ -0,0 +1,41 @@
+"""Stored size and encode/decode latency of each caption storage encoding.
+
+Run with ``python -m benchmarks.encoding [words ...]``.
+"""
+import json
+import sys
+import time
+
+from app import codec
+
+from .transcripts import generate_captions
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench(words: int) -> None:
+    data = generate_captions(words).model_dump()
+    baseline = len(json.dumps(data, separators=(",", ":")))
+    for encoding in ("json", "compact", "zstd"):
+        encoded = codec.encode(data, encoding)
+        size = len(json.dumps(encoded, separators=(",", ":")))
+        write = best_of(lambda: json.dumps(codec.encode(data, encoding)))
+        stored = json.dumps(encoded)
+        read = best_of(lambda: codec.decode(json.loads(stored)))
+        print(
+            f"{words:>8} words  {encoding:>7}  {size / 1e3:10.1f} kB  ({size / baseline:6.1%})  "
+            f"write {write * 1000:7.1f} ms  read {read * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    for size in sizes:
+        bench(size)
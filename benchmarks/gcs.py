@@ -0,0 +1,45 @@
+"""Local stand-in for the GCS bucket behind ``GCSStorage``.
+
+A ``StorageBackend`` that stores objects as files under ``root`` after an
+artificial per-request latency and bandwidth limit, and whose signed URLs point
+at a small server (``app``) serving those files, so downloads are redirected to
+it just as they would be to storage.googleapis.com. The server also hosts the
+source videos the load test burns captions into.
+"""
+import os
+import shutil
+import time
+from pathlib import Path
+
+from starlette.applications import Starlette
+from starlette.staticfiles import StaticFiles
+
+from app.storage import UploadResult
+
+
+class FakeGCS:
+    def __init__(self, root: str, latency: float = 0.0, bytes_per_second: float = 0.0):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.url = ""  # set once the server is running
+        self.uploads = 0
+        self.app = Starlette()
+        self.app.mount("/", StaticFiles(directory=self.root))
+
+    def upload(self, local_path: str, destination: str) -> UploadResult:
+        size = os.path.getsize(local_path)
+        started = time.perf_counter()
+        time.sleep(self.latency + (size / self.bytes_per_second if self.bytes_per_second else 0))
+        path = self.root / destination
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(local_path, path)
+        self.uploads += 1
+        return UploadResult(destination, size, time.perf_counter() - started, 1)
+
+    def signed_url(self, name: str, expiry_minutes: int = 15) -> str | None:
+        return f"{self.url}/{name}?X-Goog-Expires={expiry_minutes * 60}"
+
+    def local_path(self, name: str) -> Path | None:
+        return None
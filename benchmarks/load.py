@@ -0,0 +1,363 @@
+"""End-to-end load test against local stand-ins for Supabase, GCS and AssemblyAI.
+
+Boots the real app on a fake PostgREST (``benchmarks.postgrest``), a fake GCS
+bucket (``benchmarks.gcs``) and a fake transcriber that blocks for a configurable
+latency before returning a generated transcript. It seeds captions linked to a
+test video generated with ffmpeg's lavfi sources, then drives a weighted mix of
+list, get, edit, transcribe and burn requests from concurrent clients for a
+fixed duration.
+
+Reports throughput and p50/p95/p99 latency per operation and how long burn jobs
+took to finish, followed over their SSE streams. It also reports resource usage:
+process CPU, CPU of the API's event loop thread, ffmpeg CPU and peak RSS. The
+API, the fakes and the load generator share one process, so the process figures
+include the harness itself; the event loop figure is the API's alone.
+
+Burns need ``ffmpeg`` on the PATH and are left out of the mix without it.
+
+Run with ``python -m benchmarks.load [--duration S] [--concurrency N] [--mix list=30,get=45,...]``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+from app.events import TERMINAL_STATUSES
+from app.repository import derived_columns
+from app.storage import get_storage
+
+from .concurrency import async_app
+from .gcs import FakeGCS
+from .postgrest import FakePostgrest
+from .server import BackgroundServer
+from .transcripts import generate_captions
+
+OPERATIONS = ("list", "get", "edit", "transcribe", "burn")
+DEFAULT_MIX = "list=30,get=45,edit=15,transcribe=5,burn=5"
+VIDEO_NAME = "videos/source.mp4"
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        operation, _, weight = part.partition("=")
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {operation!r}, expected one of {OPERATIONS}")
+        mix[operation] = float(weight or 1)
+    return mix
+
+
+def make_video(path: Path, seconds: float) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-shortest", "-y", str(path),
+        ],
+        check=True,
+    )
+
+
+def fake_transcriber(latency: float, words: int):
+    """Stands in for ``app.transcription.transcribe``, which blocks a threadpool
+    worker while the AssemblyAI SDK polls for the transcript."""
+    def transcribe(url: str, title: str = "Default Title", language: str | None = None, speech_model: str = "best"):
+        time.sleep(latency)
+        captions = generate_captions(words, seed=random.randrange(1 << 30))
+        captions.info.Title = title
+        return captions
+    return transcribe
+
+
+def seed(postgrest: FakePostgrest, count: int, words: int, video_url: str) -> list[str]:
+    data = generate_captions(words).model_dump()
+    columns = derived_columns(data)
+    ids = []
+    for n in range(count):
+        video = postgrest.insert("videos", {"url": video_url})
+        row = postgrest.insert("captions", {"title": f"Load {n}", "video_id": video["id"], "data": data, **columns})
+        ids.append(row["id"])
+    return ids
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, defined for any non-empty sample."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def latency_summary(values: list[float]) -> dict:
+    if not values:
+        return {}
+    return {
+        "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1),
+    }
+
+
+class LoadTest:
+    def __init__(self, url: str, caption_ids: list[str], video_url: str, mix: dict[str, float], seed: int = 0):
+        self.url = url
+        self.caption_ids = caption_ids
+        self.video_url = video_url
+        self.mix = mix
+        self.random = random.Random(seed)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.burn_seconds: list[float] = []
+        self.burn_outcomes: Counter = Counter()
+        self._jobs: set[asyncio.Task] = set()
+        self._followers: httpx.AsyncClient | None = None
+
+    async def run(self, duration: float, concurrency: int, drain: float) -> float:
+        """Drives traffic for ``duration`` seconds, then waits up to ``drain`` seconds
+        for burn jobs still running. Returns the time spent driving traffic."""
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        operations, weights = list(self.mix), list(self.mix.values())
+        async with (
+            httpx.AsyncClient(base_url=self.url, limits=limits, timeout=120) as client,
+            # SSE streams hold their connection until the job finishes, so they get their own pool.
+            httpx.AsyncClient(base_url=self.url, timeout=None) as self._followers,
+        ):
+            deadline = time.perf_counter() + duration
+
+            async def worker():
+                while time.perf_counter() < deadline:
+                    await self._request(client, self.random.choices(operations, weights)[0])
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+            if self._jobs:
+                _, pending = await asyncio.wait(self._jobs, timeout=drain)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    self.burn_outcomes["unfinished"] += len(pending)
+        return elapsed
+
+    async def _request(self, client: httpx.AsyncClient, operation: str) -> None:
+        started = time.perf_counter()
+        try:
+            status = await getattr(self, f"_{operation}")(client, started)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.latencies[operation].append(time.perf_counter() - started)
+        self.statuses[operation][status] += 1
+
+    async def _list(self, client: httpx.AsyncClient, started: float) -> int:
+        return (await client.get("/captions", params={"limit": 50})).status_code
+
+    async def _get(self, client: httpx.AsyncClient, started: float) -> int:
+        return (await client.get(f"/captions/{self.random.choice(self.caption_ids)}")).status_code
+
+    async def _edit(self, client: httpx.AsyncClient, started: float) -> int:
+        op = {"op": "edit_word", "event": 0, "word": 0, "text": f"edit-{self.random.randrange(1000)}"}
+        return (await client.patch(f"/captions/{self.random.choice(self.caption_ids)}", json={"ops": [op]})).status_code
+
+    async def _transcribe(self, client: httpx.AsyncClient, started: float) -> int:
+        response = await client.post(
+            "/captions/from-video",
+            json={"url": self.video_url, "title": "Load"},
+            headers={"Idempotency-Key": uuid.uuid4().hex},
+        )
+        if response.status_code == 201:
+            self.caption_ids.append(response.json()["id"])
+        return response.status_code
+
+    async def _burn(self, client: httpx.AsyncClient, started: float) -> int:
+        caption_id = self.random.choice(self.caption_ids)
+        response = await client.post(f"/captions/{caption_id}/burn", headers={"Idempotency-Key": uuid.uuid4().hex})
+        if response.status_code == 202:
+            task = asyncio.create_task(self._follow(caption_id, response.json()["id"], started))
+            self._jobs.add(task)
+            task.add_done_callback(self._jobs.discard)
+        return response.status_code
+
+    async def _follow(self, caption_id: str, job_id: str, started: float) -> None:
+        status = "lost"
+        try:
+            async with self._followers.stream("GET", f"/captions/{caption_id}/burn/{job_id}/events") as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        status = json.loads(line.removeprefix("data: "))["status"]
+                        if status in TERMINAL_STATUSES:
+                            break
+        except httpx.HTTPError:
+            status = "lost"
+        self.burn_outcomes[status] += 1
+        if status == "done":
+            self.burn_seconds.append(time.perf_counter() - started)
+
+    def summary(self, elapsed: float) -> dict:
+        operations = {}
+        for operation in [*OPERATIONS, "all"]:
+            if operation == "all":
+                latencies = [value for values in self.latencies.values() for value in values]
+                statuses = sum(self.statuses.values(), Counter())
+            else:
+                latencies, statuses = self.latencies.get(operation, []), self.statuses.get(operation, Counter())
+            if not latencies:
+                continue
+            operations[operation] = {
+                "requests": len(latencies),
+                "errors": sum(n for status, n in statuses.items() if not (isinstance(status, int) and status < 400)),
+                "requests_per_second": round(len(latencies) / elapsed, 1),
+                **latency_summary(latencies),
+                "statuses": {str(status): n for status, n in sorted(statuses.items(), key=str)},
+            }
+        return {
+            "operations": operations,
+            "burn_jobs": {"outcomes": dict(self.burn_outcomes), **latency_summary(self.burn_seconds)},
+        }
+
+
+class ResourceUsage:
+    """CPU and memory used between ``start()`` and ``stop()``."""
+
+    def __init__(self, api: BackgroundServer):
+        self.api = api
+
+    @staticmethod
+    def _cpu(who: int) -> float:
+        usage = resource.getrusage(who)
+        return usage.ru_utime + usage.ru_stime
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._process = self._cpu(resource.RUSAGE_SELF)
+        self._children = self._cpu(resource.RUSAGE_CHILDREN)
+        self._loop = self.api.cpu_seconds()
+
+    def stop(self) -> dict:
+        wall = time.perf_counter() - self._started
+        process = self._cpu(resource.RUSAGE_SELF) - self._process
+        loop = self.api.cpu_seconds() - self._loop
+        return {
+            "wall_seconds": round(wall, 2),
+            "process_cpu_seconds": round(process, 2),
+            "process_cpu_percent": round(process / wall * 100, 1),
+            "event_loop_cpu_percent": round(loop / wall * 100, 1),
+            "ffmpeg_cpu_seconds": round(self._cpu(resource.RUSAGE_CHILDREN) - self._children, 2),
+            # ru_maxrss is in KiB on Linux.
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+
+
+def report(summary: dict) -> None:
+    print(
+        f"\n{'operation':>10} {'requests':>9} {'errors':>7} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for operation, stats in summary["operations"].items():
+        print(
+            f"{operation:>10} {stats['requests']:9d} {stats['errors']:7d} {stats['requests_per_second']:8.1f} "
+            f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['max_ms']:8.1f}"
+        )
+    for operation, stats in summary["operations"].items():
+        if stats["errors"] and operation != "all":
+            print(f"  {operation} statuses: {stats['statuses']}")
+
+    jobs = summary["burn_jobs"]
+    if jobs["outcomes"]:
+        outcomes = ", ".join(f"{n} {status}" for status, n in jobs["outcomes"].items())
+        print(f"\nburn jobs: {outcomes}")
+        if "p50_ms" in jobs:
+            print(
+                f"  time to done: p50 {jobs['p50_ms'] / 1000:.2f} s  p95 {jobs['p95_ms'] / 1000:.2f} s  "
+                f"p99 {jobs['p99_ms'] / 1000:.2f} s"
+            )
+
+    usage = summary["resources"]
+    print(
+        f"\nresources over {usage['wall_seconds']} s: process CPU {usage['process_cpu_seconds']} s "
+        f"({usage['process_cpu_percent']}% of a core), API event loop {usage['event_loop_cpu_percent']}%, "
+        f"ffmpeg CPU {usage['ffmpeg_cpu_seconds']} s, peak RSS {usage['peak_rss_mb']} MB, "
+        f"{summary['database_requests']} database requests"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30, help="seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--captions", type=int, default=200, help="captions seeded before the run")
+    parser.add_argument("--words", type=int, default=1000, help="words per seeded or transcribed caption")
+    parser.add_argument("--db-latency-ms", type=float, default=5)
+    parser.add_argument("--transcribe-latency-ms", type=float, default=2000)
+    parser.add_argument("--upload-latency-ms", type=float, default=50)
+    parser.add_argument("--upload-mb-per-second", type=float, default=100)
+    parser.add_argument("--video-seconds", type=float, default=3, help="length of the generated test video")
+    parser.add_argument("--cache-mb", type=int, default=64, help="CACHE_MAX_BYTES for the app, in MiB")
+    parser.add_argument("--drain-seconds", type=float, default=120, help="how long to wait for running burn jobs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    mix = dict(args.mix)
+    if mix.get("burn") and shutil.which("ffmpeg") is None:
+        print("ffmpeg not found on PATH: leaving burn out of the mix", file=sys.stderr)
+        del mix["burn"]
+
+    postgrest = FakePostgrest(latency=args.db_latency_ms / 1000)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        gcs = FakeGCS(
+            str(Path(tmpdir) / "gcs"),
+            latency=args.upload_latency_ms / 1000,
+            bytes_per_second=args.upload_mb_per_second * 1024 * 1024,
+        )
+        with BackgroundServer(postgrest.app) as db, BackgroundServer(gcs.app) as bucket:
+            gcs.url = bucket.url
+            if "burn" in mix:
+                make_video(gcs.root / VIDEO_NAME, args.video_seconds)
+            video_url = f"{bucket.url}/{VIDEO_NAME}"
+            caption_ids = seed(postgrest, args.captions, args.words, video_url)
+
+            api = async_app(db.url, CACHE_MAX_BYTES=str(args.cache_mb * 1024 * 1024))
+            from app import main as routes
+
+            routes.transcribe = fake_transcriber(args.transcribe_latency_ms / 1000, args.words)
+            api.dependency_overrides[get_storage] = lambda: gcs
+
+            with BackgroundServer(api) as server:
+                load = LoadTest(server.url, caption_ids, video_url, mix, seed=args.seed)
+                usage = ResourceUsage(server)
+                usage.start()
+                elapsed = asyncio.run(load.run(args.duration, args.concurrency, args.drain_seconds))
+                resources = usage.stop()
+
+    summary = {
+        "duration_seconds": round(elapsed, 2),
+        "concurrency": args.concurrency,
+        "mix": mix,
+        **load.summary(elapsed),
+        "resources": resources,
+        "database_requests": postgrest.requests,
+    }
+    report(summary)
+    if args.json:
+        args.json.write_text(json.dumps(summary, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
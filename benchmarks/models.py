@@ -0,0 +1,142 @@
+"""Caption model hot paths across transcript sizes, compared against a stored baseline.
+
+Times validation, serialisation, ASS rendering, text and timing extraction and
+JSON response encoding on generated transcripts (100 to 200k words), reporting
+the best of several runs. ``--save`` writes the results as the new baseline;
+``--compare`` prints the ratio to a baseline and exits non-zero when any case is
+more than ``--threshold`` slower (and at least ``--min-delta-ms`` slower, so
+sub-millisecond noise on the small sizes does not fail the run).
+
+Baselines are machine- and interpreter-specific, so none is committed: record
+``benchmarks/baseline.json`` with ``make bench-baseline`` on a supported Python,
+on the machine that runs ``make bench-check``.
+
+Run with ``python -m benchmarks.models [--sizes N ...] [--save PATH | --compare PATH]``.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models import Captions
+from app.repository import derived_columns
+
+from .transcripts import generate_captions
+
+SIZES = (100, 1_000, 10_000, 50_000, 200_000)
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+@dataclass
+class Fixture:
+    captions: Captions
+    data: dict
+    record: dict
+
+
+def make_fixture(words: int) -> Fixture:
+    captions = generate_captions(words)
+    data = captions.model_dump()
+    return Fixture(captions, data, {"id": "caption-1", "title": captions.info.Title, "version": 1, "data": data})
+
+
+CASES: dict[str, Callable[[Fixture], Callable[[], object]]] = {
+    "model_validate": lambda f: lambda: Captions.model_validate(f.data),
+    "model_dump": lambda f: f.captions.model_dump,
+    "to_ass": lambda f: f.captions.to_ass,
+    "full_text": lambda f: lambda: f.captions.full_text,
+    "event_times": lambda f: lambda: [(e.start_time, e.end_time) for e in f.captions.events],
+    "derived_columns": lambda f: lambda: derived_columns(f.data),
+    # What GET /captions/{id} does with the record a route returns.
+    "json_response": lambda f: lambda: JSONResponse(jsonable_encoder(f.record)).body,
+}
+
+
+def best_of(fn: Callable[[], object], min_runs: int = 3, min_seconds: float = 0.2) -> float:
+    """Best time over at least ``min_runs`` runs and ``min_seconds`` in total."""
+    best, spent, runs = float("inf"), 0.0, 0
+    while runs < min_runs or spent < min_seconds:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+    return best
+
+
+def run(sizes: list[int], cases: list[str]) -> dict[str, dict[str, float]]:
+    results: dict[str, dict[str, float]] = {case: {} for case in cases}
+    for words in sizes:
+        fixture = make_fixture(words)
+        for case in cases:
+            seconds = best_of(CASES[case](fixture))
+            results[case][str(words)] = seconds
+            print(f"{case:>16} {words:>8} words  {seconds * 1000:10.3f} ms", flush=True)
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float, min_delta: float
+) -> list[str]:
+    """Prints current vs baseline per case and size; returns the regressions."""
+    regressions = []
+    print(f"\n{'case':>16} {'words':>8} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for case, sizes in results.items():
+        for words, seconds in sizes.items():
+            before = baseline.get(case, {}).get(words)
+            if before is None:
+                print(f"{case:>16} {words:>8} {'-':>12} {seconds * 1000:12.3f}     new")
+                continue
+            ratio = seconds / before
+            regressed = ratio > 1 + threshold and seconds - before > min_delta
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{case:>16} {words:>8} {before * 1000:12.3f} {seconds * 1000:12.3f} {ratio:7.2f}{flag}")
+            if regressed:
+                regressions.append(f"{case} @ {words} words: {before * 1000:.3f} ms -> {seconds * 1000:.3f} ms")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", type=Path, nargs="?", const=BASELINE, help="write results as the baseline")
+    mode.add_argument("--compare", type=Path, nargs="?", const=BASELINE, help="compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+    if args.compare and not args.compare.exists():
+        parser.error(f"no baseline at {args.compare}; record one first with `make bench-baseline`")
+
+    results = run(args.sizes, args.cases)
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {args.save}")
+    elif args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("python", "").rsplit(".", 1)[0] != platform.python_version().rsplit(".", 1)[0]:
+            print(f"\nWarning: baseline was recorded on Python {baseline.get('python')}, "
+                  f"this is {platform.python_version()}; timings may not be comparable.")
+        regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            print("\n".join(f"  {r}" for r in regressions))
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""Parsing throughput for the ASS/SRT/WebVTT importers.
+
+Run with ``python -m benchmarks.parsing [words ...]``.
+"""
+import io
+import sys
+import time
+
+from app.models import Captions
+
+from .transcripts import generate_captions
+
+FORMATS = ("ass", "srt", "vtt")
+
+
+def bench(words: int, repeat: int = 3) -> None:
+    captions = generate_captions(words)
+    for format in FORMATS:
+        text = getattr(captions, f"to_{format}")()
+        payload = text.encode("utf-8")
+        parse = getattr(Captions, f"from_{format}")
+        best = float("inf")
+        for _ in range(repeat):
+            lines = io.TextIOWrapper(io.BytesIO(payload), encoding="utf-8")
+            started = time.perf_counter()
+            parse(lines)
+            best = min(best, time.perf_counter() - started)
+        mb = len(payload) / 1e6
+        print(
+            f"{format:>3} {words:>8} words  {mb:7.2f} MB  {best * 1000:9.1f} ms  "
+            f"{mb / best:7.1f} MB/s  {words / best:>12,.0f} words/s"
+        )
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000]
+    for size in sizes:
+        bench(size)
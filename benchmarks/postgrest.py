@@ -0,0 +1,216 @@
+"""In-memory stand-in for the subset of the PostgREST API used by app/repository.py.
+
+Supports ``select`` column lists (including embedded ``videos(*)``), ``eq``/``gt``/``in``
+filters, ``order``, ``limit``, inserts (single or bulk), upserts, updates, deletes
+and the ``create_captions_with_video``, ``index_caption_events``,
+``patch_caption_events`` and ``search_caption_events`` functions, with an optional artificial latency per
+request to model a remote database. Column defaults, the captions ``version``
+trigger and the search rows' delete cascade mirror ``migrations/``.
+"""
+import asyncio
+import datetime
+import json
+import re
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+def _matches(row: dict, filters: list[tuple[str, str, str]]) -> bool:
+    for column, op, value in filters:
+        current = row.get(column)
+        if op == "eq" and str(current) != value:
+            return False
+        if op == "gt" and not (current is not None and str(current) > value):
+            return False
+        if op == "in" and str(current) not in value.strip("()").split(","):
+            return False
+        if op == "is" and value == "null" and current is not None:
+            return False
+    return True
+
+
+PRIMARY_KEYS = {"idempotency_keys": "key"}
+DEFAULTS = {
+    "captions": {"video_id": None, "version": 1},
+    "burn_jobs": {"status": "pending", "result_url": None, "error": None, "telemetry": None},
+    "idempotency_keys": {"status": "pending", "status_code": None, "response": None, "locked_until": None},
+}
+# Query parameters that are not filters.
+_OPTIONS = {"columns", "on_conflict"}
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.UTC).isoformat()
+
+
+class FakePostgrest:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: dict[str, dict[str, dict]] = {}
+        self.requests = 0
+        self.functions = {
+            "create_captions_with_video": self._create_captions_with_video,
+            "index_caption_events": self._index_caption_events,
+            "patch_caption_events": self._patch_caption_events,
+            "search_caption_events": self._search_caption_events,
+        }
+        # caption id -> search rows, as in the caption_events table.
+        self.search_events: dict[str, list[dict]] = {}
+        self.app = Starlette(routes=[
+            Route("/rest/v1/rpc/{function}", self._call, methods=["POST"]),
+            Route("/rest/v1/{table}", self._handle, methods=["GET", "POST", "PATCH", "DELETE"]),
+        ])
+
+    def insert(self, table: str, row: dict) -> dict:
+        """Adds a row with the table's defaults, as a plain insert would."""
+        key = PRIMARY_KEYS.get(table, "id")
+        now = _now()
+        row = {"created_at": now, "updated_at": now, **DEFAULTS.get(table, {}), **row}
+        row.setdefault(key, str(uuid.uuid4()))
+        self.tables.setdefault(table, {})[row[key]] = row
+        return row
+
+    def _project(self, row: dict, select: str) -> dict:
+        columns = select.split(",")
+        projected = dict(row) if not select or "*" in columns else {}
+        for column in columns:
+            if column.endswith(")"):
+                # Embedded resource, joined on the ``<singular>_id`` foreign key.
+                name = column.partition("(")[0]
+                projected[name] = self.tables.get(name, {}).get(row.get(name.removesuffix("s") + "_id"))
+            elif column not in ("", "*"):
+                projected[column] = row.get(column)
+        return projected
+
+    def _query(self, request: Request) -> tuple[str, list, str | None, int | None]:
+        select, order, limit, filters = "*", None, None, []
+        for key, value in request.query_params.multi_items():
+            if key in _OPTIONS:
+                continue
+            if key == "select":
+                select = value
+            elif key == "order":
+                order = value.split(".")[0]
+            elif key == "limit":
+                limit = int(value)
+            else:
+                op, _, operand = value.partition(".")
+                filters.append((key, op, operand))
+        return select, filters, order, limit
+
+    def _upsert(self, table: str, row: dict, on_conflict: str, ignore_duplicates: bool) -> dict | None:
+        for existing in self.tables.setdefault(table, {}).values():
+            if on_conflict in row and existing.get(on_conflict) == row[on_conflict]:
+                if ignore_duplicates:
+                    return None
+                existing.update(row)
+                return existing
+        return self.insert(table, row)
+
+    def _create_captions_with_video(self, params: dict) -> list[dict]:
+        caption = dict(params["caption"])
+        search_events = caption.pop("search_events", [])
+        video = self.insert("videos", {"url": params["video_url"]})
+        row = self.insert("captions", {**caption, "video_id": video["id"]})
+        self.search_events[row["id"]] = search_events
+        return [row]
+
+    def _index_caption_events(self, params: dict) -> None:
+        for entry in params["entries"]:
+            self.search_events[entry["id"]] = entry["events"]
+
+    def _patch_caption_events(self, params: dict) -> list[dict]:
+        row = self.tables.get("captions", {}).get(params["caption_id"])
+        if row is None or row.get("version", 1) != params["expected_version"]:
+            return []
+        data = row["data"]
+        if "zstd" in data or "zlib" in data:
+            return []
+        form = "compact" if "_v" in data else "event"
+        events = data.setdefault("events", [])
+        search_events = self.search_events.setdefault(row["id"], [])
+        for change in params["changes"]:
+            index = change["index"]
+            if change["op"] == "set":
+                events[index] = change[form]
+            elif change["op"] == "insert":
+                events.insert(index, change[form])
+            else:
+                del events[index]
+            if change["op"] != "insert":
+                search_events[:] = [e for e in search_events if e["event_index"] != index]
+            if change["op"] != "set":
+                delta, start = (1, index) if change["op"] == "insert" else (-1, index + 1)
+                for event in search_events:
+                    if event["event_index"] >= start:
+                        event["event_index"] += delta
+            if change["op"] != "delete" and change["search"] is not None:
+                search_events.append({"event_index": index, **change["search"]})
+        row.update(params["derived"], updated_at=_now(), version=row.get("version", 1) + 1)
+        return [{"id": row["id"], "version": row["version"], "updated_at": row["updated_at"]}]
+
+    def _search_caption_events(self, params: dict) -> list[dict]:
+        # Word-boundary phrase match; no ranking.
+        phrase = f" {params['query']} "
+        return [
+            {"caption_id": caption_id, **event}
+            for caption_id, events in self.search_events.items()
+            for event in events
+            if phrase in " " + " ".join(re.findall(r"\w+", event["text"].lower())) + " "
+        ][:params["max_results"]]
+
+    async def _call(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        function = self.functions.get(request.path_params["function"])
+        if function is None:
+            return JSONResponse({"message": "function not found", "code": "PGRST202"}, status_code=404)
+        return JSONResponse(function(json.loads(await request.body())))
+
+    async def _handle(self, request: Request) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        name = request.path_params["table"]
+        table = self.tables.setdefault(name, {})
+        select, filters, order, limit = self._query(request)
+        prefer = request.headers.get("prefer", "")
+
+        if request.method == "POST":
+            body = json.loads(await request.body())
+            on_conflict = request.query_params.get("on_conflict", PRIMARY_KEYS.get(name, "id"))
+            rows = []
+            for row in body if isinstance(body, list) else [body]:
+                if "resolution=" in prefer:
+                    row = self._upsert(name, row, on_conflict, "resolution=ignore-duplicates" in prefer)
+                else:
+                    row = self.insert(name, row)
+                if row is not None:
+                    rows.append(row)
+            if "return=minimal" in prefer:
+                return Response(status_code=201)
+            return JSONResponse(rows, status_code=201)
+
+        rows = [row for row in table.values() if _matches(row, filters)]
+        key = PRIMARY_KEYS.get(name, "id")
+        if request.method == "PATCH":
+            changes = json.loads(await request.body())
+            for row in rows:
+                row.update(changes, updated_at=_now())
+                if name == "captions":
+                    row["version"] = row.get("version", 1) + 1
+        elif request.method == "DELETE":
+            for row in rows:
+                del table[row[key]]
+                if name == "captions":
+                    self.search_events.pop(row[key], None)
+        if order:
+            rows.sort(key=lambda row: str(row.get(order)))
+        if limit is not None:
+            rows = rows[:limit]
+        return JSONResponse([self._project(row, select) for row in rows])
@@ -0,0 +1,29 @@
+"""Re-segmentation latency on generated transcripts.
+
+Run with ``python -m benchmarks.segmentation [words ...]``.
+"""
+import copy
+import sys
+import time
+
+from app.models import ResegmentRequest
+from app.segmentation import resegment
+
+from .transcripts import generate_captions
+
+
+def bench(words: int, repeat: int = 5) -> None:
+    data = generate_captions(words, words_per_event=40).model_dump()
+    best = float("inf")
+    for _ in range(repeat):
+        doc = copy.deepcopy(data)
+        started = time.perf_counter()
+        events = resegment(doc, ResegmentRequest())
+        best = min(best, time.perf_counter() - started)
+    print(f"{words:>8} words -> {events:>7} events  {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    for size in sizes:
+        bench(size)
@@ -0,0 +1,67 @@
+import multiprocessing
+import socket
+import threading
+import time
+
+import uvicorn
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Runs an ASGI app with uvicorn on a free local port in a daemon thread."""
+
+    def __init__(self, app, port: int | None = None):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "BackgroundServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def cpu_seconds(self) -> float:
+        """CPU time used by the server's event loop thread (not its worker threads)."""
+        return time.clock_gettime(time.pthread_getcpuclockid(self._thread.ident))
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class ServerProcess:
+    """Like ``BackgroundServer``, but in a spawned child process, so the server doesn't
+    share a GIL with the app being measured. ``target(port, *args)`` must be a
+    module-level function that serves on ``port`` until the process is terminated."""
+
+    def __init__(self, target, *args, port: int | None = None, timeout: float = 30):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._timeout = timeout
+        context = multiprocessing.get_context("spawn")
+        self._process = context.Process(target=target, args=(self.port, *args), daemon=True)
+
+    def __enter__(self) -> "ServerProcess":
+        self._process.start()
+        deadline = time.monotonic() + self._timeout
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.1).close()
+                return self
+            except OSError:
+                if not self._process.is_alive() or time.monotonic() > deadline:
+                    self._process.terminate()
+                    raise RuntimeError(f"Server process did not start on port {self.port}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.join(timeout=5)
@@ -0,0 +1,24 @@
+import random
+
+from app.models import Captions, CaptionsEvent, CaptionsInfo, CaptionsWord
+
+VOCABULARY = [
+    "the", "caption", "video", "and", "we", "are", "going", "to", "talk", "about",
+    "subtitles", "timing", "really", "important", "so", "let's", "get", "started", "right", "now",
+]
+
+
+def generate_captions(words: int, words_per_event: int = 12, seed: int = 0) -> Captions:
+    """Builds a synthetic transcript with ``words`` words of realistic timing."""
+    rng = random.Random(seed)
+    events = []
+    cursor = 0
+    for first in range(0, words, words_per_event):
+        event_words = []
+        for _ in range(min(words_per_event, words - first)):
+            duration = rng.randint(120, 600)
+            event_words.append(CaptionsWord(text=rng.choice(VOCABULARY), start=cursor, end=cursor + duration))
+            cursor += duration + rng.randint(0, 80)
+        events.append(CaptionsEvent(Words=event_words))
+        cursor += rng.randint(200, 900)
+    return Captions(info=CaptionsInfo(Title=f"Synthetic {words} words"), events=events)
@@ -0,0 +1,19 @@
+-- Summary columns used by the paginated GET /captions listing.
+alter table captions
+    add column if not exists duration_ms integer not null default 0,
+    add column if not exists word_count integer not null default 0,
+    add column if not exists updated_at timestamptz not null default now();
+
+create or replace function set_updated_at() returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists captions_set_updated_at on captions;
+create trigger captions_set_updated_at
+    before update on captions
+    for each row execute function set_updated_at();
+
+create index if not exists captions_video_id_id_idx on captions (video_id, id);
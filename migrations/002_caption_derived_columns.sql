@@ -0,0 +1,5 @@
+-- Derived columns so GET /captions/{id}/text and listings never read `data`.
+-- Populate existing rows afterwards with `make backfill`.
+alter table captions
+    add column if not exists full_text text not null default '',
+    add column if not exists event_count integer not null default 0;
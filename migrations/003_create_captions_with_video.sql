@@ -0,0 +1,25 @@
+-- Inserts a video and its captions in one transaction, so POST /captions/from-video
+-- needs a single round trip. Called via CaptionsRepository.create_with_video.
+create or replace function create_captions_with_video(video_url text, caption jsonb)
+returns setof captions
+language plpgsql
+as $$
+declare
+    new_video_id videos.id%type;
+begin
+    insert into videos (url) values (video_url) returning id into new_video_id;
+
+    return query
+    insert into captions (title, video_id, data, full_text, duration_ms, event_count, word_count)
+    values (
+        caption ->> 'title',
+        new_video_id,
+        caption -> 'data',
+        caption ->> 'full_text',
+        (caption ->> 'duration_ms')::integer,
+        (caption ->> 'event_count')::integer,
+        (caption ->> 'word_count')::integer
+    )
+    returning *;
+end;
+$$;
@@ -0,0 +1,16 @@
+-- Row version for ETags and If-Match optimistic concurrency on /captions/{id}.
+-- Bumped by the database on every update so concurrent writers can't reuse it.
+alter table captions
+    add column if not exists version integer not null default 1;
+
+create or replace function bump_version() returns trigger as $$
+begin
+    new.version = old.version + 1;
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists captions_bump_version on captions;
+create trigger captions_bump_version
+    before update on captions
+    for each row execute function bump_version();
@@ -0,0 +1,3 @@
+-- Per-job metrics recorded by the burn worker (upload size, duration, throughput, chunks).
+alter table burn_jobs
+    add column if not exists telemetry jsonb;
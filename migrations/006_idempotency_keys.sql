@@ -0,0 +1,10 @@
+-- Idempotency-Key records for POST /captions/from-video and POST /captions/{id}/burn.
+-- A retried request with the same key replays the stored response instead of redoing the work.
+create table if not exists idempotency_keys (
+    key text primary key,
+    fingerprint text not null,
+    status text not null default 'pending',
+    status_code integer,
+    response jsonb,
+    created_at timestamptz not null default now()
+);
@@ -0,0 +1,78 @@
+-- Phrase search over caption events for GET /search, shared by every API instance.
+-- One row per event with words: its text plus the start time of every word.
+-- The repositories replace a caption's rows through index_caption_events on each
+-- write (create_captions_with_video does it in the same call), and deleting a
+-- caption cascades. Fill it for existing rows with `make backfill`.
+create table if not exists caption_events (
+    caption_id uuid not null references captions (id) on delete cascade,
+    event_index integer not null,
+    text text not null,
+    starts integer[] not null,
+    tsv tsvector generated always as (to_tsvector('simple', text)) stored,
+    primary key (caption_id, event_index)
+);
+
+create index if not exists caption_events_tsv_idx on caption_events using gin (tsv);
+
+-- entries: [{"id": caption id, "events": [{"event_index", "text", "starts"}, ...]}, ...]
+create or replace function index_caption_events(entries jsonb)
+returns void
+language sql
+as $$
+    delete from caption_events
+    where caption_id in (select (entry ->> 'id')::uuid from jsonb_array_elements(entries) as entry);
+
+    insert into caption_events (caption_id, event_index, text, starts)
+    select
+        (entry ->> 'id')::uuid,
+        (event ->> 'event_index')::integer,
+        event ->> 'text',
+        array(select jsonb_array_elements_text(event -> 'starts')::integer)
+    from jsonb_array_elements(entries) as entry,
+        jsonb_array_elements(entry -> 'events') as event;
+$$;
+
+-- query: the lowercase search terms, matched as a phrase.
+create or replace function search_caption_events(query text, max_results integer)
+returns table (caption_id uuid, event_index integer, text text, starts integer[])
+language sql
+stable
+as $$
+    select e.caption_id, e.event_index, e.text, e.starts
+    from caption_events as e, phraseto_tsquery('simple', query) as q
+    where e.tsv @@ q
+    order by ts_rank(e.tsv, q) desc
+    limit max_results;
+$$;
+
+-- As in 003, plus the search rows passed in caption -> 'search_events'.
+create or replace function create_captions_with_video(video_url text, caption jsonb)
+returns setof captions
+language plpgsql
+as $$
+declare
+    new_video_id videos.id%type;
+    new_caption captions%rowtype;
+begin
+    insert into videos (url) values (video_url) returning id into new_video_id;
+
+    insert into captions (title, video_id, data, full_text, duration_ms, event_count, word_count)
+    values (
+        caption ->> 'title',
+        new_video_id,
+        caption -> 'data',
+        caption ->> 'full_text',
+        (caption ->> 'duration_ms')::integer,
+        (caption ->> 'event_count')::integer,
+        (caption ->> 'word_count')::integer
+    )
+    returning * into new_caption;
+
+    perform index_caption_events(jsonb_build_array(jsonb_build_object(
+        'id', new_caption.id,
+        'events', coalesce(caption -> 'search_events', '[]'::jsonb)
+    )));
+
+    return next new_caption;
+end;
+$$;
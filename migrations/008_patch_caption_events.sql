@@ -0,0 +1,77 @@
+-- In-place event edits for PATCH /captions/{id}: rewrites only the changed events
+-- of the stored document and their search rows, instead of the whole data column.
+-- Inserting or deleting an event renumbers the later search rows in one statement,
+-- so the key is checked once per statement rather than per row.
+alter table caption_events
+    drop constraint caption_events_pkey,
+    add constraint caption_events_pkey primary key (caption_id, event_index) deferrable;
+
+-- changes: [{"op": "set" | "insert" | "delete", "index", "event", "compact", "search"}, ...],
+-- applied in order. Each change carries the event in both stored forms and picks the
+-- one matching the document (compact documents have "_v"). derived: the derived columns
+-- of the edited document. Returns no row if the caption is not at expected_version
+-- or its document is compressed; the caller then rewrites the whole document.
+create or replace function patch_caption_events(
+    caption_id uuid, expected_version integer, changes jsonb, derived jsonb
+)
+returns table (id uuid, version integer, updated_at timestamptz)
+language plpgsql
+as $$
+declare
+    doc jsonb;
+    form text;
+    change jsonb;
+    at_index integer;
+begin
+    select c.data into doc
+    from captions as c
+    where c.id = patch_caption_events.caption_id and c.version = expected_version
+    for update;
+    if doc is null or doc ? 'zstd' or doc ? 'zlib' then
+        return;
+    end if;
+    form := case when doc ? '_v' then 'compact' else 'event' end;
+    if not doc ? 'events' then
+        doc := jsonb_set(doc, '{events}', '[]'::jsonb);
+    end if;
+
+    for change in select value from jsonb_array_elements(changes) loop
+        at_index := (change ->> 'index')::integer;
+        case change ->> 'op'
+            when 'set' then
+                doc := jsonb_set(doc, array['events', at_index::text], change -> form);
+                delete from caption_events as e
+                where e.caption_id = patch_caption_events.caption_id and e.event_index = at_index;
+            when 'insert' then
+                doc := jsonb_insert(doc, array['events', at_index::text], change -> form);
+                update caption_events as e set event_index = e.event_index + 1
+                where e.caption_id = patch_caption_events.caption_id and e.event_index >= at_index;
+            when 'delete' then
+                doc := doc #- array['events', at_index::text];
+                delete from caption_events as e
+                where e.caption_id = patch_caption_events.caption_id and e.event_index = at_index;
+                update caption_events as e set event_index = e.event_index - 1
+                where e.caption_id = patch_caption_events.caption_id and e.event_index > at_index;
+        end case;
+        if jsonb_typeof(change -> 'search') = 'object' then
+            insert into caption_events (caption_id, event_index, text, starts)
+            values (
+                patch_caption_events.caption_id,
+                at_index,
+                change -> 'search' ->> 'text',
+                array(select jsonb_array_elements_text(change -> 'search' -> 'starts')::integer)
+            );
+        end if;
+    end loop;
+
+    return query
+    update captions as c
+    set data = doc,
+        full_text = derived ->> 'full_text',
+        duration_ms = (derived ->> 'duration_ms')::integer,
+        event_count = (derived ->> 'event_count')::integer,
+        word_count = (derived ->> 'word_count')::integer
+    where c.id = patch_caption_events.caption_id
+    returning c.id, c.version, c.updated_at;
+end;
+$$;
@@ -0,0 +1,5 @@
+-- Lease on a pending Idempotency-Key. The request holding the key renews it while it
+-- runs; once it has passed, a retry takes the key over instead of getting 409 until
+-- the key expires. Rows claimed before this migration hold a lease from created_at.
+alter table idempotency_keys
+    add column if not exists locked_until timestamptz;
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+from app.backfill import backfill
+from app.codec import decode, encode
+from app.models import Captions, CaptionsEvent, CaptionsWord
+
+
+def row(id, text):
+    return {"id": id, "version": 1, "data": {"events": [{"Words": [{"text": text, "start": 0, "end": 100}]}]}}
+
+
+def make_client(*pages):
+    client = MagicMock()
+    select = client.table.return_value.select.return_value
+    results = [MagicMock(data=list(page)) for page in pages]
+    select.order.return_value.limit.return_value.execute.side_effect = results[:1]
+    select.gt.return_value.order.return_value.limit.return_value.execute.side_effect = results[1:]
+    return client
+
+
+def test_backfill_updates_every_row_in_pages():
+    client = make_client([row("a", "x"), row("b", "y")], [row("c", "z")])
+    assert backfill(client, batch_size=2) == 3
+    update = client.table.return_value.update
+    assert [c.args[0]["full_text"] for c in update.call_args_list] == ["x", "y", "z"]
+    client.table.return_value.select.return_value.gt.assert_called_once_with("id", "b")
+
+
+def test_backfill_reindexes_search_rows():
+    client = make_client([row("a", "x")])
+    backfill(client, batch_size=10, reindex=True)
+    client.rpc.assert_called_once_with("index_caption_events", {"entries": [
+        {"id": "a", "events": [{"event_index": 0, "text": "x", "starts": [0]}]},
+    ]})
+
+
+def test_backfill_leaves_search_rows_without_reindex():
+    client = make_client([row("a", "x")])
+    backfill(client, batch_size=10)
+    client.rpc.assert_not_called()
+
+
+def test_backfill_empty_table():
+    assert backfill(make_client([]), batch_size=10) == 0
+
+
+def test_backfill_decodes_and_reencodes():
+    data = Captions(events=[CaptionsEvent(Words=[CaptionsWord(text="x", start=0, end=100)])]).model_dump()
+    client = make_client([{"id": "a", "version": 1, "data": encode(data, "compact")}])
+    backfill(client, batch_size=10, encoding="zstd")
+    payload = client.table.return_value.update.call_args.args[0]
+    assert payload["full_text"] == "x"
+    assert decode(payload["data"]) == data
+
+
+def test_backfill_guards_each_write_by_version():
+    client = make_client([row("a", "x")])
+    backfill(client, batch_size=10)
+    update = client.table.return_value.update.return_value
+    update.eq.assert_called_once_with("id", "a")
+    update.eq.return_value.eq.assert_called_once_with("version", 1)
+
+
+def test_backfill_retries_a_row_edited_meanwhile_from_its_new_version():
+    client = make_client([row("a", "x")])
+    guarded = client.table.return_value.update.return_value.eq.return_value.eq.return_value
+    guarded.execute.side_effect = [MagicMock(data=[]), MagicMock(data=[{"id": "a"}])]
+    edited = {**row("a", "edited"), "version": 2}
+    client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[edited])
+    backfill(client, batch_size=10, reindex=True)
+    payloads = [c.args[0] for c in client.table.return_value.update.call_args_list]
+    assert [p["full_text"] for p in payloads] == ["x", "edited"]
+    assert [c.args[1] for c in client.table.return_value.update.return_value.eq.return_value.eq.call_args_list] == [1, 2]
+    [entry] = client.rpc.call_args.args[1]["entries"]
+    assert client.rpc.call_count == 1 and entry["events"][0]["text"] == "edited"
+
+
+def test_backfill_skips_a_row_deleted_meanwhile():
+    client = make_client([row("a", "x")])
+    client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
+    client.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[])
+    assert backfill(client, batch_size=10, reindex=True) == 1
+    assert client.table.return_value.update.call_count == 1
+    client.rpc.assert_not_called()
@@ -2,12 +2,15 @@ import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.burning import burn_video
+from app.metrics import BURN_ENCODES_ACTIVE, BURN_STAGE_SECONDS
 from app.models import Captions, CaptionsEvent, CaptionsWord
+from app.storage import UploadResult
 
 JOB_ID = "job-1"
 CAPTION_ID = "cap-1"
 VIDEO_URL = "https://example.com/video.mp4"
 GCS_URL = "https://storage.googleapis.com/bucket/burned/job-1/output.mp4"
+UPLOAD = UploadResult(destination=GCS_URL, bytes=8_000_000, seconds=2.0, chunks=1)
 
 
 def make_captions():
@@ -33,6 +36,12 @@ def mock_http_client(content=b"fake video", raise_for_status=None):
     return client
 
 
+def mock_storage(**upload):
+    storage = MagicMock()
+    storage.upload.configure_mock(**(upload or {"return_value": UPLOAD}))
+    return storage
+
+
 def mock_subprocess_result(returncode=0, stderr=""):
     result = MagicMock()
     result.returncode = returncode
@@ -49,16 +58,16 @@ def run(coro):
 # ---------------------------------------------------------------------------
 
 def test_happy_path_sets_processing_then_done():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
         patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
-        patch("app.burning.upload_to_gcs", return_value=GCS_URL),
+        patch("app.burning.get_storage", return_value=mock_storage()),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
@@ -68,34 +77,34 @@ def test_happy_path_sets_processing_then_done():
 
 
 def test_happy_path_output_url():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
         patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
-        patch("app.burning.upload_to_gcs", return_value=GCS_URL),
+        patch("app.burning.get_storage", return_value=mock_storage()),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
-    job_repo.update_status.assert_called_with(JOB_ID, "done", output_url=GCS_URL)
+    job_repo.update_status.assert_called_with(JOB_ID, "done", output_url=GCS_URL, telemetry=UPLOAD.telemetry())
 
 
 def test_happy_path_ffmpeg_command():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
     mock_run = MagicMock(return_value=mock_subprocess_result())
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
         patch("app.burning.subprocess.run", mock_run),
-        patch("app.burning.upload_to_gcs", return_value=GCS_URL),
+        patch("app.burning.get_storage", return_value=mock_storage()),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
@@ -108,22 +117,22 @@ def test_happy_path_ffmpeg_command():
     assert "-y" in cmd
 
 
-def test_happy_path_gcs_destination_path():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+def test_happy_path_upload_destination_path():
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
-    mock_upload = MagicMock(return_value=GCS_URL)
+    storage = mock_storage()
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
         patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
-        patch("app.burning.upload_to_gcs", mock_upload),
+        patch("app.burning.get_storage", return_value=storage),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
-    _, destination = mock_upload.call_args.args
+    _, destination = storage.upload.call_args.args
     assert destination == f"burned/{JOB_ID}/output.mp4"
 
 
@@ -132,13 +141,13 @@ def test_happy_path_gcs_destination_path():
 # ---------------------------------------------------------------------------
 
 def test_caption_not_found_sets_failed():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = None
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
@@ -148,13 +157,13 @@ def test_caption_not_found_sets_failed():
 
 
 def test_http_error_sets_failed():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client(
             raise_for_status=Exception("HTTP 403")
         )),
@@ -167,16 +176,16 @@ def test_http_error_sets_failed():
 
 
 def test_ffmpeg_nonzero_exit_sets_failed():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
         patch("app.burning.subprocess.run", return_value=mock_subprocess_result(returncode=1, stderr="Codec error")),
-        patch("app.burning.upload_to_gcs"),
+        patch("app.burning.get_storage", return_value=mock_storage()),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
@@ -185,17 +194,17 @@ def test_ffmpeg_nonzero_exit_sets_failed():
     assert "Codec error" in final.kwargs["error"]
 
 
-def test_gcs_upload_failure_sets_failed():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+def test_upload_failure_sets_failed():
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
         patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
-        patch("app.burning.upload_to_gcs", side_effect=Exception("GCS auth failed")),
+        patch("app.burning.get_storage", return_value=mock_storage(side_effect=Exception("GCS auth failed"))),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
@@ -205,23 +214,78 @@ def test_gcs_upload_failure_sets_failed():
 
 
 def test_url_with_whitespace_is_trimmed():
-    job_repo = MagicMock()
-    captions_repo = MagicMock()
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
     captions_repo.get.return_value = make_caption_record()
     
     mock_client = mock_http_client()
     url_with_whitespace = f"  {VIDEO_URL}\n "
 
     with (
-        patch("app.burning.BurnJobRepository", return_value=job_repo),
-        patch("app.burning.CaptionsRepository", return_value=captions_repo),
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
         patch("app.burning.httpx.AsyncClient", return_value=mock_client),
         patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
-        patch("app.burning.upload_to_gcs", return_value=GCS_URL),
+        patch("app.burning.get_storage", return_value=mock_storage()),
     ):
         run(burn_video(JOB_ID, CAPTION_ID, url_with_whitespace, MagicMock()))
 
     # Verify that httpx.AsyncClient().get() was called with the TRIMMED URL
     mock_client.get.assert_called_with(VIDEO_URL, follow_redirects=True)
-    job_repo.update_status.assert_called_with(JOB_ID, "done", output_url=GCS_URL)
+    job_repo.update_status.assert_called_with(JOB_ID, "done", output_url=GCS_URL, telemetry=UPLOAD.telemetry())
+
+
+
+def test_prefetched_record_skips_caption_fetch():
+    job_repo = AsyncMock()
+    captions_repo = AsyncMock()
+
+    with (
+        patch("app.burning.get_status_writer", return_value=job_repo),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
+        patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
+        patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
+        patch("app.burning.get_storage", return_value=mock_storage()),
+    ):
+        run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock(), record=make_caption_record()))
+
+    captions_repo.get.assert_not_called()
+    job_repo.update_status.assert_called_with(JOB_ID, "done", output_url=GCS_URL, telemetry=UPLOAD.telemetry())
+
+
+def test_publishes_progress_stages():
+    events = MagicMock()
+    captions_repo = AsyncMock()
+    captions_repo.get.return_value = make_caption_record()
+
+    with (
+        patch("app.burning.get_job_events", return_value=events),
+        patch("app.burning.get_status_writer", return_value=AsyncMock()),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
+        patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
+        patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
+        patch("app.burning.get_storage", return_value=mock_storage()),
+    ):
+        run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
+
+    stages = [c.args[1]["stage"] for c in events.publish.call_args_list]
+    assert stages == ["downloading", "rendering", "uploading"]
+
+
+def test_records_stage_timings():
+    captions_repo = AsyncMock()
+    captions_repo.get.return_value = make_caption_record()
+    stages = ("fetch_captions", "render_ass", "download", "encode", "upload")
+    before = {stage: BURN_STAGE_SECONDS.count(stage=stage) for stage in stages}
+
+    with (
+        patch("app.burning.get_status_writer", return_value=AsyncMock()),
+        patch("app.burning.AsyncCaptionsRepository", return_value=captions_repo),
+        patch("app.burning.httpx.AsyncClient", return_value=mock_http_client()),
+        patch("app.burning.subprocess.run", return_value=mock_subprocess_result()),
+        patch("app.burning.get_storage", return_value=mock_storage()),
+    ):
+        run(burn_video(JOB_ID, CAPTION_ID, VIDEO_URL, MagicMock()))
 
+    assert all(BURN_STAGE_SECONDS.count(stage=stage) == before[stage] + 1 for stage in stages)
+    assert BURN_ENCODES_ACTIVE.value() == 0
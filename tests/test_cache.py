@@ -0,0 +1,172 @@
+from unittest.mock import MagicMock, patch
+
+from app.cache import CaptionsCache, LRUCache, TieredCache, get_captions_cache
+
+RECORD = {"id": "abc", "title": "Test", "data": {"events": []}}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DictBackend:
+    """Stand-in for a shared cache server."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+# --- LRUCache ---
+
+def test_lru_get_set():
+    cache = LRUCache(max_bytes=100, ttl_seconds=60)
+    cache.set("a", b"123")
+    assert cache.get("a") == b"123"
+    assert cache.bytes == 3
+
+
+def test_lru_evicts_least_recently_used_by_size():
+    cache = LRUCache(max_bytes=10, ttl_seconds=60)
+    cache.set("a", b"1111")
+    cache.set("b", b"2222")
+    cache.get("a")
+    cache.set("c", b"3333")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1111"
+    assert cache.bytes == 8
+
+
+def test_lru_skips_values_larger_than_bound():
+    cache = LRUCache(max_bytes=2, ttl_seconds=60)
+    cache.set("a", b"123")
+    assert cache.get("a") is None
+    assert cache.bytes == 0
+
+
+def test_lru_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(max_bytes=100, ttl_seconds=5, clock=clock)
+    cache.set("a", b"1")
+    clock.now = 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_per_entry_ttl_overrides_default():
+    clock = FakeClock()
+    cache = LRUCache(max_bytes=100, ttl_seconds=5, clock=clock)
+    cache.set("a", b"1", ttl_seconds=10)
+    clock.now = 7
+    assert cache.get("a") == b"1"
+    clock.now = 10
+    assert cache.get("a") is None
+
+
+def test_lru_overwrite_updates_size():
+    cache = LRUCache(max_bytes=100, ttl_seconds=60)
+    cache.set("a", b"1234")
+    cache.set("a", b"1")
+    assert cache.bytes == 1
+
+
+# --- TieredCache ---
+
+def test_tiered_fills_local_from_shared():
+    local, shared = LRUCache(100, 60), DictBackend()
+    shared.set("a", b"1")
+    assert TieredCache(local, shared).get("a") == b"1"
+    assert local.get("a") == b"1"
+
+
+def test_tiered_delete_clears_both():
+    local, shared = LRUCache(100, 60), DictBackend()
+    tiered = TieredCache(local, shared)
+    tiered.set("a", b"1")
+    tiered.delete("a")
+    assert local.get("a") is None and shared.get("a") is None
+
+
+# --- CaptionsCache ---
+
+def test_captions_cache_round_trip_and_counters():
+    cache = CaptionsCache(LRUCache(10_000, 60))
+    assert cache.get("abc") is None
+    cache.put(RECORD, "v1")
+    assert cache.get("abc") == RECORD
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_captions_cache_returns_copies():
+    cache = CaptionsCache(LRUCache(10_000, 60))
+    cache.put(RECORD, "v1")
+    cache.get("abc")["data"]["events"].append({})
+    assert cache.get("abc") == RECORD
+
+
+def test_captions_cache_invalidate():
+    cache = CaptionsCache(LRUCache(10_000, 60))
+    cache.put(RECORD, "v1")
+    cache.invalidate("abc")
+    assert cache.get("abc") is None
+
+
+def test_captions_cache_fill_cannot_overwrite_a_newer_write():
+    cache = CaptionsCache(LRUCache(10_000, 60))
+    # A reader fetched v1, then a writer committed v2 before the reader filled the cache.
+    cache.invalidate("abc", "v2")
+    assert cache.put(RECORD, "v1") is False
+    assert cache.get("abc") is None
+    newer = {**RECORD, "title": "New"}
+    assert cache.put(newer, "v2") is True
+    assert cache.get("abc") == newer
+
+
+def test_captions_cache_fill_cannot_replace_the_current_version():
+    cache = CaptionsCache(LRUCache(10_000, 60))
+    cache.put(RECORD, "v2")
+    assert cache.put({**RECORD, "title": "Old"}, "v1") is False
+    assert cache.get("abc") == RECORD
+
+
+def test_captions_cache_fill_after_delete_is_ignored():
+    cache = CaptionsCache(LRUCache(10_000, 60))
+    cache.invalidate("abc")
+    assert cache.put(RECORD, "v1") is False
+    assert cache.get("abc") is None
+
+
+def test_captions_cache_invalidation_is_shared_across_processes():
+    shared = DictBackend()
+    first = CaptionsCache(TieredCache(LRUCache(10_000, 60), shared), pointers=shared)
+    second = CaptionsCache(TieredCache(LRUCache(10_000, 60), shared), pointers=shared)
+    first.put(RECORD, "v1")
+    assert second.get("abc") == RECORD
+    second.invalidate("abc")
+    assert first.get("abc") is None
+
+
+# --- get_captions_cache ---
+
+def test_captions_cache_is_off_unless_sized():
+    get_captions_cache.cache_clear()
+    with patch("app.cache.get_settings", return_value=MagicMock(cache_max_bytes=0)):
+        assert get_captions_cache() is None
+    get_captions_cache.cache_clear()
+    with patch("app.cache.get_settings", return_value=MagicMock(cache_max_bytes=1024, cache_ttl_seconds=60)):
+        assert get_captions_cache().stats()["max_bytes"] == 1024
+    get_captions_cache.cache_clear()
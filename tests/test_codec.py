@@ -0,0 +1,58 @@
+import pytest
+
+from app import codec
+from app.codec import decode, encode
+from app.models import Captions, CaptionsEvent, CaptionsInfo, CaptionsStyle, CaptionsWord
+
+
+def make_data():
+    return Captions(
+        info=CaptionsInfo(Title="Talk"),
+        styles=[CaptionsStyle(), CaptionsStyle(Name="Big", Fontsize=40)],
+        events=[
+            CaptionsEvent(Words=[CaptionsWord(text="Hello", start=0, end=500), CaptionsWord(text="world", start=520, end=900)]),
+            CaptionsEvent(Style="Big", Words=[CaptionsWord(text="Bye", start=1000, end=1400)]),
+            CaptionsEvent(),
+        ],
+    ).model_dump()
+
+
+@pytest.mark.parametrize("encoding", ["json", "compact", "zstd"])
+def test_round_trip(encoding):
+    assert decode(encode(make_data(), encoding)) == make_data()
+
+
+def test_json_is_legacy_plain_document():
+    assert encode(make_data(), "json") == make_data()
+    assert decode(make_data()) == make_data()
+
+
+def test_compact_elides_defaults():
+    doc = encode(make_data(), "compact")
+    assert doc["_v"] == codec.FORMAT_VERSION
+    assert doc["info"] == {"Title": "Talk"}
+    assert doc["styles"] == [{}, {"Name": "Big", "Fontsize": 40}]
+    assert doc["events"][0] == {"t": ["Hello", "world"], "s": [0, 520], "d": [500, 380]}
+    assert doc["events"][1]["Style"] == "Big"
+
+
+def test_compact_event_matches_compact_document():
+    doc = encode(make_data(), "compact")
+    assert [codec.compact_event(event) for event in make_data()["events"]] == doc["events"]
+
+
+def test_compact_is_smaller():
+    import json
+    data = make_data()
+    assert len(json.dumps(encode(data, "compact"))) < len(json.dumps(data)) / 2
+
+
+def test_zstd_is_tagged_and_opaque():
+    doc = encode(make_data(), "zstd")
+    assert doc["_v"] == codec.FORMAT_VERSION
+    assert set(doc) & {"zstd", "zlib"}
+
+
+def test_decode_keeps_partial_legacy_documents():
+    assert decode({}) == {}
+    assert decode({"events": []}) == {"events": []}
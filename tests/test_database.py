@@ -0,0 +1,69 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app import database
+from app.sqlite import AsyncSqliteClient
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def settings():
+    mock = MagicMock()
+    mock.db_backend = "supabase"
+    mock.supabase_url = "https://example.supabase.co"
+    mock.supabase_key = "key"
+    mock.db_max_connections = 50
+    mock.db_max_keepalive_connections = 10
+    mock.db_timeout_seconds = 5
+    return mock
+
+
+def test_async_client_is_shared_and_pooled():
+    async def scenario():
+        with (
+            patch("app.database.get_settings", return_value=settings()),
+            patch("app.database.acreate_client", new_callable=AsyncMock) as mock_create,
+        ):
+            first = await database.get_async_supabase()
+            second = await database.get_async_supabase()
+            options = mock_create.call_args.args[2]
+            await options.httpx_client.aclose()
+            database._async_client = None
+        return first, second, mock_create, options
+
+    first, second, mock_create, options = run(scenario())
+    assert first is second
+    mock_create.assert_awaited_once()
+    pool = options.httpx_client._transport._pool
+    assert pool._max_connections == 50
+    assert pool._max_keepalive_connections == 10
+
+
+def test_close_async_client():
+    client = MagicMock()
+    client.options.httpx_client.aclose = AsyncMock()
+    database._async_client = client
+    run(database.close_async_supabase())
+    client.options.httpx_client.aclose.assert_awaited_once()
+    assert database._async_client is None
+
+
+def test_sqlite_backend_selected_by_settings():
+    async def scenario():
+        config = settings()
+        config.db_backend = "sqlite"
+        config.sqlite_path = ":memory:"
+        with (
+            patch("app.database.get_settings", return_value=config),
+            patch("app.database.acreate_client", new_callable=AsyncMock) as mock_create,
+        ):
+            client = await database.get_async_supabase()
+            await database.close_async_supabase()
+        return client, mock_create
+
+    client, mock_create = run(scenario())
+    assert isinstance(client, AsyncSqliteClient)
+    mock_create.assert_not_awaited()
+    assert database._async_client is None
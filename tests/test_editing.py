@@ -0,0 +1,75 @@
+import pytest
+
+from app.editing import apply_ops
+from app.models import CaptionsEvent, CaptionsPatch, CaptionsWord
+
+
+def make_data():
+    return {"events": [
+        CaptionsEvent(Words=[CaptionsWord(text="Hello", start=0, end=500)]).model_dump(),
+        CaptionsEvent(Words=[CaptionsWord(text="world", start=500, end=1000)]).model_dump(),
+    ]}
+
+
+def ops(*items):
+    return CaptionsPatch(ops=list(items)).ops
+
+
+def texts(data):
+    return [" ".join(w["text"] for w in e["Words"]) for e in data["events"]]
+
+
+def test_replace_event():
+    data = make_data()
+    apply_ops(data, ops({"op": "replace_event", "index": 1, "event": {"Words": [{"text": "there", "start": 0, "end": 1}]}}))
+    assert texts(data) == ["Hello", "there"]
+
+
+def test_insert_event_at_end():
+    data = make_data()
+    apply_ops(data, ops({"op": "insert_event", "index": 2, "event": {}}))
+    assert len(data["events"]) == 3
+    assert data["events"][2]["Style"] == "Default"
+
+
+def test_delete_event():
+    data = make_data()
+    apply_ops(data, ops({"op": "delete_event", "index": 0}))
+    assert texts(data) == ["world"]
+
+
+def test_edit_word_only_changes_given_fields():
+    data = make_data()
+    apply_ops(data, ops({"op": "edit_word", "event": 0, "word": 0, "text": "Hi"}))
+    assert data["events"][0]["Words"][0] == {"text": "Hi", "start": 0, "end": 500}
+
+
+def test_ops_apply_in_order():
+    data = make_data()
+    apply_ops(data, ops(
+        {"op": "delete_event", "index": 0},
+        {"op": "edit_word", "event": 0, "word": 0, "end": 900},
+    ))
+    assert data["events"][0]["Words"][0] == {"text": "world", "start": 500, "end": 900}
+
+
+def test_returns_changed_events_in_order():
+    data = make_data()
+    changes = apply_ops(data, ops(
+        {"op": "insert_event", "index": 0, "event": {}},
+        {"op": "edit_word", "event": 1, "word": 0, "text": "Hi"},
+        {"op": "delete_event", "index": 2},
+    ))
+    assert changes == [("insert", 0, data["events"][0]), ("set", 1, data["events"][1]), ("delete", 2, None)]
+    assert changes[1][2]["Words"][0]["text"] == "Hi"
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "delete_event", "index": 2},
+    {"op": "replace_event", "index": -1, "event": {}},
+    {"op": "insert_event", "index": 3, "event": {}},
+    {"op": "edit_word", "event": 0, "word": 1, "text": "x"},
+])
+def test_out_of_range_raises(op):
+    with pytest.raises(IndexError):
+        apply_ops(make_data(), ops(op))
@@ -0,0 +1,149 @@
+import asyncio
+
+from app.events import JobEvents, format_sse
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(events, job_id, current, heartbeat=1):
+    queue = events.subscribe(job_id)
+    return [event async for event in events.follow(job_id, queue, current, heartbeat)]
+
+
+def test_latest_is_last_published_event():
+    events = JobEvents()
+    events.publish("job-1", {"status": "processing"})
+    events.publish("job-1", {"status": "done"})
+    assert events.latest("job-1") == {"status": "done"}
+    assert events.latest("job-2") is None
+
+
+def test_latest_is_bounded():
+    events = JobEvents(max_jobs=2)
+    for job_id in ("a", "b", "c"):
+        events.publish(job_id, {"status": "pending"})
+    assert events.latest("a") is None
+    assert events.latest("c") == {"status": "pending"}
+
+
+def test_publish_reaches_every_subscriber():
+    events = JobEvents()
+
+    async def scenario():
+        first, second = events.subscribe("job-1"), events.subscribe("job-1")
+        events.publish("job-1", {"status": "done"})
+        return first.get_nowait(), second.get_nowait()
+
+    assert run(scenario()) == ({"status": "done"}, {"status": "done"})
+
+
+def test_follow_yields_current_then_updates_until_terminal():
+    events = JobEvents()
+
+    async def scenario():
+        task = asyncio.create_task(collect(events, "job-1", {"status": "pending"}))
+        await asyncio.sleep(0)
+        events.publish("job-1", {"status": "processing", "stage": "rendering"})
+        events.publish("job-1", {"status": "done"})
+        events.publish("job-1", {"status": "ignored"})
+        return await task
+
+    assert run(scenario()) == [
+        {"status": "pending"},
+        {"status": "processing", "stage": "rendering"},
+        {"status": "done"},
+    ]
+    assert events.subscribers("job-1") == 0
+
+
+def test_follow_stops_at_terminal_current():
+    events = JobEvents()
+    assert run(collect(events, "job-1", {"status": "failed"})) == [{"status": "failed"}]
+    assert events.subscribers("job-1") == 0
+
+
+def test_follow_yields_none_on_heartbeat():
+    events = JobEvents()
+
+    async def scenario():
+        task = asyncio.create_task(collect(events, "job-1", {"status": "pending"}, heartbeat=0.01))
+        await asyncio.sleep(0.05)
+        events.publish("job-1", {"status": "done"})
+        return await task
+
+    result = run(scenario())
+    assert result[0] == {"status": "pending"} and result[-1] == {"status": "done"}
+    assert None in result
+
+
+def refresher(*rows):
+    rows = iter(rows)
+
+    async def refresh():
+        return next(rows)
+
+    return refresh
+
+
+def test_follow_refreshes_a_job_published_elsewhere_until_terminal():
+    events = JobEvents()
+
+    async def scenario():
+        queue = events.subscribe("job-1")
+        refresh = refresher({"status": "pending"}, {"status": "processing"}, {"status": "done"})
+        return [e async for e in events.follow("job-1", queue, {"status": "pending"}, 0.01, refresh)]
+
+    assert run(scenario()) == [{"status": "pending"}, None, {"status": "processing"}, {"status": "done"}]
+    assert events.subscribers("job-1") == 0
+
+
+def test_follow_ends_when_refreshed_job_is_gone():
+    events = JobEvents()
+
+    async def scenario():
+        queue = events.subscribe("job-1")
+        return [e async for e in events.follow("job-1", queue, {"status": "pending"}, 0.01, refresher(None))]
+
+    assert run(scenario()) == [{"status": "pending"}]
+
+
+def test_follow_skips_refresh_for_a_locally_published_job():
+    events = JobEvents()
+    events.publish("job-1", {"status": "processing"})
+
+    async def scenario():
+        task = asyncio.create_task(
+            collect_refreshing(events, "job-1", {"status": "processing"}, refresher())
+        )
+        await asyncio.sleep(0.05)
+        events.publish("job-1", {"status": "done"})
+        return await task
+
+    result = run(scenario())
+    assert None in result and result[-1] == {"status": "done"}
+
+
+async def collect_refreshing(events, job_id, current, refresh):
+    queue = events.subscribe(job_id)
+    return [event async for event in events.follow(job_id, queue, current, 0.01, refresh)]
+
+
+def test_follow_unsubscribes_when_cancelled():
+    events = JobEvents()
+
+    async def scenario():
+        task = asyncio.create_task(collect(events, "job-1", {"status": "pending"}))
+        await asyncio.sleep(0)
+        assert events.subscribers("job-1") == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    run(scenario())
+    assert events.subscribers("job-1") == 0
+
+
+def test_format_sse():
+    assert format_sse({"id": "job-1", "status": "done"}) == 'event: status\ndata: {"id":"job-1","status":"done"}\n\n'
+    assert format_sse(None) == ": keep-alive\n\n"
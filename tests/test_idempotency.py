@@ -0,0 +1,213 @@
+import asyncio
+import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.idempotency import REPLAYED_HEADER, Idempotency, request_fingerprint
+from app.repository import AsyncIdempotencyRepository
+from app.sqlite import AsyncSqliteClient
+
+FINGERPRINT = request_fingerprint("POST", "/captions/abc/burn")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def repo():
+    client = AsyncSqliteClient()
+    yield AsyncIdempotencyRepository(client)
+    client.close()
+
+
+def counting_handler(result=None, delay=0.0, error=None):
+    calls = []
+
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result if result is not None else {"id": f"job-{len(calls)}"}
+
+    return handler, calls
+
+
+def test_fingerprint_covers_path_and_body():
+    assert request_fingerprint("POST", "/a", b"{}") == request_fingerprint("POST", "/a", b"{}")
+    assert request_fingerprint("POST", "/a", b"{}") != request_fingerprint("POST", "/b", b"{}")
+    assert request_fingerprint("POST", "/a", b"{}") != request_fingerprint("POST", "/a", b"[]")
+
+
+def test_without_key_runs_handler(repo):
+    handler, calls = counting_handler()
+    assert run(Idempotency().run(repo, None, FINGERPRINT, 202, handler)) == {"id": "job-1"}
+    assert run(Idempotency().run(repo, None, FINGERPRINT, 202, handler)) == {"id": "job-2"}
+
+
+def test_rejects_oversized_key(repo):
+    handler, _ = counting_handler()
+    with pytest.raises(HTTPException) as exc:
+        run(Idempotency().run(repo, "k" * 256, FINGERPRINT, 202, handler))
+    assert exc.value.status_code == 400
+
+
+def test_repeat_replays_stored_response(repo):
+    handler, calls = counting_handler()
+    idempotency = Idempotency()
+
+    async def scenario():
+        first = await idempotency.run(repo, "key-1", FINGERPRINT, 202, handler)
+        second = await idempotency.run(repo, "key-1", FINGERPRINT, 202, handler)
+        return first, second
+
+    first, second = run(scenario())
+    assert len(calls) == 1
+    assert first.status_code == second.status_code == 202
+    assert first.body == second.body == b'{"id":"job-1"}'
+    assert REPLAYED_HEADER.lower() not in first.headers
+    assert second.headers[REPLAYED_HEADER] == "true"
+
+
+def test_replay_survives_restart(repo):
+    """A fresh Idempotency (e.g. another instance) replays from the database."""
+    handler, calls = counting_handler()
+
+    async def scenario():
+        await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+        return await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+
+    assert run(scenario()).headers[REPLAYED_HEADER] == "true"
+    assert len(calls) == 1
+
+
+def test_key_reused_for_different_request_is_rejected(repo):
+    handler, _ = counting_handler()
+
+    async def scenario():
+        await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+        await Idempotency().run(repo, "key-1", request_fingerprint("POST", "/captions/xyz/burn"), 202, handler)
+
+    with pytest.raises(HTTPException) as exc:
+        run(scenario())
+    assert exc.value.status_code == 422
+
+
+def test_simultaneous_duplicates_run_once(repo):
+    handler, calls = counting_handler(delay=0.05)
+    idempotency = Idempotency()
+
+    async def scenario():
+        return await asyncio.gather(*(idempotency.run(repo, "key-1", FINGERPRINT, 202, handler) for _ in range(10)))
+
+    responses = run(scenario())
+    assert len(calls) == 1
+    assert {response.body for response in responses} == {b'{"id":"job-1"}'}
+    assert sum(REPLAYED_HEADER.lower() in response.headers for response in responses) == 9
+
+
+def test_duplicate_on_another_instance_gets_409_while_in_progress(repo):
+    handler, calls = counting_handler(delay=0.05)
+
+    async def scenario():
+        first = asyncio.create_task(Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler))
+        await asyncio.sleep(0.01)
+        try:
+            await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+        finally:
+            await first
+
+    with pytest.raises(HTTPException) as exc:
+        run(scenario())
+    assert exc.value.status_code == 409
+    assert exc.value.headers == {"Retry-After": "1"}
+    assert len(calls) == 1
+
+
+def test_failure_releases_key_and_reaches_waiters(repo):
+    handler, calls = counting_handler(delay=0.05, error=HTTPException(status_code=422, detail="bad video"))
+    idempotency = Idempotency()
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(idempotency.run(repo, "key-1", FINGERPRINT, 201, handler) for _ in range(3)), return_exceptions=True
+        )
+        return results, await repo.get("key-1")
+
+    results, record = run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(r, HTTPException) and r.status_code == 422 for r in results)
+    assert record is None
+
+
+def test_expired_key_runs_again(repo):
+    handler, calls = counting_handler()
+
+    async def scenario():
+        await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+        await asyncio.sleep(0.01)
+        return await Idempotency(ttl_seconds=0).run(repo, "key-1", FINGERPRINT, 202, handler)
+
+    response = run(scenario())
+    assert len(calls) == 2
+    assert response.body == b'{"id":"job-2"}'
+
+
+def test_crashed_request_is_taken_over_once_its_lease_runs_out(repo):
+    handler, calls = counting_handler()
+    lapsed = (datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)).isoformat()
+
+    async def scenario():
+        await repo.claim("key-1", FINGERPRINT, lapsed)  # claimed, then the instance died
+        response = await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+        return response, await repo.get("key-1")
+
+    response, record = run(scenario())
+    assert len(calls) == 1
+    assert REPLAYED_HEADER.lower() not in response.headers
+    assert record["status"] == "done"
+
+
+def test_claim_without_lease_is_leased_from_creation(repo):
+    handler, calls = counting_handler()
+
+    async def scenario():
+        await repo.claim("key-1", FINGERPRINT)
+        with pytest.raises(HTTPException):
+            await Idempotency().run(repo, "key-1", FINGERPRINT, 202, handler)
+        return await Idempotency(lease_seconds=0).run(repo, "key-1", FINGERPRINT, 202, handler)
+
+    assert run(scenario()).body == b'{"id":"job-1"}'
+    assert len(calls) == 1
+
+
+def test_running_request_renews_its_lease(repo):
+    handler, calls = counting_handler(delay=0.25)
+
+    async def scenario():
+        first = asyncio.create_task(Idempotency(lease_seconds=0.06).run(repo, "key-1", FINGERPRINT, 202, handler))
+        await asyncio.sleep(0.15)
+        try:
+            await Idempotency(lease_seconds=0.06).run(repo, "key-1", FINGERPRINT, 202, handler)
+        finally:
+            await first
+
+    with pytest.raises(HTTPException) as exc:
+        run(scenario())
+    assert exc.value.status_code == 409
+    assert len(calls) == 1
+
+
+def test_repository_claim_is_exclusive(repo):
+    async def scenario():
+        first = await repo.claim("key-1", FINGERPRINT)
+        second = await repo.claim("key-1", FINGERPRINT)
+        record = await repo.get("key-1")
+        return first, second, record
+
+    first, second, record = run(scenario())
+    assert (first, second) == (True, False)
+    assert record["status"] == "pending"
+    assert datetime.datetime.fromisoformat(record["created_at"]).tzinfo is not None
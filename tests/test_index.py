@@ -0,0 +1,95 @@
+import json
+
+from app.index import EventIndex, _cache, cached_event_index, get_event_index, render_events
+
+
+def event(*spans):
+    return {"Words": [{"text": "w", "start": start, "end": end} for start, end in spans]}
+
+
+EVENTS = [
+    event((0, 500), (500, 1000)),
+    event((1000, 2000)),
+    event((2500, 3000)),
+    event(),
+    event((4000, 5000)),
+]
+
+
+def positions(results):
+    return [index for index, _ in results]
+
+
+# --- EventIndex.query ---
+
+def test_query_window_returns_overlapping_events():
+    assert positions(EventIndex(EVENTS).query(900, 2600)) == [0, 1, 2]
+
+
+def test_query_boundaries_are_half_open():
+    index = EventIndex(EVENTS)
+    assert positions(index.query(1000, 2000)) == [1]
+    assert positions(index.query(2000, 2500)) == []
+
+
+def test_query_without_end_returns_rest():
+    assert positions(EventIndex(EVENTS).query(2800)) == [2, 4]
+
+
+def test_query_skips_events_without_words():
+    assert len(EventIndex(EVENTS)) == 4
+
+
+def test_query_handles_unsorted_and_overlapping_events():
+    events = [event((5000, 6000)), event((0, 10000)), event((2000, 3000))]
+    assert positions(EventIndex(events).query(4000, 4500)) == [1]
+    assert positions(EventIndex(events).query(2500, 5500)) == [1, 2, 0]
+
+
+def test_query_returns_serialised_events():
+    [(index, found)] = EventIndex(EVENTS).query(4500, 4600)
+    assert index == 4
+    assert json.loads(found) == EVENTS[4]
+
+
+def test_render_events_adds_index_to_each_event():
+    rendered = render_events(EventIndex(EVENTS).query(900, 2600))
+    assert json.loads(rendered) == [{"index": i, **EVENTS[i]} for i in (0, 1, 2)]
+    assert render_events([]) == b"[]"
+
+
+def test_index_size_counts_serialised_events():
+    index = EventIndex(EVENTS)
+    assert index.nbytes >= sum(len(json.dumps(e, separators=(",", ":"))) for e in EVENTS if e["Words"])
+
+
+# --- get_event_index ---
+
+def test_get_event_index_reuses_same_version():
+    record = {"id": "abc", "data": {"events": EVENTS}}
+    assert get_event_index(record) is get_event_index({"id": "abc", "data": {"events": list(EVENTS)}})
+
+
+def test_get_event_index_rebuilds_on_new_version():
+    record = {"id": "abc", "data": {"events": EVENTS}}
+    changed = {"id": "abc", "data": {"events": EVENTS[:2]}}
+    assert get_event_index(record) is not get_event_index(changed)
+    assert len(get_event_index(changed)) == 2
+
+
+def test_cached_event_index_finds_index_by_version():
+    record = {"id": "cached", "version": 3, "data": {"events": EVENTS}}
+    assert cached_event_index("cached", "3") is None
+    index = get_event_index(record)
+    assert cached_event_index("cached", "3") is index
+    assert cached_event_index("cached", "4") is None
+
+
+def test_event_index_cache_is_bounded_by_bytes(monkeypatch):
+    size = EventIndex(EVENTS).nbytes
+    monkeypatch.setattr(_cache, "max_bytes", 2 * size)
+    for n in range(3):
+        get_event_index({"id": f"bounded-{n}", "version": 1, "data": {"events": EVENTS}})
+    assert _cache.bytes <= 2 * size
+    assert cached_event_index("bounded-0", "1") is None
+    assert cached_event_index("bounded-2", "1") is not None
@@ -1,9 +1,23 @@
+import asyncio
+import copy
+import threading
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 import pytest
 from fastapi.testclient import TestClient
-from app.database import get_supabase
-from app.main import app, get_repo, get_video_repo, get_burn_repo
+from starlette.websockets import WebSocketDisconnect
+from app.database import get_async_supabase
+from app.main import app, get_repo, get_burn_repo, get_idempotency_repo
+from app.idempotency import Idempotency, get_idempotency
+from app.config import get_settings
+from app.profiling import ProfileStore, get_profile_store
+from app.events import JobEvents, get_job_events
+from app.cache import get_captions_cache
+from app.index import get_event_index
+from app.storage import LocalStorage, get_storage
 from app.models import Captions
+from app.repository import AsyncIdempotencyRepository, caption_version
+from app.sqlite import AsyncSqliteClient
 
 RECORD = {"id": "abc", "title": "Test", "data": {}, "video_id": None}
 VIDEO_RECORD = {"id": "vid-1", "url": "https://example.com/video.mp4"}
@@ -14,22 +28,23 @@ def client():
     return TestClient(app)
 
 
-def override(repo):
+def override(repo, idempotency_repo=None):
     app.dependency_overrides[get_repo] = lambda: repo
+    idempotency = Idempotency()
+    app.dependency_overrides[get_idempotency] = lambda: idempotency
+    app.dependency_overrides[get_idempotency_repo] = lambda: idempotency_repo or AsyncMock()
 
 
-def override_video_repo(video_repo):
-    app.dependency_overrides[get_video_repo] = lambda: video_repo
-
-
-def override_burn(burn_repo):
+def override_burn(burn_repo, storage=None):
     app.dependency_overrides[get_burn_repo] = lambda: burn_repo
-    # get_supabase is a direct dependency of burn_captions (passed to burn_video)
-    app.dependency_overrides[get_supabase] = lambda: MagicMock()
+    app.dependency_overrides[get_storage] = lambda: storage or MagicMock()
+    # get_async_supabase and get_captions_cache are direct dependencies of burn_captions (passed to burn_video)
+    app.dependency_overrides[get_async_supabase] = lambda: MagicMock()
+    app.dependency_overrides[get_captions_cache] = lambda: MagicMock()
 
 
 def mock_repo(**kwargs):
-    repo = MagicMock()
+    repo = AsyncMock()
     for method, value in kwargs.items():
         getattr(repo, method).return_value = value
     return repo
@@ -41,22 +56,87 @@ def test_health(client):
     assert client.get("/health").status_code == 200
 
 
+# --- /metrics ---
+
+def test_metrics(client):
+    client.get("/health")
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'ezcaptions_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in res.text
+    assert "# TYPE ezcaptions_burn_encodes_active gauge" in res.text
+
+
+# --- GET /cache/stats ---
+
+def test_cache_stats(client):
+    cache = MagicMock()
+    cache.stats.return_value = {"hits": 3, "misses": 1}
+    app.dependency_overrides[get_captions_cache] = lambda: cache
+    assert client.get("/cache/stats").json() == {"hits": 3, "misses": 1}
+
+
+def test_cache_stats_when_cache_is_off(client):
+    app.dependency_overrides[get_captions_cache] = lambda: None
+    assert client.get("/cache/stats").json() == {"enabled": False}
+
+
+# --- GET /search ---
+
+def test_search(client):
+    repo = mock_repo(search=[{"caption_id": "abc", "event_index": 0, "start_ms": 0, "text": "Hello"}])
+    override(repo)
+    res = client.get("/search", params={"q": "hello", "limit": 5})
+    assert res.status_code == 200
+    assert res.json()[0]["caption_id"] == "abc"
+    repo.search.assert_awaited_once_with("hello", 5)
+
+
+def test_search_requires_query(client):
+    override(mock_repo())
+    assert client.get("/search").status_code == 422
+
+
 # --- GET /captions ---
 
 def test_list_captions(client):
-    override(mock_repo(list=[RECORD]))
+    override(mock_repo(list=[{**RECORD, "version": 3}]))
     res = client.get("/captions")
     assert res.status_code == 200
-    assert res.json() == [RECORD]
+    assert res.json() == [{**RECORD, "version": "3"}]
+
+
+def test_list_captions_forwards_query(client):
+    repo = mock_repo(list=[])
+    override(repo)
+    client.get("/captions", params={"limit": 10, "cursor": "abc", "video_id": "vid-1", "fields": "data"})
+    repo.list.assert_called_once_with(limit=10, after="abc", video_id="vid-1", include_data=True)
+
+
+def test_list_captions_defaults_to_summaries(client):
+    repo = mock_repo(list=[])
+    override(repo)
+    client.get("/captions")
+    assert repo.list.call_args.kwargs["include_data"] is False
+
+
+def test_list_captions_next_cursor_on_full_page(client):
+    override(mock_repo(list=[{"id": "a", "version": 1}, {"id": "b", "version": 1}]))
+    assert client.get("/captions", params={"limit": 2}).headers["x-next-cursor"] == "b"
+
+
+def test_list_captions_no_cursor_on_last_page(client):
+    override(mock_repo(list=[{"id": "a", "version": 1}]))
+    assert "x-next-cursor" not in client.get("/captions", params={"limit": 2}).headers
 
 
 # --- POST /captions ---
 
 def test_create_captions(client):
-    override(mock_repo(create=RECORD))
+    override(mock_repo(create={**RECORD, "version": 1}))
     res = client.post("/captions", json={})
     assert res.status_code == 201
-    assert res.json() == RECORD
+    assert res.json() == {**RECORD, "version": "1"}
 
 
 # --- GET /captions/{id} ---
@@ -71,20 +151,283 @@ def test_get_captions_not_found(client):
     assert client.get("/captions/missing").status_code == 404
 
 
+VERSIONED_RECORD = {**RECORD, "version": 7}
+
+
+def test_get_captions_sets_etag_from_version_column(client):
+    override(mock_repo(get=VERSIONED_RECORD))
+    res = client.get("/captions/abc")
+    assert res.headers["etag"] == '"7"'
+    assert res.headers["cache-control"] == "public, max-age=0, must-revalidate"
+    assert res.json()["version"] == "7"
+
+
+def test_get_captions_etag_falls_back_to_document_hash(client):
+    override(mock_repo(get=RECORD))
+    res = client.get("/captions/abc")
+    assert res.headers["etag"] == f'"{caption_version(RECORD)}"'
+
+
+def test_get_captions_if_none_match_returns_304(client):
+    override(mock_repo(get=VERSIONED_RECORD))
+    res = client.get("/captions/abc", headers={"If-None-Match": 'W/"6", W/"7"'})
+    assert res.status_code == 304
+    assert res.headers["etag"] == '"7"'
+    assert res.content == b""
+
+
+def test_get_captions_if_none_match_stale_returns_body(client):
+    override(mock_repo(get=VERSIONED_RECORD))
+    res = client.get("/captions/abc", headers={"If-None-Match": '"6"'})
+    assert res.status_code == 200
+    assert res.json()["id"] == "abc"
+
+
+# --- POST /captions/import ---
+
+SRT_FILE = "1\n00:00:00,000 --> 00:00:01,000\nHello world\n\n"
+VTT_FILE = "WEBVTT\n\n00:01.000 --> 00:02.000\nBye\n"
+
+
+def test_import_captions(client):
+    repo = mock_repo(create_many=[{"id": "c1", "title": "a", "data": {}}, {"id": "c2", "title": "b", "data": {}}])
+    override(repo)
+    res = client.post("/captions/import", files=[
+        ("files", ("a.srt", SRT_FILE, "application/x-subrip")),
+        ("files", ("b.vtt", VTT_FILE, "text/vtt")),
+    ])
+    assert res.status_code == 201
+    assert res.json() == [{"id": "c1", "title": "a"}, {"id": "c2", "title": "b"}]
+    batch = repo.create_many.call_args_list[0].args[0]
+    assert [c.info.Title for c in batch] == ["a", "b"]
+    assert batch[0].full_text == "Hello world"
+
+
+def test_import_captions_batches_inserts(client):
+    repo = AsyncMock()
+    repo.create_many.side_effect = lambda batch: [{"id": "x", "title": c.info.Title} for c in batch]
+    override(repo)
+    with patch("app.main.IMPORT_BATCH_SIZE", 2):
+        res = client.post("/captions/import", files=[
+            ("files", (f"{i}.srt", SRT_FILE, "application/x-subrip")) for i in range(5)
+        ])
+    assert len(res.json()) == 5
+    assert [len(c.args[0]) for c in repo.create_many.call_args_list] == [2, 2, 1]
+
+
+def test_import_captions_inserts_nothing_if_a_later_file_is_invalid(client):
+    repo = AsyncMock()
+    override(repo)
+    with patch("app.main.IMPORT_BATCH_SIZE", 2):
+        res = client.post("/captions/import", files=[
+            *[("files", (f"{i}.srt", SRT_FILE, "application/x-subrip")) for i in range(3)],
+            ("files", ("bad.txt", "hi", "text/plain")),
+        ])
+    assert res.status_code == 415
+    repo.create_many.assert_not_awaited()
+
+
+def test_import_captions_truncated_ass_dialogue(client):
+    override(mock_repo())
+    bad = "[Events]\nFormat: Layer, Start, End, Style, Text\nDialogue: 0\n"
+    res = client.post("/captions/import", files=[("files", ("a.ass", bad, "text/x-ssa"))])
+    assert res.status_code == 422
+
+
+def test_import_captions_unsupported_format(client):
+    override(mock_repo())
+    res = client.post("/captions/import", files=[("files", ("a.txt", "hi", "text/plain"))])
+    assert res.status_code == 415
+
+
+def test_import_captions_invalid_file(client):
+    override(mock_repo())
+    bad = "1\nnot a time --> either\nHello\n"
+    res = client.post("/captions/import", files=[("files", ("a.srt", bad, "application/x-subrip"))])
+    assert res.status_code == 422
+
+
+# --- GET /captions/{id}.{format} ---
+
+EXPORT_RECORD = {
+    **RECORD,
+    "data": {"events": [{"Words": [{"text": "Hello", "start": 0, "end": 1500}]}]},
+}
+
+
+def test_export_srt(client):
+    override(mock_repo(get=EXPORT_RECORD))
+    res = client.get("/captions/abc.srt")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-subrip")
+    assert res.text == "1\n00:00:00,000 --> 00:00:01,500\nHello\n\n"
+
+
+def test_export_profiled_with_header(client, tmp_path):
+    store = ProfileStore(str(tmp_path))
+    settings = MagicMock(profiling_enabled=True)
+    override(mock_repo(get=EXPORT_RECORD))
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_profile_store] = lambda: store
+    with (
+        patch("app.profiling.get_settings", return_value=settings),
+        patch("app.profiling.get_profile_store", return_value=store),
+    ):
+        res = client.get("/captions/abc.srt", headers={"X-Profile": "1"})
+        profile_id = res.headers["x-profile-id"]
+        summary = client.get(f"/profiles/{profile_id}").json()
+        stats = client.get(f"/profiles/{profile_id}.prof")
+    assert summary["name"] == "GET /captions/abc.srt"
+    assert "Captions.model_validate" in [s["name"] for s in summary["spans"]]
+    assert stats.status_code == 200
+    assert stats.headers["content-type"] == "application/octet-stream"
+
+
+def test_profiles_not_served_when_disabled(client, tmp_path):
+    app.dependency_overrides[get_settings] = lambda: MagicMock(profiling_enabled=False)
+    app.dependency_overrides[get_profile_store] = lambda: ProfileStore(str(tmp_path))
+    assert client.get(f"/profiles/{'0' * 32}").status_code == 404
+
+
+def test_export_vtt(client):
+    override(mock_repo(get=EXPORT_RECORD))
+    res = client.get("/captions/abc.vtt")
+    assert res.status_code == 200
+    assert res.text.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\nHello")
+
+
+def test_export_ass(client):
+    override(mock_repo(get=EXPORT_RECORD))
+    res = client.get("/captions/abc.ass")
+    assert res.status_code == 200
+    assert res.text == Captions.model_validate(EXPORT_RECORD["data"]).to_ass()
+
+
+def test_export_sets_strong_etag(client):
+    override(mock_repo(get=EXPORT_RECORD))
+    srt = client.get("/captions/abc.srt").headers["etag"]
+    vtt = client.get("/captions/abc.vtt").headers["etag"]
+    assert srt.startswith('"') and not srt.startswith("W/")
+    assert srt != vtt
+
+
+def test_export_if_none_match_returns_304(client):
+    override(mock_repo(get=EXPORT_RECORD))
+    etag = client.get("/captions/abc.srt").headers["etag"]
+    res = client.get("/captions/abc.srt", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["etag"] == etag
+
+
+def test_export_unknown_format(client):
+    override(mock_repo(get=EXPORT_RECORD))
+    assert client.get("/captions/abc.txt").status_code == 422
+
+
+def test_export_not_found(client):
+    override(mock_repo(get=None))
+    assert client.get("/captions/missing.srt").status_code == 404
+
+
 # --- GET /captions/{id}/text ---
 
+TEXT_RECORD = {"full_text": "Hello world", "version": 3}
+
+
 def test_get_text_found(client):
-    override(mock_repo(get_text="Hello world"))
+    override(mock_repo(get_text_record=TEXT_RECORD))
     res = client.get("/captions/abc/text")
     assert res.status_code == 200
     assert res.json() == "Hello world"
+    assert res.headers["etag"] == '"3-text"'
+
+
+def test_get_text_not_modified(client):
+    override(mock_repo(get_text_record=TEXT_RECORD))
+    res = client.get("/captions/abc/text", headers={"If-None-Match": '"3-text"'})
+    assert res.status_code == 304
+    assert res.content == b""
 
 
 def test_get_text_not_found(client):
-    override(mock_repo(get_text=None))
+    override(mock_repo(get_text_record=None))
     assert client.get("/captions/missing/text").status_code == 404
 
 
+# --- GET /captions/{id}/events ---
+
+EVENTS_RECORD = {
+    **RECORD,
+    "data": {"events": [
+        {"Words": [{"text": "a", "start": 0, "end": 1000}]},
+        {"Words": [{"text": "b", "start": 1000, "end": 2000}]},
+        {"Words": [{"text": "c", "start": 2000, "end": 3000}]},
+    ]},
+}
+
+
+def test_get_events_in_range(client):
+    override(mock_repo(get_version_record={"version": None}, get=EVENTS_RECORD))
+    res = client.get("/captions/abc/events", params={"from_ms": 1500, "to_ms": 2500})
+    assert res.status_code == 200
+    assert [(e["index"], e["Words"][0]["text"]) for e in res.json()] == [(1, "b"), (2, "c")]
+
+
+def test_get_events_defaults_to_all(client):
+    override(mock_repo(get_version_record={"version": None}, get=EVENTS_RECORD))
+    assert len(client.get("/captions/abc/events").json()) == 3
+
+
+def test_get_events_rejects_inverted_range(client):
+    override(mock_repo(get_version_record={"version": None}, get=EVENTS_RECORD))
+    res = client.get("/captions/abc/events", params={"from_ms": 2000, "to_ms": 1000})
+    assert res.status_code == 422
+
+
+def test_get_events_not_found(client):
+    override(mock_repo(get_version_record=None))
+    assert client.get("/captions/missing/events").status_code == 404
+
+
+def test_get_events_reuses_index_without_fetching_document(client):
+    repo = mock_repo(get_version_record={"version": 41}, get={**EVENTS_RECORD, "version": 41})
+    override(repo)
+    first = client.get("/captions/abc/events", params={"from_ms": 1500}).json()
+    second = client.get("/captions/abc/events", params={"from_ms": 1500}).json()
+    assert first == second and len(first) == 2
+    repo.get.assert_awaited_once_with("abc")
+
+
+def test_get_events_builds_index_off_the_event_loop(client):
+    threads = {}
+    repo = mock_repo(get_version_record={"version": None})
+
+    async def get(id):
+        threads["loop"] = threading.get_ident()
+        return {**EVENTS_RECORD, "id": "off-loop"}
+
+    repo.get.side_effect = get
+    override(repo)
+
+    def build(record):
+        threads["build"] = threading.get_ident()
+        return get_event_index(record)
+
+    with patch("app.main.get_event_index", side_effect=build):
+        assert len(client.get("/captions/off-loop/events").json()) == 3
+    assert threads["build"] != threads["loop"]
+
+
+def test_get_events_refetches_document_for_new_version(client):
+    repo = mock_repo(get={**EVENTS_RECORD, "version": 51})
+    repo.get_version_record.side_effect = [{"version": 51}, {"version": 52}]
+    override(repo)
+    client.get("/captions/abc/events")
+    repo.get.return_value = {**EVENTS_RECORD, "data": {"events": EVENTS_RECORD["data"]["events"][:1]}, "version": 52}
+    assert len(client.get("/captions/abc/events").json()) == 1
+    assert repo.get.await_count == 2
+
+
 # --- PUT /captions/{id} ---
 
 def test_update_captions_found(client):
@@ -97,6 +440,214 @@ def test_update_captions_not_found(client):
     assert client.put("/captions/missing", json={}).status_code == 404
 
 
+def test_update_captions_returns_new_etag(client):
+    override(mock_repo(update={**RECORD, "version": 8}))
+    res = client.put("/captions/abc", json={})
+    assert res.headers["etag"] == '"8"'
+    assert res.json()["version"] == "8"
+
+
+def test_update_captions_if_match_guards_write(client):
+    repo = mock_repo(get=VERSIONED_RECORD, update={**RECORD, "version": 8})
+    override(repo)
+    res = client.put("/captions/abc", json={}, headers={"If-Match": '"7"'})
+    assert res.status_code == 200
+    assert repo.update.call_args.kwargs["version"] == 7
+
+
+def test_update_captions_if_match_stale_returns_412(client):
+    repo = mock_repo(get=VERSIONED_RECORD)
+    override(repo)
+    res = client.put("/captions/abc", json={}, headers={"If-Match": '"6"'})
+    assert res.status_code == 412
+    repo.update.assert_not_called()
+
+
+def test_update_captions_if_match_rejects_weak_tag(client):
+    override(mock_repo(get=VERSIONED_RECORD))
+    assert client.put("/captions/abc", json={}, headers={"If-Match": 'W/"7"'}).status_code == 412
+
+
+def test_update_captions_if_match_lost_race_returns_412(client):
+    override(mock_repo(get=VERSIONED_RECORD, update=None))
+    assert client.put("/captions/abc", json={}, headers={"If-Match": '"7"'}).status_code == 412
+
+
+def test_update_captions_if_match_not_found(client):
+    override(mock_repo(get=None))
+    assert client.put("/captions/missing", json={}, headers={"If-Match": '"7"'}).status_code == 404
+
+
+# --- PATCH /captions/{id} ---
+
+PATCH_RECORD = {
+    **RECORD,
+    "data": {"events": [{"Words": [{"text": "Hello", "start": 0, "end": 500}]}]},
+}
+
+
+def patch_record():
+    return copy.deepcopy(PATCH_RECORD)
+
+
+def test_patch_captions_applies_ops(client):
+    repo = mock_repo(get=patch_record())
+    repo.patch_events.side_effect = lambda id, data, changes, version=None: {**RECORD, "data": data}
+    override(repo)
+    res = client.patch("/captions/abc", json={"ops": [{"op": "edit_word", "event": 0, "word": 0, "text": "Hi"}]})
+    assert res.status_code == 200
+    assert res.json()["id"] == "abc"
+    written = repo.patch_events.call_args.args[1]
+    assert written["events"][0]["Words"][0]["text"] == "Hi"
+    assert repo.patch_events.call_args.args[2] == [("set", 0, written["events"][0])]
+    repo.update_data.assert_not_called()
+
+
+def test_patch_captions_returns_new_version(client):
+    repo = mock_repo(get=patch_record())
+    repo.patch_events.side_effect = lambda id, data, changes, version=None: {**RECORD, "data": data}
+    override(repo)
+    before = client.get("/captions/abc").json()["version"]
+    res = client.patch("/captions/abc", json={"version": before, "ops": [{"op": "delete_event", "index": 0}]})
+    assert res.status_code == 200
+    assert res.json()["version"] != before
+
+
+def test_patch_captions_version_conflict(client):
+    repo = mock_repo(get=patch_record())
+    override(repo)
+    res = client.patch("/captions/abc", json={"version": "stale", "ops": [{"op": "delete_event", "index": 0}]})
+    assert res.status_code == 409
+    repo.patch_events.assert_not_called()
+
+
+def test_patch_captions_concurrent_write_returns_409(client):
+    repo = mock_repo(get={**patch_record(), "version": 4}, patch_events=None)
+    override(repo)
+    res = client.patch("/captions/abc", json={"version": "4", "ops": [{"op": "delete_event", "index": 0}]})
+    assert res.status_code == 409
+    assert repo.patch_events.call_args.kwargs["version"] == 4
+
+
+def test_patch_captions_if_match_guards_write_and_returns_etag(client):
+    repo = mock_repo(get={**patch_record(), "version": 7}, patch_events={**RECORD, "version": 8})
+    override(repo)
+    res = client.patch("/captions/abc", json={"ops": [{"op": "delete_event", "index": 0}]}, headers={"If-Match": '"7"'})
+    assert res.status_code == 200
+    assert res.headers["etag"] == '"8"'
+    assert repo.patch_events.call_args.kwargs["version"] == 7
+
+
+def test_patch_captions_if_match_stale_returns_412(client):
+    repo = mock_repo(get={**patch_record(), "version": 7})
+    override(repo)
+    res = client.patch("/captions/abc", json={"ops": [{"op": "delete_event", "index": 0}]}, headers={"If-Match": '"6"'})
+    assert res.status_code == 412
+    repo.patch_events.assert_not_called()
+
+
+def test_patch_captions_if_match_lost_race_returns_412(client):
+    override(mock_repo(get={**patch_record(), "version": 7}, patch_events=None))
+    res = client.patch("/captions/abc", json={"ops": [{"op": "delete_event", "index": 0}]}, headers={"If-Match": '"7"'})
+    assert res.status_code == 412
+
+
+def test_patch_captions_bad_index(client):
+    override(mock_repo(get=patch_record()))
+    res = client.patch("/captions/abc", json={"ops": [{"op": "delete_event", "index": 5}]})
+    assert res.status_code == 422
+
+
+def test_patch_captions_unknown_op(client):
+    override(mock_repo(get=patch_record()))
+    res = client.patch("/captions/abc", json={"ops": [{"op": "explode"}]})
+    assert res.status_code == 422
+
+
+def test_patch_captions_not_found(client):
+    override(mock_repo(get=None))
+    res = client.patch("/captions/missing", json={"ops": []})
+    assert res.status_code == 404
+
+
+# --- POST /captions/{id}/retime ---
+
+def test_retime_captions(client):
+    repo = mock_repo(get=patch_record())
+    repo.update_data.side_effect = lambda id, data, version=None: {**RECORD, "data": data}
+    override(repo)
+    res = client.post("/captions/abc/retime", json={"offset_ms": 1000})
+    assert res.status_code == 200
+    assert res.json()["words"] == 1
+    assert repo.update_data.call_args.args[1]["events"][0]["Words"][0] == {"text": "Hello", "start": 1000, "end": 1500}
+
+
+def test_retime_captions_version_conflict(client):
+    repo = mock_repo(get=patch_record())
+    override(repo)
+    res = client.post("/captions/abc/retime", json={"offset_ms": 1000, "version": "stale"})
+    assert res.status_code == 409
+    repo.update_data.assert_not_called()
+
+
+def test_retime_captions_if_match(client):
+    repo = mock_repo(get={**patch_record(), "version": 7}, update_data={**RECORD, "version": 8})
+    override(repo)
+    assert client.post("/captions/abc/retime", json={}, headers={"If-Match": '"6"'}).status_code == 412
+    repo.update_data.assert_not_called()
+    res = client.post("/captions/abc/retime", json={}, headers={"If-Match": '"7"'})
+    assert res.status_code == 200
+    assert res.headers["etag"] == '"8"'
+
+
+def test_retime_captions_invalid_request(client):
+    override(mock_repo(get=patch_record()))
+    assert client.post("/captions/abc/retime", json={"scale": -1}).status_code == 422
+
+
+def test_retime_captions_not_found(client):
+    override(mock_repo(get=None))
+    assert client.post("/captions/missing/retime", json={}).status_code == 404
+
+
+# --- POST /captions/{id}/resegment ---
+
+def test_resegment_captions(client):
+    record = {**RECORD, "data": {"events": [{"Words": [
+        {"text": "One.", "start": 0, "end": 500},
+        {"text": "Two", "start": 500, "end": 1000},
+    ]}]}}
+    repo = mock_repo(get=record)
+    repo.update_data.side_effect = lambda id, data, version=None: {**RECORD, "data": data}
+    override(repo)
+    res = client.post("/captions/abc/resegment", json={})
+    assert res.status_code == 200
+    assert res.json()["events"] == 2
+    assert len(repo.update_data.call_args.args[1]["events"]) == 2
+
+
+def test_resegment_captions_version_conflict(client):
+    repo = mock_repo(get=patch_record())
+    override(repo)
+    assert client.post("/captions/abc/resegment", json={"version": "stale"}).status_code == 409
+    repo.update_data.assert_not_called()
+
+
+def test_resegment_captions_if_match(client):
+    repo = mock_repo(get={**patch_record(), "version": 7}, update_data={**RECORD, "version": 8})
+    override(repo)
+    assert client.post("/captions/abc/resegment", json={}, headers={"If-Match": '"6"'}).status_code == 412
+    repo.update_data.assert_not_called()
+    res = client.post("/captions/abc/resegment", json={}, headers={"If-Match": '"7"'})
+    assert res.status_code == 200
+    assert res.headers["etag"] == '"8"'
+
+
+def test_resegment_captions_not_found(client):
+    override(mock_repo(get=None))
+    assert client.post("/captions/missing/resegment", json={}).status_code == 404
+
+
 # --- DELETE /captions/{id} ---
 
 def test_delete_captions(client):
@@ -104,11 +655,34 @@ def test_delete_captions(client):
     assert client.delete("/captions/abc").status_code == 204
 
 
+def test_delete_captions_if_match(client):
+    repo = mock_repo(get=VERSIONED_RECORD, delete=True)
+    override(repo)
+    assert client.delete("/captions/abc", headers={"If-Match": '"7"'}).status_code == 204
+    repo.delete.assert_awaited_once_with("abc", version=7)
+
+
+def test_delete_captions_if_match_stale_returns_412(client):
+    repo = mock_repo(get=VERSIONED_RECORD)
+    override(repo)
+    assert client.delete("/captions/abc", headers={"If-Match": '"6"'}).status_code == 412
+    repo.delete.assert_not_called()
+
+
+def test_delete_captions_if_match_lost_race_returns_412(client):
+    override(mock_repo(get=VERSIONED_RECORD, delete=False))
+    assert client.delete("/captions/abc", headers={"If-Match": '"7"'}).status_code == 412
+
+
+def test_delete_captions_if_match_any(client):
+    override(mock_repo(get=VERSIONED_RECORD, delete=True))
+    assert client.delete("/captions/abc", headers={"If-Match": "*"}).status_code == 204
+
+
 # --- POST /captions/from-video ---
 
 def test_transcribe_video(client):
-    override(mock_repo(create=RECORD))
-    override_video_repo(mock_repo(create=VIDEO_RECORD))
+    override(mock_repo(create_with_video=RECORD))
     with patch("app.main.transcribe", return_value=Captions()):
         res = client.post("/captions/from-video", json={"url": "https://example.com/video.mp4"})
     assert res.status_code == 201
@@ -116,8 +690,7 @@ def test_transcribe_video(client):
 
 
 def test_transcribe_video_forwards_all_params(client):
-    override(mock_repo(create=RECORD))
-    override_video_repo(mock_repo(create=VIDEO_RECORD))
+    override(mock_repo(create_with_video=RECORD))
     with patch("app.main.transcribe", return_value=Captions()) as mock_t:
         client.post("/captions/from-video", json={
             "url": "https://example.com/video.mp4",
@@ -129,51 +702,105 @@ def test_transcribe_video_forwards_all_params(client):
 
 
 def test_transcribe_video_defaults(client):
-    override(mock_repo(create=RECORD))
-    override_video_repo(mock_repo(create=VIDEO_RECORD))
+    override(mock_repo(create_with_video=RECORD))
     with patch("app.main.transcribe", return_value=Captions()) as mock_t:
         client.post("/captions/from-video", json={"url": "https://example.com/video.mp4"})
     mock_t.assert_called_once_with("https://example.com/video.mp4", "Default Title", None, "nano")
 
 
-def test_transcribe_video_creates_video_record(client):
-    captions_repo = mock_repo(create=RECORD)
-    video_repo = mock_repo(create=VIDEO_RECORD)
+def test_transcribe_video_creates_video_and_captions_together(client):
+    captions_repo = mock_repo(create_with_video=RECORD)
     override(captions_repo)
-    override_video_repo(video_repo)
     with patch("app.main.transcribe", return_value=Captions()):
-        client.post("/captions/from-video", json={"url": "https://example.com/video.mp4"})
-    video_repo.create.assert_called_once_with("https://example.com/video.mp4")
-
-
-def test_transcribe_video_links_video_id_to_captions(client):
-    captions_repo = mock_repo(create=RECORD)
-    override(captions_repo)
-    override_video_repo(mock_repo(create=VIDEO_RECORD))
-    with patch("app.main.transcribe", return_value=Captions()):
-        client.post("/captions/from-video", json={"url": "https://example.com/video.mp4"})
-    captions_repo.create.assert_called_once()
-    assert captions_repo.create.call_args.kwargs["video_id"] == "vid-1"
+        client.post("/captions/from-video", json={"url": " https://example.com/video.mp4 "})
+    captions_repo.create_with_video.assert_awaited_once_with(Captions(), "https://example.com/video.mp4")
+    captions_repo.create.assert_not_called()
 
 
 def test_transcribe_video_error(client):
     override(mock_repo())
-    override_video_repo(mock_repo())
     with patch("app.main.transcribe", side_effect=RuntimeError("Audio file not found")):
         res = client.post("/captions/from-video", json={"url": "https://example.com/bad.mp4"})
     assert res.status_code == 422
     assert "Audio file not found" in res.json()["detail"]
 
 
+@pytest.fixture
+def idempotency_repo():
+    client = AsyncSqliteClient()
+    yield AsyncIdempotencyRepository(client)
+    client.close()
+
+
+def test_transcribe_video_simultaneous_retries_transcribe_once(idempotency_repo):
+    import httpx
+
+    calls = []
+
+    def slow_transcribe(*args):
+        calls.append(args)
+        time.sleep(0.1)
+        return Captions()
+
+    override(mock_repo(create_with_video=RECORD), idempotency_repo)
+    body = {"url": "https://example.com/video.mp4"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(
+                http.post("/captions/from-video", json=body, headers={"Idempotency-Key": "retry-1"}) for _ in range(5)
+            ))
+
+    with patch("app.main.transcribe", side_effect=slow_transcribe):
+        responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [res.status_code for res in responses] == [201] * 5
+    assert all(res.json() == RECORD for res in responses)
+    assert sum(res.headers.get("idempotent-replayed") == "true" for res in responses) == 4
+
+
+def test_transcribe_video_key_reused_with_other_body_is_422(client, idempotency_repo):
+    override(mock_repo(create_with_video=RECORD), idempotency_repo)
+    headers = {"Idempotency-Key": "retry-1"}
+    with patch("app.main.transcribe", return_value=Captions()):
+        client.post("/captions/from-video", json={"url": "https://example.com/a.mp4"}, headers=headers)
+        res = client.post("/captions/from-video", json={"url": "https://example.com/b.mp4"}, headers=headers)
+    assert res.status_code == 422
+
+
+def test_transcribe_video_failure_can_be_retried_with_same_key(client, idempotency_repo):
+    override(mock_repo(create_with_video=RECORD), idempotency_repo)
+    headers = {"Idempotency-Key": "retry-1"}
+    body = {"url": "https://example.com/video.mp4"}
+    with patch("app.main.transcribe", side_effect=[RuntimeError("Audio file not found"), Captions()]):
+        assert client.post("/captions/from-video", json=body, headers=headers).status_code == 422
+        assert client.post("/captions/from-video", json=body, headers=headers).status_code == 201
+
+
 # --- POST /captions/{id}/burn ---
 
 JOB_RECORD = {"id": "job-1", "caption_id": "abc", "status": "pending", "output_url": None, "error": None}
+RECORD_WITH_VIDEO = {**RECORD, "video_id": "vid-1", "video": VIDEO_RECORD}
+
+
+def test_burn_captions_retry_returns_original_job(client, idempotency_repo):
+    captions_repo = mock_repo(get_with_video=dict(RECORD_WITH_VIDEO))
+    burn_repo = mock_repo(create=JOB_RECORD)
+    override(captions_repo, idempotency_repo)
+    override_burn(burn_repo)
+    with patch("app.main.burn_video", new_callable=AsyncMock) as mock_bv:
+        first = client.post("/captions/abc/burn", headers={"Idempotency-Key": "burn-1"})
+        second = client.post("/captions/abc/burn", headers={"Idempotency-Key": "burn-1"})
+    assert first.status_code == second.status_code == 202
+    assert first.json() == second.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    burn_repo.create.assert_awaited_once()
+    mock_bv.assert_awaited_once()
 
 
 def test_burn_captions_returns_202(client):
-    record_with_video = {**RECORD, "video_id": "vid-1"}
-    override(mock_repo(get=record_with_video))
-    override_video_repo(mock_repo(get=VIDEO_RECORD))
+    override(mock_repo(get_with_video=dict(RECORD_WITH_VIDEO)))
     override_burn(mock_repo(create=JOB_RECORD))
     with patch("app.main.burn_video", new_callable=AsyncMock):
         res = client.post("/captions/abc/burn")
@@ -181,9 +808,7 @@ def test_burn_captions_returns_202(client):
 
 
 def test_burn_captions_returns_job(client):
-    record_with_video = {**RECORD, "video_id": "vid-1"}
-    override(mock_repo(get=record_with_video))
-    override_video_repo(mock_repo(get=VIDEO_RECORD))
+    override(mock_repo(get_with_video=dict(RECORD_WITH_VIDEO)))
     override_burn(mock_repo(create=JOB_RECORD))
     with patch("app.main.burn_video", new_callable=AsyncMock):
         res = client.post("/captions/abc/burn")
@@ -193,44 +818,46 @@ def test_burn_captions_returns_job(client):
 
 
 def test_burn_captions_not_found(client):
-    override(mock_repo(get=None))
-    override_video_repo(mock_repo())
+    override(mock_repo(get_with_video=None))
     override_burn(mock_repo())
     res = client.post("/captions/missing/burn")
     assert res.status_code == 404
 
 
 def test_burn_uses_linked_video_url(client):
-    record_with_video = {**RECORD, "video_id": "vid-1"}
-    override(mock_repo(get=record_with_video))
-    override_video_repo(mock_repo(get=VIDEO_RECORD))
+    override(mock_repo(get_with_video=dict(RECORD_WITH_VIDEO)))
     override_burn(mock_repo(create=JOB_RECORD))
     with patch("app.main.burn_video", new_callable=AsyncMock) as mock_bv:
         client.post("/captions/abc/burn")
     assert mock_bv.call_args.args[2] == "https://example.com/video.mp4"
 
 
+def test_burn_fetches_caption_and_video_in_one_query(client):
+    repo = mock_repo(get_with_video=dict(RECORD_WITH_VIDEO))
+    override(repo)
+    override_burn(mock_repo(create=JOB_RECORD))
+    with patch("app.main.burn_video", new_callable=AsyncMock):
+        client.post("/captions/abc/burn")
+    repo.get_with_video.assert_awaited_once_with("abc")
+    repo.get.assert_not_called()
+
+
 def test_burn_no_linked_video_returns_422(client):
-    override(mock_repo(get=RECORD))   # video_id is None
-    override_video_repo(mock_repo())
+    override(mock_repo(get_with_video={**RECORD, "video": None}))   # video_id is None
     override_burn(mock_repo())
     res = client.post("/captions/abc/burn")
     assert res.status_code == 422
 
 
 def test_burn_linked_video_not_found_returns_404(client):
-    record_with_video = {**RECORD, "video_id": "vid-missing"}
-    override(mock_repo(get=record_with_video))
-    override_video_repo(mock_repo(get=None))
+    override(mock_repo(get_with_video={**RECORD, "video_id": "vid-missing", "video": None}))
     override_burn(mock_repo())
     res = client.post("/captions/abc/burn")
     assert res.status_code == 404
 
 
 def test_burn_schedules_background_task(client):
-    record_with_video = {**RECORD, "video_id": "vid-1"}
-    override(mock_repo(get=record_with_video))
-    override_video_repo(mock_repo(get=VIDEO_RECORD))
+    override(mock_repo(get_with_video=dict(RECORD_WITH_VIDEO)))
     override_burn(mock_repo(create=JOB_RECORD))
     with patch("app.main.burn_video", new_callable=AsyncMock) as mock_bv:
         client.post("/captions/abc/burn")
@@ -239,6 +866,8 @@ def test_burn_schedules_background_task(client):
     assert args[0] == "job-1"                                    # job_id
     assert args[1] == "abc"                                       # caption_id
     assert args[2] == "https://example.com/video.mp4"            # video_url
+    assert args[5] == {**RECORD, "video_id": "vid-1"}             # record, so the task skips a re-fetch
+    assert args[6] is not None                                    # storage backend
 
 
 # --- GET /captions/{id}/burn/{job_id} ---
@@ -265,16 +894,102 @@ def test_get_burn_job_done(client):
     assert res.json()["result_url"] == "https://gcs.example.com/out.mp4"
 
 
+# --- GET /captions/{id}/burn/{job_id}/events, WS /captions/{id}/burn/{job_id}/ws ---
+
+def override_events(events=None):
+    events = events or JobEvents()
+    app.dependency_overrides[get_job_events] = lambda: events
+    return events
+
+
+def test_stream_burn_job_from_stored_row(client):
+    override_burn(mock_repo(get={**JOB_RECORD, "status": "failed", "error": "boom"}))
+    override_events()
+    res = client.get("/captions/abc/burn/job-1/events")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert res.headers["cache-control"] == "no-cache"
+    assert res.text.startswith("event: status\ndata: {")
+    assert '"status":"failed"' in res.text and '"error":"boom"' in res.text
+
+
+def test_stream_burn_job_prefers_published_event(client):
+    burn_repo = mock_repo()
+    override_burn(burn_repo)
+    events = override_events()
+    events.publish("job-1", {"id": "job-1", "status": "done", "result_url": "burned/job-1/output.mp4"})
+    res = client.get("/captions/abc/burn/job-1/events")
+    assert res.text == 'event: status\ndata: {"id":"job-1","status":"done","result_url":"burned/job-1/output.mp4"}\n\n'
+    burn_repo.get.assert_not_called()
+    assert events.subscribers("job-1") == 0
+
+
+def test_stream_burn_job_ends_when_stored_row_finishes(client):
+    burn_repo = mock_repo()
+    burn_repo.get.side_effect = [{**JOB_RECORD, "status": "processing"}, {**JOB_RECORD, "status": "done"}]
+    override_burn(burn_repo)
+    override_events()
+    with patch("app.events.HEARTBEAT_SECONDS", 0.01):
+        res = client.get("/captions/abc/burn/job-1/events")
+    statuses = [line for line in res.text.split("\n") if line.startswith("data:")]
+    assert '"status":"processing"' in statuses[0] and '"status":"done"' in statuses[-1]
+    assert burn_repo.get.await_count == 2
+
+
+def test_watch_burn_job_ends_when_stored_row_finishes(client):
+    burn_repo = mock_repo()
+    burn_repo.get.side_effect = [{**JOB_RECORD, "status": "processing"}, {**JOB_RECORD, "status": "failed"}]
+    override_burn(burn_repo)
+    override_events()
+    with patch("app.events.HEARTBEAT_SECONDS", 0.01):
+        with client.websocket_connect("/captions/abc/burn/job-1/ws") as ws:
+            assert ws.receive_json()["status"] == "processing"
+            assert ws.receive_json()["status"] == "failed"
+            assert ws.receive()["type"] == "websocket.close"
+
+
+def test_stream_burn_job_not_found(client):
+    override_burn(mock_repo(get=None))
+    events = override_events()
+    assert client.get("/captions/abc/burn/missing/events").status_code == 404
+    assert events.subscribers("missing") == 0
+
+
+def test_watch_burn_job_sends_events_until_terminal(client):
+    override_burn(mock_repo())
+    events = override_events()
+    events.publish("job-1", {"id": "job-1", "status": "done"})
+    with client.websocket_connect("/captions/abc/burn/job-1/ws") as ws:
+        assert ws.receive_json() == {"id": "job-1", "status": "done"}
+        assert ws.receive()["type"] == "websocket.close"
+    assert events.subscribers("job-1") == 0
+
+
+def test_watch_burn_job_not_found(client):
+    override_burn(mock_repo(get=None))
+    override_events()
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/captions/abc/burn/missing/ws"):
+            pass
+    assert exc.value.code == 4404
+
+
 # --- GET /captions/{id}/burn/{job_id}/download ---
 
 DONE_JOB = {**JOB_RECORD, "status": "done", "result_url": "burned/job-1/output.mp4"}
 SIGNED_URL = "https://storage.googleapis.com/bucket/burned/job-1/output.mp4?X-Goog-Signature=abc"
 
 
+def gcs_storage():
+    storage = MagicMock()
+    storage.local_path.return_value = None
+    storage.signed_url.return_value = SIGNED_URL
+    return storage
+
+
 def test_download_redirects_to_signed_url(client):
-    override_burn(mock_repo(get=DONE_JOB))
-    with patch("app.main.generate_signed_url", return_value=SIGNED_URL):
-        res = client.get("/captions/abc/burn/job-1/download", follow_redirects=False)
+    override_burn(mock_repo(get=DONE_JOB), gcs_storage())
+    res = client.get("/captions/abc/burn/job-1/download", follow_redirects=False)
     assert res.status_code == 302
     assert res.headers["location"] == SIGNED_URL
 
@@ -292,7 +1007,47 @@ def test_download_job_not_done_returns_409(client):
 
 
 def test_download_uses_job_id_for_blob_path(client):
-    override_burn(mock_repo(get=DONE_JOB))
-    with patch("app.main.generate_signed_url", return_value=SIGNED_URL) as mock_sign:
-        client.get("/captions/abc/burn/job-1/download", follow_redirects=False)
-    mock_sign.assert_called_once_with("burned/job-1/output.mp4")
+    storage = gcs_storage()
+    override_burn(mock_repo(get=DONE_JOB), storage)
+    client.get("/captions/abc/burn/job-1/download", follow_redirects=False)
+    storage.signed_url.assert_called_once_with("burned/job-1/output.mp4")
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    output = tmp_path / "burned" / "job-1" / "output.mp4"
+    output.parent.mkdir(parents=True)
+    output.write_bytes(bytes(range(256)) * 4)
+    return storage
+
+
+def test_download_serves_local_file(client, local_storage):
+    override_burn(mock_repo(get=DONE_JOB), local_storage)
+    res = client.get("/captions/abc/burn/job-1/download", follow_redirects=False)
+    assert res.status_code == 200
+    assert res.content == bytes(range(256)) * 4
+    assert res.headers["content-type"] == "video/mp4"
+    assert res.headers["accept-ranges"] == "bytes"
+    assert "immutable" in res.headers["cache-control"]
+
+
+def test_download_local_file_range(client, local_storage):
+    override_burn(mock_repo(get=DONE_JOB), local_storage)
+    res = client.get("/captions/abc/burn/job-1/download", headers={"Range": "bytes=10-19"})
+    assert res.status_code == 206
+    assert res.content == bytes(range(10, 20))
+    assert res.headers["content-range"] == "bytes 10-19/1024"
+
+
+def test_download_local_file_not_modified(client, local_storage):
+    override_burn(mock_repo(get=DONE_JOB), local_storage)
+    etag = client.get("/captions/abc/burn/job-1/download").headers["etag"]
+    res = client.get("/captions/abc/burn/job-1/download", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+
+def test_download_local_file_missing_returns_404(client, tmp_path):
+    override_burn(mock_repo(get=DONE_JOB), LocalStorage(str(tmp_path)))
+    assert client.get("/captions/abc/burn/job-1/download").status_code == 404
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.metrics import (
+    HTTP_REQUEST_SECONDS,
+    REPOSITORY_SECONDS,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    instrument,
+)
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+def test_histogram_renders_cumulative_buckets(registry):
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, route="/a")
+    assert registry.render() == (
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{route="/a",le="0.1"} 2\n'
+        'latency_seconds_bucket{route="/a",le="1"} 3\n'
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4\n'
+        'latency_seconds_sum{route="/a"} 3.65\n'
+        'latency_seconds_count{route="/a"} 4\n'
+    )
+
+
+def test_histogram_series_per_label_values(registry):
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), registry=registry)
+    histogram.observe(0.1, route="/a")
+    histogram.observe(0.1, route="/b")
+    histogram.observe(0.1, route="/b")
+    assert histogram.count(route="/a") == 1
+    assert histogram.count(route="/b") == 2
+    assert histogram.count(route="/c") == 0
+
+
+def test_histogram_requires_every_label(registry):
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), registry=registry)
+    with pytest.raises(KeyError):
+        histogram.observe(0.1)
+
+
+def test_histogram_escapes_label_values(registry):
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(1,), registry=registry)
+    histogram.observe(0.5, route='a"b\\c')
+    assert 'route="a\\"b\\\\c"' in registry.render()
+
+
+def test_histogram_time_records_on_error(registry):
+    histogram = Histogram("latency_seconds", "Latency.", ("stage",), registry=registry)
+    with pytest.raises(RuntimeError), histogram.time(stage="encode"):
+        raise RuntimeError
+    assert histogram.count(stage="encode") == 1
+
+
+def test_gauge_track_and_function(registry):
+    gauge = Gauge("active", "Active.", registry=registry)
+    with gauge.track():
+        assert gauge.value() == 1
+    assert gauge.value() == 0
+    Gauge("pending", "Pending.", function=lambda: 7, registry=registry)
+    assert "pending 7\n" in registry.render()
+
+
+def test_registry_clear(registry):
+    histogram = Histogram("latency_seconds", "Latency.", registry=registry)
+    histogram.observe(1)
+    registry.clear()
+    assert histogram.count() == 0
+
+
+def test_instrument_times_sync_and_async_methods():
+    @instrument
+    class FakeRepository:
+        def get(self, id):
+            return id
+
+        async def aget(self, id):
+            return id
+
+        def _private(self):
+            return None
+
+    repo = FakeRepository()
+    before = REPOSITORY_SECONDS.count(repository="FakeRepository", method="get")
+    assert repo.get("a") == "a"
+    assert asyncio.run(repo.aget("b")) == "b"
+    assert REPOSITORY_SECONDS.count(repository="FakeRepository", method="get") == before + 1
+    assert REPOSITORY_SECONDS.count(repository="FakeRepository", method="aget") == 1
+    assert REPOSITORY_SECONDS.count(repository="FakeRepository", method="_private") == 0
+    assert FakeRepository.get.__name__ == "get"
+
+
+def test_middleware_labels_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{id}")
+    def get_thing(id: str):
+        return id
+
+    client = TestClient(app)
+    client.get("/things/1")
+    client.get("/things/2")
+    client.get("/nowhere")
+    assert HTTP_REQUEST_SECONDS.count(method="GET", route="/things/{id}", status=200) == 2
+    assert HTTP_REQUEST_SECONDS.count(method="GET", route="unmatched", status=404) >= 1
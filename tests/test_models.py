@@ -1,4 +1,6 @@
-from app.models import _format_ass_time, CaptionsWord, CaptionsEvent, CaptionsInfo, Captions, BurnRequest, BurnJob
+import pytest
+
+from app.models import _format_ass_time, _format_srt_time, _format_vtt_time, CaptionsWord, CaptionsEvent, CaptionsInfo, Captions, BurnJob
 
 
 def word(text: str, start: int, end: int) -> CaptionsWord:
@@ -20,6 +22,15 @@ def test_format_ass_time_full():
     assert _format_ass_time(ms) == "1:02:03.40"
 
 
+def test_format_srt_time():
+    ms = 1 * 3600000 + 2 * 60000 + 3 * 1000 + 456
+    assert _format_srt_time(ms) == "01:02:03,456"
+
+
+def test_format_vtt_time():
+    assert _format_vtt_time(3500) == "00:00:03.500"
+
+
 # --- CaptionsEvent ---
 
 def test_event_full_text():
@@ -122,24 +133,105 @@ def test_to_ass_multiple_events():
     assert captions.to_ass().count("Dialogue:") == 2
 
 
-# --- BurnRequest ---
+# --- Captions.to_srt() / to_vtt() ---
+
+def test_to_srt_numbers_cues():
+    captions = Captions(events=[
+        CaptionsEvent(Words=[word("A", 0, 500)]),
+        CaptionsEvent(Words=[word("B", 500, 1000)]),
+    ])
+    assert captions.to_srt() == (
+        "1\n00:00:00,000 --> 00:00:00,500\nA\n\n"
+        "2\n00:00:00,500 --> 00:00:01,000\nB\n\n"
+    )
+
+
+def test_to_srt_no_events():
+    assert Captions().to_srt() == ""
+
+
+def test_to_vtt_header_and_cue():
+    captions = Captions(events=[CaptionsEvent(Words=[word("Hi", 500, 1500)])])
+    assert captions.to_vtt() == "WEBVTT\n\n00:00:00.500 --> 00:00:01.500\nHi\n\n"
+
+
+def test_iter_ass_matches_to_ass():
+    captions = Captions(events=[CaptionsEvent(Words=[word("Hi", 500, 1500)])])
+    assert "".join(captions.iter_ass()) == captions.to_ass()
+
+
+# --- Captions.from_ass() / from_srt() / from_vtt() ---
+
+def test_from_ass_round_trip():
+    captions = Captions(info=CaptionsInfo(Title="My Video", ScaledBorderAndShadow=False), events=[
+        CaptionsEvent(Words=[word("Hello", 500, 1000), word("world", 1000, 1500)]),
+        CaptionsEvent(Words=[word("Bye", 2000, 2500)]),
+    ])
+    parsed = Captions.from_ass(captions.to_ass().splitlines())
+    assert parsed.to_ass() == captions.to_ass()
+    assert parsed.info.Title == "My Video"
+    assert parsed.info.ScaledBorderAndShadow is False
+
+
+def test_from_ass_strips_override_tags():
+    lines = [
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,{\\b1}Hello,\\Nworld",
+    ]
+    event = Captions.from_ass(lines).events[0]
+    assert event.full_text == "Hello, world"
+    assert event.MarginL == "0"
+
+
+def test_from_ass_rejects_truncated_dialogue():
+    lines = [
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        "Dialogue: 0",
+    ]
+    with pytest.raises(ValueError, match="Start and End"):
+        Captions.from_ass(lines)
+
+
+def test_from_ass_rejects_format_without_timings():
+    lines = ["[Events]", "Format: Layer, Style, Text", "Dialogue: 0,Default,Hello"]
+    with pytest.raises(ValueError, match="Start and End"):
+        Captions.from_ass(lines)
+
+
+def test_from_srt_spreads_word_timings():
+    lines = ["1", "00:00:01,000 --> 00:00:02,000", "ab cd", "", "2", "00:00:03,000 --> 00:00:04,000", "e"]
+    captions = Captions.from_srt(lines, title="Clip")
+    assert captions.info.Title == "Clip"
+    assert [(w.text, w.start, w.end) for w in captions.events[0].Words] == [("ab", 1000, 1500), ("cd", 1500, 2000)]
+    assert captions.events[1].full_text == "e"
+
+
+def test_from_vtt_skips_header_and_notes():
+    lines = ["WEBVTT", "", "NOTE a comment", "", "cue-1", "01:02.500 --> 01:03.000 align:start", "<v Bob>Hi</v>"]
+    captions = Captions.from_vtt(lines)
+    assert len(captions.events) == 1
+    assert captions.events[0].full_text == "Hi"
+    assert captions.events[0].Words[0].start == 62500
+
 
-def test_burn_request():
-    req = BurnRequest(video_url="https://example.com/video.mp4")
-    assert req.video_url == "https://example.com/video.mp4"
+def test_from_srt_round_trip():
+    captions = Captions(events=[CaptionsEvent(Words=[word("Hi", 500, 1500)])])
+    assert Captions.from_srt(captions.to_srt().splitlines()).to_srt() == captions.to_srt()
 
 
 # --- BurnJob ---
 
 def test_burn_job_defaults():
     job = BurnJob(id="j1", caption_id="c1", status="pending")
-    assert job.output_url is None
+    assert job.result_url is None
     assert job.error is None
 
 
 def test_burn_job_done():
-    job = BurnJob(id="j1", caption_id="c1", status="done", output_url="https://gcs.example.com/file.mp4")
-    assert job.output_url == "https://gcs.example.com/file.mp4"
+    job = BurnJob(id="j1", caption_id="c1", status="done", result_url="https://gcs.example.com/file.mp4")
+    assert job.result_url == "https://gcs.example.com/file.mp4"
 
 
 def test_burn_job_failed():
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import pstats
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+
+from app.profiling import ProfileStore, ProfilingMiddleware, profiled, span
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProfileStore(str(tmp_path))
+
+
+def test_span_is_shared_noop_without_profile():
+    assert span("a") is span("b")
+    with span("a"):
+        pass
+
+
+def test_profiled_saves_stats_and_spans(store):
+    with profiled("job", store) as profile:
+        with span("outer"):
+            with span("inner"):
+                sum(range(1000))
+
+    summary = json.loads(store.path(profile.id, ".json").read_text())
+    assert summary["name"] == "job"
+    assert [(s["name"], s["depth"]) for s in summary["spans"]] == [("outer", 0), ("inner", 1)]
+    assert "cumulative" in summary["top_functions"]
+    assert pstats.Stats(str(store.path(profile.id, ".prof"))).total_calls > 0
+
+
+def test_profiled_saves_on_error(store):
+    with pytest.raises(RuntimeError), profiled("job", store) as profile:
+        raise RuntimeError
+    assert store.path(profile.id, ".json") is not None
+
+
+def test_only_one_profile_at_a_time(store):
+    with profiled("first", store) as first, profiled("second", store) as second:
+        assert first is not None
+        assert second is None
+
+
+def test_spans_from_threadpool_workers(store):
+    def work():
+        with span("in_thread"):
+            return 1
+
+    async def scenario():
+        with profiled("request", store) as profile:
+            await run_in_threadpool(work)
+            await asyncio.to_thread(work)
+        return profile
+
+    profile = asyncio.run(scenario())
+    assert [s["name"] for s in profile.spans] == ["in_thread", "in_thread"]
+
+
+def test_store_rejects_unknown_and_malformed_ids(store):
+    assert store.path("0" * 32, ".json") is None
+    assert store.path("../etc/passwd", ".json") is None
+
+
+def make_app(store):
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=store)
+
+    @app.get("/work")
+    def work():
+        with span("work"):
+            return {"ok": True}
+
+    return TestClient(app)
+
+
+def settings(enabled: bool):
+    return MagicMock(profiling_enabled=enabled)
+
+
+def test_middleware_profiles_requests_with_header(store):
+    with patch("app.profiling.get_settings", return_value=settings(True)):
+        res = make_app(store).get("/work", headers={"X-Profile": "1"})
+    profile_id = res.headers["x-profile-id"]
+    summary = json.loads(store.path(profile_id, ".json").read_text())
+    assert summary["name"] == "GET /work"
+    assert [s["name"] for s in summary["spans"]] == ["work"]
+
+
+def test_middleware_ignores_header_when_disabled(store):
+    with patch("app.profiling.get_settings", return_value=settings(False)):
+        res = make_app(store).get("/work", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in res.headers
+
+
+def test_middleware_skips_settings_without_header(store):
+    with patch("app.profiling.get_settings") as get_settings:
+        res = make_app(store).get("/work")
+    assert "x-profile-id" not in res.headers
+    get_settings.assert_not_called()
@@ -1,20 +1,53 @@
-from unittest.mock import MagicMock
-from app.repository import BurnJobRepository, CaptionsRepository, VideoRepository
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.repository import (
+    SUMMARY_COLUMNS,
+    AsyncBurnJobRepository,
+    AsyncCaptionsRepository,
+    AsyncVideoRepository,
+    BurnJobRepository,
+    CaptionsRepository,
+    VideoRepository,
+    caption_version,
+    derived_columns,
+)
 from app.models import Captions, CaptionsInfo, CaptionsEvent, CaptionsWord
 
 RECORD = {"id": "abc", "title": "Test", "data": {}}
 
 
-def make_client(*, select_data=None, eq_data=None, insert_data=None, update_data=None):
+def make_client(
+    *, select_data=None, eq_data=None, in_data=None, insert_data=None, update_data=None, page_data=None, rpc_data=None
+):
     """Build a MagicMock Supabase client with preset return values."""
     client = MagicMock()
+    client.rpc.return_value.execute.return_value.data = rpc_data or []
+    client.table.return_value.select.return_value.in_.return_value.execute.return_value.data = in_data or []
     client.table.return_value.select.return_value.execute.return_value.data = select_data or []
+    client.table.return_value.select.return_value.order.return_value.limit.return_value.execute.return_value.data = page_data or []
     client.table.return_value.select.return_value.eq.return_value.execute.return_value.data = eq_data or []
     client.table.return_value.insert.return_value.execute.return_value.data = insert_data or []
     client.table.return_value.update.return_value.eq.return_value.execute.return_value.data = update_data or []
     return client
 
 
+def make_async_client(*, eq_data=None, insert_data=None, update_data=None):
+    """Like make_client, but for the async Supabase client whose execute() is awaited."""
+    client = MagicMock()
+    table = client.table.return_value
+    table.select.return_value.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=eq_data or []))
+    table.insert.return_value.execute = AsyncMock(return_value=MagicMock(data=insert_data or []))
+    table.update.return_value.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=update_data or []))
+    table.delete.return_value.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    return client
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
 # =============================================================================
 # VideoRepository
 # =============================================================================
@@ -47,6 +80,18 @@ def test_video_get_not_found():
     assert repo.get("missing") is None
 
 
+def test_video_get_many_uses_one_in_filter():
+    client = make_client(in_data=[VIDEO_RECORD])
+    assert VideoRepository(client).get_many(["vid-1", "vid-2"]) == [VIDEO_RECORD]
+    client.table.return_value.select.return_value.in_.assert_called_once_with("id", ["vid-1", "vid-2"])
+
+
+def test_video_get_many_empty_skips_query():
+    client = make_client()
+    assert VideoRepository(client).get_many([]) == []
+    client.table.assert_not_called()
+
+
 # =============================================================================
 # CaptionsRepository
 # =============================================================================
@@ -54,10 +99,38 @@ def test_video_get_not_found():
 # --- list ---
 
 def test_list_returns_rows():
-    repo = CaptionsRepository(make_client(select_data=[RECORD]))
+    repo = CaptionsRepository(make_client(page_data=[RECORD]))
     assert repo.list() == [RECORD]
 
 
+def test_list_selects_summary_columns_by_default():
+    client = make_client()
+    CaptionsRepository(client).list()
+    client.table.return_value.select.assert_called_once_with(SUMMARY_COLUMNS)
+
+
+def test_list_include_data():
+    client = make_client()
+    CaptionsRepository(client).list(include_data=True)
+    client.table.return_value.select.assert_called_once_with(SUMMARY_COLUMNS + ",data")
+
+
+def test_list_orders_and_limits():
+    client = make_client()
+    CaptionsRepository(client).list(limit=10)
+    select = client.table.return_value.select.return_value
+    select.order.assert_called_once_with("id")
+    select.order.return_value.limit.assert_called_once_with(10)
+
+
+def test_list_after_cursor_and_video_filter():
+    client = make_client()
+    CaptionsRepository(client).list(after="abc", video_id="vid-1")
+    select = client.table.return_value.select.return_value
+    select.gt.assert_called_once_with("id", "abc")
+    select.gt.return_value.eq.assert_called_once_with("video_id", "vid-1")
+
+
 def test_list_empty():
     repo = CaptionsRepository(make_client())
     assert repo.list() == []
@@ -75,6 +148,46 @@ def test_get_not_found():
     assert repo.get("missing") is None
 
 
+# --- get_with_video ---
+
+def test_get_with_video_embeds_video():
+    client = make_client(eq_data=[{**RECORD, "video_id": "vid-1", "videos": VIDEO_RECORD}])
+    record = CaptionsRepository(client).get_with_video("abc")
+    assert record == {**RECORD, "video_id": "vid-1", "video": VIDEO_RECORD}
+    client.table.return_value.select.assert_called_once_with("*,videos(*)")
+
+
+def test_get_with_video_without_link():
+    client = make_client(eq_data=[{**RECORD, "video_id": None, "videos": None}])
+    assert CaptionsRepository(client).get_with_video("abc")["video"] is None
+
+
+def test_get_with_video_not_found():
+    assert CaptionsRepository(make_client()).get_with_video("missing") is None
+
+
+def test_get_with_video_caches_caption_only():
+    cache = MagicMock()
+    client = make_client(eq_data=[{**RECORD, "videos": VIDEO_RECORD}])
+    CaptionsRepository(client, cache=cache).get_with_video("abc")
+    assert cache.put.call_args.args[0] == RECORD
+
+
+# --- get_many ---
+
+def test_get_many_uses_one_in_filter():
+    client = make_client(in_data=[RECORD, {**RECORD, "id": "def"}])
+    rows = CaptionsRepository(client).get_many(["abc", "def"])
+    assert [row["id"] for row in rows] == ["abc", "def"]
+    client.table.return_value.select.return_value.in_.assert_called_once_with("id", ["abc", "def"])
+
+
+def test_get_many_empty_skips_query():
+    client = make_client()
+    assert CaptionsRepository(client).get_many([]) == []
+    client.table.assert_not_called()
+
+
 # --- create ---
 
 def test_create_returns_row():
@@ -90,6 +203,33 @@ def test_create_with_video_id():
     assert payload["video_id"] == "vid-1"
 
 
+def test_create_stores_summary_columns():
+    client = make_client(insert_data=[RECORD])
+    CaptionsRepository(client).create(Captions(events=[
+        CaptionsEvent(Words=[CaptionsWord(text="a", start=0, end=500), CaptionsWord(text="b", start=500, end=900)]),
+    ]))
+    payload = client.table.return_value.insert.call_args.args[0]
+    assert payload["duration_ms"] == 900
+    assert payload["word_count"] == 2
+
+
+def test_derived_columns():
+    captions = Captions(events=[
+        CaptionsEvent(Words=[CaptionsWord(text="Hello", start=0, end=500), CaptionsWord(text="there", start=500, end=900)]),
+        CaptionsEvent(Words=[CaptionsWord(text="world", start=1000, end=1400)]),
+    ])
+    assert derived_columns(captions.model_dump()) == {
+        "full_text": captions.full_text,
+        "duration_ms": 1400,
+        "event_count": 2,
+        "word_count": 3,
+    }
+
+
+def test_derived_columns_empty():
+    assert derived_columns({}) == {"full_text": "", "duration_ms": 0, "event_count": 0, "word_count": 0}
+
+
 def test_create_without_video_id():
     client = make_client(insert_data=[RECORD])
     CaptionsRepository(client).create(Captions())
@@ -97,8 +237,68 @@ def test_create_without_video_id():
     assert payload["video_id"] is None
 
 
+# --- create_with_video ---
+
+def test_create_with_video_uses_single_rpc():
+    client = make_client(rpc_data=[{**RECORD, "video_id": "vid-1"}])
+    row = CaptionsRepository(client).create_with_video(Captions(info=CaptionsInfo(Title="T")), "https://example.com/v.mp4")
+    assert row["video_id"] == "vid-1"
+    name, params = client.rpc.call_args.args
+    assert name == "create_captions_with_video"
+    assert params["video_url"] == "https://example.com/v.mp4"
+    assert params["caption"]["title"] == "T"
+    assert params["caption"]["word_count"] == 0
+    client.table.assert_not_called()
+
+
+def test_create_with_video_passes_search_rows_to_the_rpc():
+    client = make_client(rpc_data=[dict(RECORD)])
+    CaptionsRepository(client).create_with_video(INDEXED_CAPTIONS, "https://example.com/v.mp4")
+    client.rpc.assert_called_once()
+    assert client.rpc.call_args.args[1]["caption"]["search_events"] == INDEXED_ENTRY["events"]
+
+
+# --- create_many ---
+
+def test_create_many_inserts_in_one_call():
+    client = make_client(insert_data=[RECORD, RECORD])
+    result = CaptionsRepository(client).create_many([Captions(), Captions(info=CaptionsInfo(Title="B"))])
+    assert result == [RECORD, RECORD]
+    rows = client.table.return_value.insert.call_args.args[0]
+    assert [row["title"] for row in rows] == ["Default Title", "B"]
+
+
+def test_create_many_empty_skips_insert():
+    client = make_client()
+    assert CaptionsRepository(client).create_many([]) == []
+    client.table.return_value.insert.assert_not_called()
+
+
 # --- update ---
 
+def test_caption_version_prefers_version_column():
+    assert caption_version({**RECORD, "version": 5}) == "5"
+
+
+def test_caption_version_hashes_document_without_column():
+    assert caption_version(RECORD) == caption_version(dict(RECORD))
+    assert caption_version(RECORD) != caption_version({**RECORD, "data": {"events": []}})
+
+
+def test_update_with_version_adds_guard():
+    client = make_client()
+    guarded = client.table.return_value.update.return_value.eq.return_value.eq
+    guarded.return_value.execute.return_value.data = [RECORD]
+    assert CaptionsRepository(client).update("abc", Captions(), version="3") == RECORD
+    guarded.assert_called_once_with("version", "3")
+
+
+def test_update_with_stale_version_returns_none():
+    client = make_client()
+    client.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.return_value.data = []
+    assert CaptionsRepository(client).update("abc", Captions(), version="3") is None
+
+
 def test_update_found():
     repo = CaptionsRepository(make_client(update_data=[RECORD]))
     result = repo.update("abc", Captions())
@@ -110,22 +310,218 @@ def test_update_not_found():
     assert repo.update("missing", Captions()) is None
 
 
+# --- update_data ---
+
+def test_update_data_writes_raw_document():
+    client = make_client(update_data=[RECORD])
+    data = {"info": {"Title": "Edited"}, "events": []}
+    assert CaptionsRepository(client).update_data("abc", data) == RECORD
+    client.table.return_value.update.assert_called_once_with({
+        "title": "Edited",
+        "data": data,
+        "full_text": "",
+        "duration_ms": 0,
+        "event_count": 0,
+        "word_count": 0,
+    })
+
+
+def test_update_data_not_found():
+    repo = CaptionsRepository(make_client())
+    assert repo.update_data("missing", {}) is None
+
+
 # --- get_text ---
 
 def test_get_text_found():
-    captions = Captions(events=[
-        CaptionsEvent(Words=[CaptionsWord(text="Hello", start=0, end=500)])
-    ])
-    row = {"data": captions.model_dump()}
-    repo = CaptionsRepository(make_client(eq_data=[row]))
+    repo = CaptionsRepository(make_client(eq_data=[{"full_text": "Hello"}]))
     assert repo.get_text("abc") == "Hello"
 
 
+def test_get_text_reads_only_full_text_column():
+    client = make_client(eq_data=[{"full_text": "Hello"}])
+    CaptionsRepository(client).get_text("abc")
+    client.table.return_value.select.assert_called_once_with("full_text")
+
+
+def test_get_text_record_includes_version():
+    client = make_client(eq_data=[{"full_text": "Hello", "version": 2}])
+    assert CaptionsRepository(client).get_text_record("abc") == {"full_text": "Hello", "version": 2}
+    client.table.return_value.select.assert_called_once_with("full_text,version")
+
+
+def test_get_version_record_reads_only_version_column():
+    client = make_client(eq_data=[{"version": 2}])
+    assert CaptionsRepository(client).get_version_record("abc") == {"version": 2}
+    client.table.return_value.select.assert_called_once_with("version")
+
+
 def test_get_text_not_found():
     repo = CaptionsRepository(make_client())
     assert repo.get_text("missing") is None
 
 
+# --- search index ---
+
+INDEXED_RECORD = {"id": "abc", "title": "Test", "data": {"events": [
+    {"Words": [{"text": "Hello", "start": 0, "end": 500}, {"text": "there", "start": 500, "end": 900}]},
+    {"Words": []},
+]}}
+INDEXED_ENTRY = {"id": "abc", "events": [{"event_index": 0, "text": "Hello there", "starts": [0, 500]}]}
+INDEXED_CAPTIONS = Captions(events=[
+    CaptionsEvent(Words=[CaptionsWord(text="Hello", start=0, end=500), CaptionsWord(text="there", start=500, end=900)]),
+    CaptionsEvent(),
+])
+
+
+def test_create_indexes_row():
+    client = make_client(insert_data=[INDEXED_RECORD])
+    CaptionsRepository(client).create(INDEXED_CAPTIONS)
+    client.rpc.assert_called_once_with("index_caption_events", {"entries": [INDEXED_ENTRY]})
+
+
+def test_create_many_indexes_rows_in_one_call():
+    client = make_client(insert_data=[INDEXED_RECORD, {**INDEXED_RECORD, "id": "def"}])
+    CaptionsRepository(client).create_many([Captions(), Captions()])
+    client.rpc.assert_called_once_with("index_caption_events", {"entries": [INDEXED_ENTRY, {**INDEXED_ENTRY, "id": "def"}]})
+
+
+def test_update_reindexes_row():
+    client = make_client(update_data=[INDEXED_RECORD])
+    CaptionsRepository(client).update("abc", INDEXED_CAPTIONS)
+    client.rpc.assert_called_once_with("index_caption_events", {"entries": [INDEXED_ENTRY]})
+
+
+def test_update_not_found_skips_index():
+    client = make_client()
+    CaptionsRepository(client).update_data("missing", {})
+    client.rpc.assert_not_called()
+
+
+def test_delete_leaves_search_rows_to_the_database():
+    client = make_client()
+    CaptionsRepository(client).delete("abc")
+    client.rpc.assert_not_called()
+
+
+def test_search_matches_terms_as_a_phrase():
+    client = make_client(rpc_data=[{"caption_id": "abc", "event_index": 3, "text": "Well, hello there!", "starts": [0, 200, 400]}])
+    hits = CaptionsRepository(client).search("Hello  THERE", limit=5)
+    client.rpc.assert_called_once_with("search_caption_events", {"query": "hello there", "max_results": 5})
+    assert hits == [{"caption_id": "abc", "event_index": 3, "start_ms": 200, "text": "Well, hello there!"}]
+
+
+def test_search_without_terms_skips_query():
+    client = make_client()
+    assert CaptionsRepository(client).search("?!") == []
+    client.rpc.assert_not_called()
+
+
+# --- patch_events ---
+
+PATCHED_EVENT = {"Words": [{"text": "Hi", "start": 0, "end": 500}]}
+PATCHED_DATA = {"events": [PATCHED_EVENT]}
+
+
+def test_patch_events_writes_only_changed_events():
+    client = make_client(rpc_data=[{"id": "abc", "version": 5, "updated_at": "now"}])
+    row = CaptionsRepository(client).patch_events(
+        "abc", PATCHED_DATA, [("set", 0, PATCHED_EVENT), ("delete", 1, None)], version=4
+    )
+    assert row == {"id": "abc", "version": 5, "updated_at": "now"}
+    client.rpc.assert_called_once_with("patch_caption_events", {
+        "caption_id": "abc",
+        "expected_version": 4,
+        "changes": [
+            {
+                "op": "set",
+                "index": 0,
+                "event": PATCHED_EVENT,
+                "compact": {"t": ["Hi"], "s": [0], "d": [500]},
+                "search": {"text": "Hi", "starts": [0]},
+            },
+            {"op": "delete", "index": 1},
+        ],
+        "derived": derived_columns(PATCHED_DATA),
+    })
+    client.table.return_value.update.assert_not_called()
+
+
+def test_patch_events_falls_back_to_full_write_when_nothing_is_patched():
+    # No row back: a compressed document, or a version conflict the guarded write reports too.
+    client = make_client()
+    guarded = client.table.return_value.update.return_value.eq.return_value.eq
+    guarded.return_value.execute.return_value.data = [RECORD]
+    assert CaptionsRepository(client).patch_events("abc", PATCHED_DATA, [("set", 0, PATCHED_EVENT)], version=4) == RECORD
+    guarded.assert_called_once_with("version", 4)
+
+
+def test_patch_events_rewrites_compressed_documents_directly():
+    client = make_client(update_data=[RECORD])
+    CaptionsRepository(client, encoding="zstd").patch_events("abc", PATCHED_DATA, [("set", 0, PATCHED_EVENT)], version=4)
+    assert "patch_caption_events" not in [call.args[0] for call in client.rpc.call_args_list]
+    client.table.return_value.update.assert_called_once()
+
+
+def test_patch_events_invalidates_cache():
+    cache = MagicMock()
+    client = make_client(rpc_data=[{"id": "abc", "version": 5, "updated_at": "now"}])
+    CaptionsRepository(client, cache=cache).patch_events("abc", PATCHED_DATA, [("set", 0, PATCHED_EVENT)], version=4)
+    cache.invalidate.assert_called_once_with("abc", "5")
+
+
+# --- cache ---
+
+def test_get_reads_through_cache():
+    cache = MagicMock()
+    cache.get.return_value = None
+    client = make_client(eq_data=[RECORD])
+    assert CaptionsRepository(client, cache=cache).get("abc") == RECORD
+    cache.put.assert_called_once()
+    assert cache.put.call_args.args[0] == RECORD
+
+
+def test_get_cache_hit_skips_query():
+    cache = MagicMock()
+    cache.get.return_value = RECORD
+    client = make_client()
+    assert CaptionsRepository(client, cache=cache).get("abc") == RECORD
+    client.table.assert_not_called()
+
+
+def test_update_invalidates_cache():
+    cache = MagicMock()
+    CaptionsRepository(make_client(update_data=[INDEXED_RECORD]), cache=cache).update("abc", Captions())
+    cache.invalidate.assert_called_once_with("abc", caption_version(INDEXED_RECORD))
+
+
+def test_delete_invalidates_cache():
+    cache = MagicMock()
+    CaptionsRepository(make_client(), cache=cache).delete("abc")
+    cache.invalidate.assert_called_once_with("abc")
+
+
+# --- storage encoding ---
+
+def test_create_encodes_data_and_returns_plain_document():
+    from app.codec import encode
+    captions = Captions(events=[CaptionsEvent(Words=[CaptionsWord(text="a", start=0, end=1)])])
+    stored = {**RECORD, "data": encode(captions.model_dump(), "compact")}
+    client = make_client(insert_data=[stored])
+    row = CaptionsRepository(client, encoding="compact").create(captions)
+    payload = client.table.return_value.insert.call_args.args[0]
+    assert payload["data"]["_v"] == 2
+    assert payload["full_text"] == "a"
+    assert row["data"] == captions.model_dump()
+
+
+def test_get_decodes_stored_document():
+    from app.codec import encode
+    data = Captions(events=[CaptionsEvent(Words=[CaptionsWord(text="a", start=0, end=1)])]).model_dump()
+    repo = CaptionsRepository(make_client(eq_data=[{**RECORD, "data": encode(data, "zstd")}]))
+    assert repo.get("abc")["data"] == data
+
+
 # =============================================================================
 # BurnJobRepository
 # =============================================================================
@@ -178,7 +574,173 @@ def test_burn_job_update_status_failed_with_error():
     })
 
 
+def test_burn_job_update_status_with_telemetry():
+    client = make_client()
+    BurnJobRepository(client).update_status("job-1", "done", telemetry={"upload_bytes": 10})
+    client.table.return_value.update.assert_called_once_with({"status": "done", "telemetry": {"upload_bytes": 10}})
+
+
 def test_burn_job_update_status_targets_correct_job():
     client = make_client()
     BurnJobRepository(client).update_status("job-1", "processing")
     client.table.return_value.update.return_value.eq.assert_called_once_with("id", "job-1")
+
+
+def test_burn_job_update_many_upserts_per_column_set():
+    client = make_client()
+    BurnJobRepository(client).update_many({
+        "job-1": {"status": "processing"},
+        "job-2": {"status": "processing"},
+        "job-3": {"status": "done", "result_url": "burned/job-3/output.mp4"},
+    })
+    upsert = client.table.return_value.upsert
+    assert [c.args[0] for c in upsert.call_args_list] == [
+        [{"id": "job-1", "status": "processing"}, {"id": "job-2", "status": "processing"}],
+        [{"id": "job-3", "status": "done", "result_url": "burned/job-3/output.mp4"}],
+    ]
+    assert upsert.call_args.kwargs["on_conflict"] == "id"
+    assert upsert.return_value.execute.call_count == 2
+
+
+def test_async_burn_job_update_many():
+    client = MagicMock()
+    client.table.return_value.upsert.return_value.execute = AsyncMock()
+    run(AsyncBurnJobRepository(client).update_many({"job-1": {"status": "processing"}}))
+    client.table.return_value.upsert.assert_called_once_with(
+        [{"id": "job-1", "status": "processing"}], on_conflict="id", returning="minimal"
+    )
+    client.table.return_value.upsert.return_value.execute.assert_awaited_once()
+
+
+def test_burn_job_update_status_publishes_event():
+    events = MagicMock()
+    BurnJobRepository(make_client(), events=events).update_status("job-1", "failed", error="ffmpeg crashed")
+    events.publish.assert_called_once_with("job-1", {"id": "job-1", "status": "failed", "error": "ffmpeg crashed"})
+
+
+# =============================================================================
+# Async repositories
+# =============================================================================
+
+def test_async_video_create_and_get():
+    repo = AsyncVideoRepository(make_async_client(insert_data=[VIDEO_RECORD], eq_data=[VIDEO_RECORD]))
+    assert run(repo.create("https://example.com/video.mp4")) == VIDEO_RECORD
+    assert run(repo.get("vid-1")) == VIDEO_RECORD
+
+
+def test_async_burn_job_update_status():
+    client = make_async_client()
+    run(AsyncBurnJobRepository(client).update_status("job-1", "failed", error="boom"))
+    client.table.return_value.update.assert_called_once_with({"status": "failed", "error": "boom"})
+    client.table.return_value.update.return_value.eq.return_value.execute.assert_awaited_once()
+
+
+def test_async_burn_job_get_not_found():
+    assert run(AsyncBurnJobRepository(make_async_client()).get("missing")) is None
+
+
+def test_async_captions_get_reads_through_cache():
+    cache = MagicMock()
+    cache.get.return_value = None
+    repo = AsyncCaptionsRepository(make_async_client(eq_data=[RECORD]), cache=cache)
+    assert run(repo.get("abc")) == RECORD
+    cache.put.assert_called_once()
+
+
+def test_async_captions_create_indexes_and_returns_plain_document():
+    client = make_async_client(insert_data=[dict(INDEXED_RECORD)])
+    row = run(AsyncCaptionsRepository(client, encoding="compact").create(Captions()))
+    assert row["data"] == Captions().model_dump()
+    assert client.table.return_value.insert.call_args.args[0]["data"]["_v"] == 2
+    client.rpc.assert_called_once_with("index_caption_events", {"entries": [{"id": "abc", "events": []}]})
+    client.rpc.return_value.execute.assert_awaited_once()
+
+
+def test_async_captions_search():
+    client = make_async_client()
+    client.rpc.return_value.execute.return_value.data = [{"caption_id": "abc", "event_index": 0, "text": "hi", "starts": [7]}]
+    assert run(AsyncCaptionsRepository(client).search("hi")) == [
+        {"caption_id": "abc", "event_index": 0, "start_ms": 7, "text": "hi"},
+    ]
+
+
+def test_async_captions_update_encodes_and_indexes_off_the_event_loop():
+    threads = {}
+    client = make_async_client(update_data=[dict(INDEXED_RECORD)])
+    rpc = client.rpc.return_value
+    client.rpc.side_effect = lambda *args: threads.setdefault("index", threading.get_ident()) and rpc
+    table = client.table.return_value
+
+    def update_query(payload):
+        threads["encode"] = threading.get_ident()
+        return table.update.return_value
+
+    table.update.side_effect = update_query
+
+    async def update():
+        threads["loop"] = threading.get_ident()
+        return await AsyncCaptionsRepository(client, encoding="compact").update("abc", Captions())
+
+    assert run(update())["data"] == Captions().model_dump()
+    assert threads["encode"] != threads["loop"]
+    assert threads["index"] != threads["loop"]
+
+
+def test_async_captions_patch_events():
+    client = make_async_client()
+    client.rpc.return_value.execute.return_value.data = [{"id": "abc", "version": 5, "updated_at": "now"}]
+    row = run(AsyncCaptionsRepository(client).patch_events("abc", PATCHED_DATA, [("set", 0, PATCHED_EVENT)], version=4))
+    assert row["version"] == 5
+    assert client.rpc.call_args.args[0] == "patch_caption_events"
+    client.table.return_value.update.assert_not_called()
+
+
+def test_async_captions_reads_decode_and_use_the_cache_off_the_event_loop():
+    threads = {}
+    cache = MagicMock()
+    cache.get.side_effect = lambda id: threads.setdefault("cache.get", threading.get_ident()) and None
+    cache.put.side_effect = lambda row, version: threads.setdefault("cache.put", threading.get_ident())
+    client = make_async_client(eq_data=[{**RECORD, "videos": None}])
+    select = client.table.return_value.select.return_value
+    select.in_.return_value.execute = AsyncMock(return_value=MagicMock(data=[dict(RECORD)]))
+    select.order.return_value.limit.return_value.execute = AsyncMock(return_value=MagicMock(data=[dict(RECORD)]))
+
+    def decode(data):
+        threads.setdefault("decode", set()).add(threading.get_ident())
+        return data
+
+    async def read():
+        threads["loop"] = threading.get_ident()
+        repo = AsyncCaptionsRepository(client, cache=cache)
+        await repo.get("abc")
+        await repo.get_with_video("abc")
+        await repo.get_many(["abc"])
+        await repo.list(include_data=True)
+
+    with patch("app.repository.codec.decode", side_effect=decode):
+        run(read())
+    assert threads["loop"] not in {threads["cache.get"], threads["cache.put"]}
+    assert threads["loop"] not in threads["decode"]
+
+
+def test_async_captions_update_not_found():
+    assert run(AsyncCaptionsRepository(make_async_client()).update("missing", Captions())) is None
+
+
+def test_async_captions_delete_invalidates():
+    cache = MagicMock()
+    run(AsyncCaptionsRepository(make_async_client(), cache=cache).delete("abc"))
+    cache.invalidate.assert_called_once_with("abc")
+
+
+def test_async_captions_get_with_video():
+    client = make_async_client(eq_data=[{**RECORD, "videos": VIDEO_RECORD}])
+    assert run(AsyncCaptionsRepository(client).get_with_video("abc")) == {**RECORD, "video": VIDEO_RECORD}
+
+
+def test_async_captions_create_with_video():
+    client = MagicMock()
+    client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[dict(RECORD)]))
+    row = run(AsyncCaptionsRepository(client).create_with_video(Captions(), "https://example.com/v.mp4"))
+    assert row["id"] == "abc"
+    client.rpc.return_value.execute.assert_awaited_once()
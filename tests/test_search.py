@@ -0,0 +1,96 @@
+import sqlite3
+
+from app.search import SearchIndex
+
+
+def make_data(*events):
+    return {"events": [
+        {"Words": [{"text": t, "start": s, "end": s + 100} for t, s in words]}
+        for words in events
+    ]}
+
+
+DATA = make_data(
+    [("Hello", 0), ("there,", 200), ("general", 400), ("Kenobi!", 600)],
+    [("Well", 1000), ("hello", 1200), ("there.", 1400)],
+)
+
+
+def test_search_phrase_returns_timestamped_hits():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    hits = index.search("hello there")
+    assert sorted((h["event_index"], h["start_ms"]) for h in hits) == [(0, 0), (1, 1200)]
+    assert all(h["caption_id"] == "cap-1" for h in hits)
+
+
+def test_search_is_phrase_not_bag_of_words():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    assert index.search("there hello") == []
+
+
+def test_search_ignores_case_and_punctuation():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    [hit] = index.search("KENOBI")
+    assert hit["start_ms"] == 600
+    assert hit["text"] == "Hello there, general Kenobi!"
+
+
+def test_search_across_captions():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    index.index("cap-2", make_data([("general", 50)]))
+    assert {h["caption_id"] for h in index.search("general")} == {"cap-1", "cap-2"}
+
+
+def test_reindex_replaces_previous_document():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    index.index("cap-1", make_data([("goodbye", 0)]))
+    assert index.search("hello") == []
+    assert len(index.search("goodbye")) == 1
+
+
+def test_remove():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    index.remove("cap-1")
+    assert index.search("hello") == []
+
+
+def test_remove_keeps_other_captions():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    index.index("cap-2", make_data([("general", 50)]))
+    index.remove("cap-1")
+    assert [h["caption_id"] for h in index.search("general")] == ["cap-2"]
+    assert index._conn.execute("SELECT DISTINCT caption_id FROM caption_event_rows").fetchall() == [("cap-2",)]
+
+
+def test_maps_rows_of_an_index_written_before_the_rowid_table(tmp_path):
+    path = str(tmp_path / "search.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE VIRTUAL TABLE caption_events USING fts5("
+        "text, caption_id UNINDEXED, event_index UNINDEXED, starts UNINDEXED, tokenize='unicode61')"
+    )
+    conn.execute("INSERT INTO caption_events VALUES ('hello there', 'cap-1', 0, '[0, 200]')")
+    conn.commit()
+    conn.close()
+
+    index = SearchIndex(path)
+    index.index("cap-1", make_data([("goodbye", 0)]))
+    assert index.search("hello") == []
+    assert len(index.search("goodbye")) == 1
+
+
+def test_search_limit():
+    index = SearchIndex()
+    index.index("cap-1", DATA)
+    assert len(index.search("hello", limit=1)) == 1
+
+
+def test_search_empty_query():
+    assert SearchIndex().search("!!") == []
@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from app.models import ResegmentRequest
+from app.segmentation import resegment
+
+
+def make_data(*events):
+    return {"events": [
+        {"Style": "Default", "Words": [{"text": t, "start": s, "end": e} for t, s, e in words]}
+        for words in events
+    ]}
+
+
+def random_data(seed: int, words: int = 300) -> dict:
+    rng = random.Random(seed)
+    events, current, cursor = [], [], 0
+    for _ in range(words):
+        text = rng.choice(["a", "word", "longer", "sentence.", "what?", "x" * rng.randint(1, 30)])
+        duration = rng.randint(50, 900)
+        current.append((text, cursor, cursor + duration))
+        cursor += duration + rng.choice([0, 10, 200, 1500])
+        if rng.random() < 0.05:
+            events.append(current)
+            current = []
+    return make_data(*events, current)
+
+
+def flat(data):
+    return [(w["text"], w["start"], w["end"]) for e in data["events"] for w in e["Words"]]
+
+
+def text(event):
+    return " ".join(w["text"] for w in event["Words"])
+
+
+def test_splits_on_max_chars():
+    data = make_data([("aaaa", 0, 100), ("bbbb", 100, 200), ("cccc", 200, 300)])
+    assert resegment(data, ResegmentRequest(max_chars=9)) == 2
+    assert [text(e) for e in data["events"]] == ["aaaa bbbb", "cccc"]
+
+
+def test_splits_on_gap():
+    data = make_data([("a", 0, 100), ("b", 1000, 1100)])
+    resegment(data, ResegmentRequest(min_gap_ms=500))
+    assert [text(e) for e in data["events"]] == ["a", "b"]
+
+
+def test_splits_on_punctuation():
+    data = make_data([("Hi.", 0, 100), ("Bye", 100, 200)])
+    resegment(data, ResegmentRequest())
+    assert [text(e) for e in data["events"]] == ["Hi.", "Bye"]
+    resegment(data, ResegmentRequest(split_on_punctuation=False))
+    assert [text(e) for e in data["events"]] == ["Hi. Bye"]
+
+
+def test_splits_on_max_duration():
+    data = make_data([("a", 0, 1000), ("b", 1000, 2000), ("c", 2000, 3000)])
+    resegment(data, ResegmentRequest(max_duration_ms=2000))
+    assert [text(e) for e in data["events"]] == ["a b", "c"]
+
+
+def test_keeps_style_of_first_word_event():
+    data = make_data([("a", 0, 100)], [("b", 100, 200)])
+    data["events"][1]["Style"] = "Alt"
+    resegment(data, ResegmentRequest(max_chars=1))
+    assert [e["Style"] for e in data["events"]] == ["Default", "Alt"]
+
+
+def test_empty_document():
+    data = {"events": []}
+    assert resegment(data, ResegmentRequest()) == 0
+    assert data["events"] == []
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_preserves_word_order_and_timings(seed):
+    data = random_data(seed)
+    before = flat(data)
+    resegment(data, ResegmentRequest(max_chars=random.Random(seed).randint(5, 60)))
+    assert flat(data) == before
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_respects_limits_for_multi_word_events(seed):
+    request = ResegmentRequest(max_chars=32, max_duration_ms=3000, min_gap_ms=1000)
+    data = random_data(seed)
+    resegment(data, request)
+    for event in data["events"]:
+        words = event["Words"]
+        assert words
+        if len(words) > 1:
+            assert len(text(event)) <= request.max_chars
+            assert words[-1]["end"] - words[0]["start"] <= request.max_duration_ms
+            assert all(b["start"] - a["end"] < request.min_gap_ms for a, b in zip(words, words[1:]))
@@ -0,0 +1,224 @@
+import asyncio
+
+import pytest
+
+from app.cache import CaptionsCache, LRUCache
+from app.editing import apply_ops
+from app.models import Captions, CaptionsEvent, CaptionsInfo, CaptionsPatch, CaptionsWord
+from app.repository import AsyncCaptionsRepository, BurnJobRepository, CaptionsRepository, VideoRepository
+from app.sqlite import AsyncSqliteClient, SqliteClient
+
+
+def make_captions(title="Test", text="Hello"):
+    return Captions(
+        info=CaptionsInfo(Title=title),
+        events=[CaptionsEvent(Words=[CaptionsWord(text=text, start=0, end=500)])],
+    )
+
+
+@pytest.fixture
+def client():
+    client = SqliteClient()
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def repo(client):
+    return CaptionsRepository(client, encoding="compact")
+
+
+def test_wal_mode(tmp_path):
+    client = SqliteClient(str(tmp_path / "captions.db"))
+    assert client._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    client.close()
+
+
+def test_create_and_get_round_trip(repo):
+    row = repo.create(make_captions())
+    assert row["version"] == 1
+    assert row["word_count"] == 1
+    assert repo.get(row["id"])["data"] == make_captions().model_dump()
+
+
+def test_data_is_stored_as_json(client, repo):
+    row = repo.create(make_captions())
+    stored = client._conn.execute("SELECT json_extract(data, '$._v') FROM captions WHERE id = ?", (row["id"],))
+    assert stored.fetchone()[0] == 2
+
+
+def test_update_bumps_version(repo):
+    row = repo.create(make_captions())
+    updated = repo.update(row["id"], make_captions(title="New"))
+    assert updated["version"] == 2
+    assert updated["title"] == "New"
+
+
+def test_update_with_stale_version_is_rejected(repo):
+    row = repo.create(make_captions())
+    repo.update(row["id"], make_captions())
+    assert repo.update(row["id"], make_captions(title="Lost"), version="1") is None
+    assert repo.get(row["id"])["title"] == "Test"
+
+
+def test_cache_fill_racing_an_update_keeps_the_new_version(client):
+    repo = CaptionsRepository(client, cache=CaptionsCache(LRUCache(1_000_000, 300)))
+    row = repo.create(make_captions())
+    fetched = repo._get_query(row["id"]).execute()  # a reader fetches v1 ...
+    repo.update(row["id"], make_captions(title="New"))  # ... a writer commits v2 ...
+    repo._fetched(fetched.data)  # ... then the reader fills the cache
+    current = repo.get(row["id"])
+    assert current["version"] == 2
+    assert current["title"] == "New"
+
+
+def test_delete_with_version(repo):
+    row = repo.create(make_captions())
+    assert repo.delete(row["id"], version="2") is False
+    assert repo.delete(row["id"], version="1") is True
+    assert repo.get(row["id"]) is None
+
+
+def test_list_paginates_by_id(repo):
+    ids = sorted(row["id"] for row in repo.create_many([make_captions(title=str(i)) for i in range(5)]))
+    first = repo.list(limit=2)
+    second = repo.list(limit=2, after=first[-1]["id"])
+    assert [row["id"] for row in first + second] == ids[:4]
+    assert "data" not in first[0]
+
+
+def test_get_text_record(repo):
+    row = repo.create(make_captions(text="Hi"))
+    assert repo.get_text_record(row["id"]) == {"full_text": "Hi", "version": 1}
+
+
+def test_get_version_record(repo):
+    row = repo.create(make_captions())
+    assert repo.get_version_record(row["id"]) == {"version": 1}
+    assert repo.get_version_record("missing") is None
+
+
+def test_get_many(repo):
+    rows = repo.create_many([make_captions(), make_captions()])
+    found = repo.get_many([row["id"] for row in rows] + ["missing"])
+    assert sorted(row["id"] for row in found) == sorted(row["id"] for row in rows)
+
+
+def test_create_with_video_and_embedded_get(client, repo):
+    row = repo.create_with_video(make_captions(), "https://example.com/video.mp4")
+    assert row["video_id"] is not None
+    record = repo.get_with_video(row["id"])
+    assert record["video"] == VideoRepository(client).get(row["video_id"])
+
+
+def test_create_with_video_is_atomic(client, repo):
+    with pytest.raises(Exception):
+        client.rpc("create_captions_with_video", {"video_url": "https://example.com/v.mp4", "caption": {}}).execute()
+    assert client._conn.execute("SELECT count(*) FROM videos").fetchone()[0] == 0
+
+
+def test_search_follows_writes(repo):
+    row = repo.create(make_captions(text="Hello"))
+    assert [hit["caption_id"] for hit in repo.search("hello")] == [row["id"]]
+    repo.update(row["id"], make_captions(text="Goodbye"))
+    assert repo.search("hello") == []
+    assert repo.search("goodbye")[0]["start_ms"] == 0
+
+
+def test_search_indexes_create_with_video_and_create_many(repo):
+    row = repo.create_with_video(make_captions(text="Kenobi"), "https://example.com/video.mp4")
+    rows = repo.create_many([make_captions(text="Kenobi"), make_captions(text="Other")])
+    assert {hit["caption_id"] for hit in repo.search("kenobi")} == {row["id"], rows[0]["id"]}
+
+
+def test_delete_removes_search_rows(client, repo):
+    row = repo.create(make_captions(text="Hello"))
+    kept = repo.create(make_captions(text="Hello"))
+    repo.delete(row["id"])
+    assert [hit["caption_id"] for hit in repo.search("hello")] == [kept["id"]]
+    assert [tuple(r) for r in client._conn.execute("SELECT DISTINCT caption_id FROM caption_event_rows")] == [(kept["id"],)]
+
+
+PATCH_OPS = [
+    {"op": "insert_event", "index": 1, "event": {"Words": [{"text": "inserted", "start": 600, "end": 900}]}},
+    {"op": "delete_event", "index": 0},
+    {"op": "edit_word", "event": 1, "word": 0, "text": "edited"},
+    {"op": "insert_event", "index": 2, "event": {}},
+]
+
+
+def three_events():
+    return Captions(events=[
+        CaptionsEvent(Words=[CaptionsWord(text=text, start=i * 1000, end=i * 1000 + 500)])
+        for i, text in enumerate(["first", "second", "third"])
+    ])
+
+
+@pytest.mark.parametrize("encoding", ["json", "compact"])
+def test_patch_events_writes_changes_in_place(client, encoding):
+    repo = CaptionsRepository(client, encoding=encoding)
+    row = repo.create(three_events())
+    record = repo.get(row["id"])
+    changes = apply_ops(record["data"], CaptionsPatch(ops=PATCH_OPS).ops)
+    patched = repo.patch_events(row["id"], record["data"], changes, version=record["version"])
+    assert patched["version"] == 2
+    stored = repo.get(row["id"])
+    assert stored["data"] == record["data"]
+    assert stored["full_text"] == "inserted edited  third"
+    assert stored["event_count"] == 4
+    assert [(hit["event_index"], hit["text"]) for q in ["first", "inserted", "edited", "third"] for hit in repo.search(q)] == [
+        (0, "inserted"), (1, "edited"), (3, "third"),
+    ]
+
+
+def test_patch_events_with_stale_version_writes_nothing(client, repo):
+    row = repo.create(three_events())
+    record = repo.get(row["id"])
+    repo.update(row["id"], three_events())
+    changes = apply_ops(record["data"], CaptionsPatch(ops=PATCH_OPS).ops)
+    assert repo.patch_events(row["id"], record["data"], changes, version=record["version"]) is None
+    assert repo.get(row["id"])["version"] == 2
+    assert [hit["event_index"] for hit in repo.search("first")] == [0]
+
+
+def test_patch_events_rewrites_compressed_documents(client):
+    row = CaptionsRepository(client, encoding="zstd").create(three_events())
+    repo = CaptionsRepository(client, encoding="compact")
+    record = repo.get(row["id"])
+    changes = apply_ops(record["data"], CaptionsPatch(ops=PATCH_OPS).ops)
+    assert repo.patch_events(row["id"], record["data"], changes, version=record["version"])["version"] == 2
+    assert repo.get(row["id"])["data"] == record["data"]
+
+
+def test_burn_job_lifecycle(client, repo):
+    caption = repo.create(make_captions())
+    jobs = BurnJobRepository(client)
+    job = jobs.create(caption["id"])
+    assert job["status"] == "pending"
+    jobs.update_status(job["id"], "done", output_url="burned/x.mp4")
+    assert jobs.get(job["id"])["result_url"] == "burned/x.mp4"
+
+
+def test_burn_job_update_many_keeps_unwritten_columns(client, repo):
+    caption = repo.create(make_captions())
+    jobs = BurnJobRepository(client)
+    first, second = jobs.create(caption["id"]), jobs.create(caption["id"])
+    jobs.update_status(first["id"], "processing", output_url="burned/x.mp4")
+    jobs.update_many({first["id"]: {"status": "done"}, second["id"]: {"status": "failed", "error": "boom"}})
+    assert jobs.get(first["id"])["status"] == "done"
+    assert jobs.get(first["id"])["result_url"] == "burned/x.mp4"
+    assert jobs.get(second["id"])["error"] == "boom"
+
+
+def test_rejects_unsafe_identifiers(client):
+    with pytest.raises(ValueError):
+        client.table("captions; drop table captions").select("*").execute()
+
+
+def test_async_client():
+    async def scenario():
+        repo = AsyncCaptionsRepository(AsyncSqliteClient())
+        row = await repo.create(make_captions())
+        return await repo.get(row["id"])
+
+    assert asyncio.run(scenario())["title"] == "Test"
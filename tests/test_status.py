@@ -0,0 +1,94 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.events import JobEvents
+from app.status import StatusWriter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def repo():
+    repo = AsyncMock()
+    with patch("app.status.AsyncBurnJobRepository", return_value=repo):
+        yield repo
+
+
+def test_coalesces_updates_per_job(repo):
+    writer = StatusWriter(client=AsyncMock(), interval=60)
+
+    async def scenario():
+        await writer.update_status("job-1", "processing")
+        await writer.update_status("job-1", "processing", telemetry={"stage": 2})
+        await writer.update_status("job-2", "processing")
+        assert writer.pending() == 2
+        repo.update_many.assert_not_called()
+        await writer.flush()
+
+    run(scenario())
+    repo.update_many.assert_awaited_once_with({
+        "job-1": {"status": "processing", "telemetry": {"stage": 2}},
+        "job-2": {"status": "processing"},
+    })
+    assert writer.pending() == 0
+
+
+def test_terminal_status_flushes_immediately(repo):
+    writer = StatusWriter(client=AsyncMock(), interval=60)
+
+    async def scenario():
+        await writer.update_status("job-1", "processing")
+        await writer.update_status("job-2", "done", output_url="burned/job-2/output.mp4")
+
+    run(scenario())
+    repo.update_many.assert_awaited_once_with({
+        "job-1": {"status": "processing"},
+        "job-2": {"status": "done", "result_url": "burned/job-2/output.mp4"},
+    })
+
+
+def test_flushes_after_interval(repo):
+    writer = StatusWriter(client=AsyncMock(), interval=0.01)
+
+    async def scenario():
+        await writer.update_status("job-1", "processing")
+        await writer.update_status("job-2", "processing")
+        await asyncio.sleep(0.05)
+
+    run(scenario())
+    repo.update_many.assert_awaited_once_with({"job-1": {"status": "processing"}, "job-2": {"status": "processing"}})
+
+
+def test_zero_interval_writes_every_update(repo):
+    writer = StatusWriter(client=AsyncMock(), interval=0)
+    run(writer.update_status("job-1", "processing"))
+    repo.update_many.assert_awaited_once_with({"job-1": {"status": "processing"}})
+
+
+def test_failed_flush_keeps_updates_under_newer_ones(repo):
+    writer = StatusWriter(client=AsyncMock(), interval=60)
+    repo.update_many.side_effect = [RuntimeError("db down"), None]
+
+    async def scenario():
+        await writer.update_status("job-1", "processing", telemetry={"a": 1})
+        with pytest.raises(RuntimeError):
+            await writer.update_status("job-2", "failed", error="boom")
+        await writer.update_status("job-1", "done")
+
+    run(scenario())
+    repo.update_many.assert_awaited_with({
+        "job-1": {"status": "done", "telemetry": {"a": 1}},
+        "job-2": {"status": "failed", "error": "boom"},
+    })
+
+
+def test_publishes_before_flush(repo):
+    events = MagicMock(spec=JobEvents)
+    writer = StatusWriter(client=AsyncMock(), events=events, interval=60)
+    run(writer.update_status("job-1", "processing"))
+    events.publish.assert_called_once_with("job-1", {"id": "job-1", "status": "processing"})
+    repo.update_many.assert_not_called()
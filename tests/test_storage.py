@@ -1,27 +1,185 @@
 import datetime
+import os
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
+from google.api_core.exceptions import ServiceUnavailable
 
-from app.storage import generate_signed_url, upload_to_gcs
+from app import storage as storage_module
+from app.storage import (
+    GCSStorage,
+    LocalStorage,
+    UploadResult,
+    generate_signed_url,
+    get_credentials,
+    get_storage,
+    get_storage_client,
+    upload_to_gcs,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_storage():
+    storage_module._credentials = None
+    storage_module._signed_urls = storage_module.LRUCache(max_bytes=1024 * 1024, ttl_seconds=0)
+    get_storage_client.cache_clear()
+    yield
+    get_storage_client.cache_clear()
+
+
+def in_minutes(minutes):
+    return datetime.datetime.now(datetime.UTC).replace(tzinfo=None) + datetime.timedelta(minutes=minutes)
 
 
 # --- upload_to_gcs ---
 
-def test_upload_to_gcs_returns_blob_name():
+def test_upload_to_gcs_returns_blob_name(tmp_path):
+    local = tmp_path / "output.mp4"
+    local.write_bytes(b"video")
     mock_blob = MagicMock()
     mock_bucket = MagicMock()
     mock_bucket.blob.return_value = mock_blob
     mock_client = MagicMock()
     mock_client.bucket.return_value = mock_bucket
 
-    with patch("app.storage.storage.Client", return_value=mock_client), \
+    with patch("app.storage.get_credentials"), \
+         patch("app.storage.storage.Client", return_value=mock_client), \
          patch("app.storage.get_settings") as mock_settings:
         mock_settings.return_value.gcs_bucket = "my-bucket"
-        result = upload_to_gcs("/tmp/output.mp4", "burned/job-1/output.mp4")
+        mock_settings.return_value.upload_workers = 1
+        result = upload_to_gcs(str(local), "burned/job-1/output.mp4")
+
+    assert result.destination == "burned/job-1/output.mp4"
+    assert result.bytes == 5
+    assert result.chunks == 1
+    mock_blob.upload_from_filename.assert_called_once_with(str(local))
+
+
+def test_upload_to_gcs_reuses_client(tmp_path):
+    local = tmp_path / "output.mp4"
+    local.write_bytes(b"video")
+    with patch("app.storage.get_credentials"), \
+         patch("app.storage.storage.Client") as mock_client_cls, \
+         patch("app.storage.get_settings") as mock_settings:
+        mock_settings.return_value.upload_workers = 1
+        upload_to_gcs(str(local), "burned/a/output.mp4")
+        upload_to_gcs(str(local), "burned/b/output.mp4")
+    mock_client_cls.assert_called_once()
+
+
+def test_upload_result_telemetry():
+    result = UploadResult("burned/x.mp4", bytes=10_000_000, seconds=2.5, chunks=4)
+    assert result.telemetry() == {
+        "upload_bytes": 10_000_000,
+        "upload_seconds": 2.5,
+        "upload_bytes_per_second": 4_000_000,
+        "upload_chunks": 4,
+    }
+
+
+# --- parallel chunked upload, against an in-memory GCS stand-in ---
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.content_type = None
+
+    def upload_from_file(self, file_obj, size):
+        chunk = self.name.rsplit("/", 1)[-1]
+        with self.bucket.lock:
+            if self.bucket.failures.get(chunk, 0):
+                self.bucket.failures[chunk] -= 1
+                raise ServiceUnavailable("injected")
+        data = file_obj.read(size)
+        with self.bucket.lock:
+            self.bucket.objects[self.name] = data
+            self.bucket.uploads.append(self.name)
+
+    def upload_from_filename(self, path):
+        with open(path, "rb") as f:
+            self.upload_from_file(f, os.path.getsize(path))
+
+    def compose(self, sources):
+        assert len(sources) <= 32, "GCS composes at most 32 sources"
+        with self.bucket.lock:
+            self.bucket.objects[self.name] = b"".join(self.bucket.objects[s.name] for s in sources)
+            self.bucket.content_types[self.name] = self.content_type
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+        self.content_types = {}
+        self.uploads = []
+        self.failures = {}  # chunk number -> how many more attempts fail
+        self.lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def delete_blobs(self, blobs, on_error=None):
+        for blob in blobs:
+            if self.objects.pop(blob.name, None) is None and on_error:
+                on_error(blob)
+
+
+@pytest.fixture
+def fake_bucket():
+    bucket = FakeBucket()
+    client = MagicMock()
+    client.bucket.return_value = bucket
+    with patch("app.storage.get_storage_client", return_value=client), \
+         patch("app.storage.get_settings") as mock_settings, \
+         patch("app.storage.RETRY_BACKOFF_SECONDS", 0):
+        mock_settings.return_value.upload_chunk_bytes = 10
+        mock_settings.return_value.upload_workers = 4
+        mock_settings.return_value.upload_chunk_retries = 2
+        yield bucket
+
+
+def write_file(tmp_path, size):
+    path = tmp_path / "output.mp4"
+    path.write_bytes(bytes(i % 251 for i in range(size)))
+    return path
+
+
+def test_parallel_upload_composes_chunks(tmp_path, fake_bucket):
+    path = write_file(tmp_path, 95)
+    result = upload_to_gcs(str(path), "burned/job-1/output.mp4")
+    assert result.chunks == 10
+    assert fake_bucket.objects == {"burned/job-1/output.mp4": path.read_bytes()}
+    assert fake_bucket.content_types["burned/job-1/output.mp4"] == "video/mp4"
+
+
+def test_parallel_upload_composes_in_levels_past_32_parts(tmp_path, fake_bucket):
+    path = write_file(tmp_path, 1005)
+    result = upload_to_gcs(str(path), "burned/job-1/output.mp4")
+    assert result.chunks == 101
+    assert fake_bucket.objects == {"burned/job-1/output.mp4": path.read_bytes()}
+
+
+def test_parallel_upload_retries_failed_chunks(tmp_path, fake_bucket):
+    path = write_file(tmp_path, 45)
+    fake_bucket.failures = {"00002": 2}
+    upload_to_gcs(str(path), "burned/job-1/output.mp4")
+    assert fake_bucket.objects["burned/job-1/output.mp4"] == path.read_bytes()
+    assert sum(name.endswith("/00002") for name in fake_bucket.uploads) == 1
+
 
-    assert result == "burned/job-1/output.mp4"
-    mock_blob.upload_from_filename.assert_called_once_with("/tmp/output.mp4")
+def test_parallel_upload_gives_up_and_cleans_up(tmp_path, fake_bucket):
+    path = write_file(tmp_path, 45)
+    fake_bucket.failures = {"00001": 3}
+    with pytest.raises(ServiceUnavailable):
+        upload_to_gcs(str(path), "burned/job-1/output.mp4")
+    assert fake_bucket.objects == {}
+
+
+def test_small_files_skip_chunking(tmp_path, fake_bucket):
+    path = write_file(tmp_path, 10)
+    assert upload_to_gcs(str(path), "burned/job-1/output.mp4").chunks == 1
+    assert fake_bucket.uploads == ["burned/job-1/output.mp4"]
 
 
 # --- generate_signed_url ---
@@ -31,6 +189,7 @@ def mock_gcs():
     mock_credentials = MagicMock()
     mock_credentials.service_account_email = "sa@project.iam.gserviceaccount.com"
     mock_credentials.token = "mock-token"
+    mock_credentials.expiry = in_minutes(60)
 
     mock_blob = MagicMock()
     mock_blob.generate_signed_url.return_value = "https://signed.url/output.mp4"
@@ -44,6 +203,7 @@ def mock_gcs():
          patch("app.storage.storage.Client", return_value=mock_client), \
          patch("app.storage.get_settings") as mock_settings:
         mock_settings.return_value.gcs_bucket = "my-bucket"
+        mock_blob.credentials = mock_credentials
         yield mock_blob
 
 
@@ -76,3 +236,94 @@ def test_generate_signed_url_passes_credentials(mock_gcs):
     kwargs = mock_gcs.generate_signed_url.call_args.kwargs
     assert kwargs["service_account_email"] == "sa@project.iam.gserviceaccount.com"
     assert kwargs["access_token"] == "mock-token"
+
+
+def test_generate_signed_url_reuses_cached_url(mock_gcs):
+    first = generate_signed_url("burned/job-1/output.mp4")
+    second = generate_signed_url("burned/job-1/output.mp4")
+    assert first == second
+    mock_gcs.generate_signed_url.assert_called_once()
+
+
+def test_generate_signed_url_cache_keys_on_blob_and_expiry(mock_gcs):
+    generate_signed_url("burned/job-1/output.mp4")
+    generate_signed_url("burned/job-2/output.mp4")
+    generate_signed_url("burned/job-1/output.mp4", expiry_minutes=60)
+    assert mock_gcs.generate_signed_url.call_count == 3
+
+
+def test_generate_signed_url_not_reused_near_expiry(mock_gcs):
+    now = [0.0]
+    storage_module._signed_urls = storage_module.LRUCache(max_bytes=1024, ttl_seconds=0, clock=lambda: now[0])
+    generate_signed_url("burned/job-1/output.mp4")
+    now[0] = 15 * 60 - 30  # inside the reuse margin
+    generate_signed_url("burned/job-1/output.mp4")
+    assert mock_gcs.generate_signed_url.call_count == 2
+
+
+# --- get_credentials ---
+
+def test_credentials_refresh_only_near_expiry(mock_gcs):
+    credentials = mock_gcs.credentials
+    get_credentials()
+    get_credentials()
+    credentials.refresh.assert_not_called()
+
+    credentials.expiry = in_minutes(2)
+    get_credentials()
+    credentials.refresh.assert_called_once()
+
+
+def test_credentials_refresh_when_token_missing(mock_gcs):
+    mock_gcs.credentials.token = None
+    get_credentials()
+    mock_gcs.credentials.refresh.assert_called_once()
+
+
+def test_credentials_loaded_once(mock_gcs):
+    with patch("google.auth.default", return_value=(mock_gcs.credentials, "project")) as mock_default:
+        storage_module._credentials = None
+        get_credentials()
+        get_credentials()
+    mock_default.assert_called_once()
+
+
+# --- LocalStorage ---
+
+def test_local_upload_copies_file(tmp_path):
+    source = tmp_path / "output.mp4"
+    source.write_bytes(b"video")
+    storage = LocalStorage(str(tmp_path / "store"))
+    result = storage.upload(str(source), "burned/job-1/output.mp4")
+    assert result.destination == "burned/job-1/output.mp4"
+    assert result.bytes == 5
+    assert storage.local_path("burned/job-1/output.mp4").read_bytes() == b"video"
+    assert [p.name for p in (tmp_path / "store" / "burned" / "job-1").iterdir()] == ["output.mp4"]
+
+
+def test_local_path_missing(tmp_path):
+    assert LocalStorage(str(tmp_path)).local_path("burned/missing/output.mp4") is None
+
+
+def test_local_storage_rejects_escaping_names(tmp_path):
+    with pytest.raises(ValueError):
+        LocalStorage(str(tmp_path / "store")).local_path("../secret")
+
+
+def test_local_storage_has_no_signed_url(tmp_path):
+    assert LocalStorage(str(tmp_path)).signed_url("burned/job-1/output.mp4") is None
+
+
+def test_gcs_storage_delegates(mock_gcs):
+    assert GCSStorage().signed_url("burned/job-1/output.mp4") == "https://signed.url/output.mp4"
+    assert GCSStorage().local_path("burned/job-1/output.mp4") is None
+
+
+@pytest.mark.parametrize("backend, cls", [("gcs", GCSStorage), ("local", LocalStorage)])
+def test_get_storage_selected_by_settings(backend, cls):
+    get_storage.cache_clear()
+    with patch("app.storage.get_settings") as mock_settings:
+        mock_settings.return_value.storage_backend = backend
+        mock_settings.return_value.storage_local_path = "storage"
+        assert isinstance(get_storage(), cls)
+    get_storage.cache_clear()
@@ -0,0 +1,72 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models import RetimeRequest
+from app.timing import build_time_map, retime
+
+
+def make_data():
+    return {"events": [
+        {"Words": [{"text": "a", "start": 0, "end": 1000}, {"text": "b", "start": 1000, "end": 2000}]},
+        {"Words": [{"text": "c", "start": 5000, "end": 6000}]},
+    ]}
+
+
+def spans(data):
+    return [(w["start"], w["end"]) for e in data["events"] for w in e["Words"]]
+
+
+# --- build_time_map ---
+
+def test_time_map_offset_and_scale():
+    time_map = build_time_map(RetimeRequest(offset_ms=500, scale=2))
+    assert time_map(1000) == 2500
+
+
+def test_time_map_clamps_at_zero():
+    assert build_time_map(RetimeRequest(offset_ms=-2000))(1000) == 0
+
+
+def test_time_map_piecewise_interpolates():
+    time_map = build_time_map(RetimeRequest(sync_points=[(0, 0), (1000, 2000), (2000, 2500)]))
+    assert time_map(500) == 1000
+    assert time_map(1500) == 2250
+
+
+def test_time_map_piecewise_extrapolates_end_segments():
+    time_map = build_time_map(RetimeRequest(sync_points=[(1000, 1100), (2000, 2100)]))
+    assert time_map(0) == 100
+    assert time_map(3000) == 3100
+
+
+# --- RetimeRequest validation ---
+
+@pytest.mark.parametrize("points", [[(0, 0)], [(0, 0), (0, 10)], [(0, 100), (10, 50)]])
+def test_invalid_sync_points(points):
+    with pytest.raises(ValidationError):
+        RetimeRequest(sync_points=points)
+
+
+def test_scale_must_be_positive():
+    with pytest.raises(ValidationError):
+        RetimeRequest(scale=0)
+
+
+# --- retime ---
+
+def test_retime_shifts_all_words():
+    data = make_data()
+    assert retime(data, RetimeRequest(offset_ms=250)) == 3
+    assert spans(data) == [(250, 1250), (1250, 2250), (5250, 6250)]
+
+
+def test_retime_restricted_to_range():
+    data = make_data()
+    assert retime(data, RetimeRequest(offset_ms=100, from_ms=1000, to_ms=5000)) == 1
+    assert spans(data) == [(0, 1000), (1100, 2100), (5000, 6000)]
+
+
+def test_retime_keeps_end_after_start():
+    data = make_data()
+    retime(data, RetimeRequest(offset_ms=-1500))
+    assert all(start <= end for start, end in spans(data))